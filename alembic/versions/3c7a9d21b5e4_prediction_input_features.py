@@ -0,0 +1,34 @@
+"""Store prediction inputs as JSONB
+
+Revision ID: 3c7a9d21b5e4
+Revises: 14e9b64f2ea5
+Create Date: 2026-10-18 09:12:40.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7a9d21b5e4'
+down_revision: Union[str, Sequence[str], None] = '14e9b64f2ea5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # New rows store the raw ChurnInput as JSONB; input_data (JSON text of
+    # the scaled feature row) is kept, nullable, for rows written before
+    op.add_column('prediction', sa.Column('input_features', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.alter_column('prediction', 'input_data', existing_type=sa.VARCHAR(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("UPDATE prediction SET input_data = input_features::text WHERE input_data IS NULL")
+    op.alter_column('prediction', 'input_data', existing_type=sa.VARCHAR(), nullable=False)
+    op.drop_column('prediction', 'input_features')
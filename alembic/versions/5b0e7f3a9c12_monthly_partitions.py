@@ -0,0 +1,156 @@
+"""Partition prediction, predictionmetadata and predictionlog by month
+
+Revision ID: 5b0e7f3a9c12
+Revises: 8f21c4d0a6b3
+Create Date: 2026-10-18 14:02:51.774190
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0e7f3a9c12'
+down_revision: Union[str, Sequence[str], None] = '8f21c4d0a6b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> (partition key, indexes); partitions for future months are then
+# created by the maintenance job in src/utils/partitions.py
+TABLES = {
+    'prediction': ('created_at', [
+        ('ix_prediction_created_at_id', ['created_at', 'id']),
+        ('ix_prediction_user_id_created_at_id', ['user_id', 'created_at', 'id']),
+    ]),
+    'predictionmetadata': ('created_at', [
+        ('ix_predictionmetadata_prediction_id', ['prediction_id']),
+        ('ix_predictionmetadata_model_id_prediction_id', ['model_id', 'prediction_id']),
+    ]),
+    'predictionlog': ('timestamp', [
+        ('ix_predictionlog_prediction_id', ['prediction_id']),
+        ('ix_predictionlog_timestamp_id', ['timestamp', 'id']),
+        ('ix_predictionlog_user_id_timestamp_id', ['user_id', 'timestamp', 'id']),
+    ]),
+}
+
+# Foreign keys into prediction; Postgres cannot reference a partitioned
+# table by id alone, so these go away
+PREDICTION_FKS = [
+    ('predictionmetadata_prediction_id_fkey', 'predictionmetadata'),
+    ('predictionlog_prediction_id_fkey', 'predictionlog'),
+    ('feedback_prediction_id_fkey', 'feedback'),
+]
+
+PREMAKE_MONTHS = 3
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitioned(table: str) -> sa.Table:
+    id_column = sa.Column('id', sa.Integer(), server_default=sa.text(f"nextval('{table}_id_seq')"), nullable=False)
+    if table == 'prediction':
+        return op.create_table('prediction',
+        id_column,
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('input_data', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('input_features', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('prediction', sa.Integer(), nullable=False),
+        sa.Column('probability', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)'
+        )
+    elif table == 'predictionmetadata':
+        return op.create_table('predictionmetadata',
+        id_column,
+        sa.Column('prediction_id', sa.Integer(), nullable=False),
+        sa.Column('model_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['model_id'], ['mlmodel.id'], ),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)'
+        )
+    else:
+        return op.create_table('predictionlog',
+        id_column,
+        sa.Column('prediction_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('request_ip', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('user_agent', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id', 'timestamp'),
+        postgresql_partition_by='RANGE (timestamp)'
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for name, table in PREDICTION_FKS:
+        op.drop_constraint(name, table, type_='foreignkey')
+
+    current = date.today().replace(day=1)
+    for table, (key, indexes) in TABLES.items():
+        # Keep the id sequence (the audit writer reserves ids from it) when
+        # the old table goes
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+        op.rename_table(table, f'{table}_unpartitioned')
+        op.execute(f'ALTER TABLE {table}_unpartitioned RENAME CONSTRAINT {table}_pkey TO {table}_unpartitioned_pkey')
+        for index, _ in indexes:
+            op.drop_index(index, table_name=f'{table}_unpartitioned', if_exists=True)
+
+        new_table = _create_partitioned(table)
+
+        oldest = bind.execute(sa.text(f'SELECT min("{key}") FROM {table}_unpartitioned')).scalar()
+        month = min(oldest.date().replace(day=1), current) if oldest else current
+        while month <= _add_months(current, PREMAKE_MONTHS):
+            op.execute(
+                f"CREATE TABLE {table}_{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            )
+            month = _add_months(month, 1)
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+        columns = ', '.join(f'"{column.name}"' for column in new_table.columns)
+        op.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_unpartitioned')
+        op.drop_table(f'{table}_unpartitioned')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+        for index, columns in indexes:
+            op.create_index(index, table, columns)
+        op.execute(f'ANALYZE {table}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, (key, indexes) in TABLES.items():
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+        op.rename_table(table, f'{table}_partitioned')
+        op.execute(f'ALTER TABLE {table}_partitioned RENAME CONSTRAINT {table}_pkey TO {table}_partitioned_pkey')
+        for index, _ in indexes:
+            op.drop_index(index, table_name=f'{table}_partitioned')
+
+        op.execute(f'CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS)')
+        op.execute(f'INSERT INTO {table} SELECT * FROM {table}_partitioned')
+        op.execute(f'DROP TABLE {table}_partitioned CASCADE')
+        op.create_primary_key(f'{table}_pkey', table, ['id'])
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+        for index, columns in indexes:
+            op.create_index(index, table, columns)
+
+    op.create_foreign_key('prediction_user_id_fkey', 'prediction', 'user', ['user_id'], ['id'])
+    op.create_foreign_key('predictionmetadata_model_id_fkey', 'predictionmetadata', 'mlmodel', ['model_id'], ['id'])
+    op.create_foreign_key('predictionlog_user_id_fkey', 'predictionlog', 'user', ['user_id'], ['id'])
+    for name, table in PREDICTION_FKS:
+        op.create_foreign_key(name, table, 'prediction', ['prediction_id'], ['id'])
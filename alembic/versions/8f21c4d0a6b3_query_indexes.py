@@ -0,0 +1,70 @@
+"""Indexes for list queries, joins and foreign keys; unique MLModel (name, version)
+
+Revision ID: 8f21c4d0a6b3
+Revises: 3c7a9d21b5e4
+Create Date: 2026-10-18 10:41:07.530214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f21c4d0a6b3'
+down_revision: Union[str, Sequence[str], None] = '3c7a9d21b5e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns), matching the __table_args__ / index=True
+# declarations in src/models/model.py
+INDEXES = [
+    ('ix_user_created_at_id', 'user', ['created_at', 'id']),
+    ('ix_prediction_created_at_id', 'prediction', ['created_at', 'id']),
+    ('ix_prediction_user_id_created_at_id', 'prediction', ['user_id', 'created_at', 'id']),
+    ('ix_predictionmetadata_prediction_id', 'predictionmetadata', ['prediction_id']),
+    ('ix_predictionmetadata_model_id_prediction_id', 'predictionmetadata', ['model_id', 'prediction_id']),
+    ('ix_feedback_prediction_id', 'feedback', ['prediction_id']),
+    ('ix_feedback_created_at_id', 'feedback', ['created_at', 'id']),
+    ('ix_feedback_user_id_created_at_id', 'feedback', ['user_id', 'created_at', 'id']),
+    ('ix_predictionlog_prediction_id', 'predictionlog', ['prediction_id']),
+    ('ix_predictionlog_timestamp_id', 'predictionlog', ['timestamp', 'id']),
+    ('ix_predictionlog_user_id_timestamp_id', 'predictionlog', ['user_id', 'timestamp', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Duplicate MLModel rows (the old create_model endpoint inserted one per
+    # call): point their metadata at the oldest row, then drop the rest
+    op.execute("""
+        UPDATE predictionmetadata pm
+        SET model_id = keep.id
+        FROM mlmodel m
+        JOIN (SELECT name, version, MIN(id) AS id FROM mlmodel GROUP BY name, version) keep
+          ON keep.name = m.name AND keep.version = m.version
+        WHERE pm.model_id = m.id AND m.id <> keep.id
+    """)
+    op.execute("""
+        DELETE FROM mlmodel m
+        USING mlmodel keep
+        WHERE keep.name = m.name AND keep.version = m.version AND keep.id < m.id
+    """)
+    op.create_unique_constraint('uq_mlmodel_name_version', 'mlmodel', ['name', 'version'])
+
+    # CONCURRENTLY so that the prediction / audit tables stay writable while
+    # the indexes build; it cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for table in ('user', 'prediction', 'predictionmetadata', 'feedback', 'predictionlog'):
+            op.execute(f'ANALYZE "{table}"')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    op.drop_constraint('uq_mlmodel_name_version', 'mlmodel', type_='unique')
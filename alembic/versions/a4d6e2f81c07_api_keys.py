@@ -0,0 +1,47 @@
+"""Service-account API keys
+
+Revision ID: a4d6e2f81c07
+Revises: 5b0e7f3a9c12
+Create Date: 2026-10-18 16:40:12.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d6e2f81c07'
+down_revision: Union[str, Sequence[str], None] = '5b0e7f3a9c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('apikey',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('key_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('scopes', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('rate_limit_per_minute', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('revoked_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_apikey_key_id'), 'apikey', ['key_id'], unique=True)
+    op.create_index(op.f('ix_apikey_user_id'), 'apikey', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_apikey_user_id'), table_name='apikey')
+    op.drop_index(op.f('ix_apikey_key_id'), table_name='apikey')
+    op.drop_table('apikey')
@@ -20,13 +20,10 @@ alembic upgrade head
 echo "Migrations applied successfully."
 
 # Launch FastAPI with Gunicorn + Uvicorn workers
-# - 4 workers (adjust as needed)
-# - bind to all interfaces on port 8000
-
-exec gunicorn src.main:app \
-    --workers 4 \
-    --worker-class uvicorn.workers.UvicornWorker \
-    --bind 0.0.0.0:8000 \
-    --timeout 120
+# Settings live in src/gunicorn_conf.py (WEB_CONCURRENCY workers, port 8000).
+# The model is loaded once in the master before forking (MODEL_PRELOAD) so
+# all workers share its memory instead of holding one copy each.
+
+exec gunicorn src.main:app -c src/gunicorn_conf.py
 
 # exec uvicorn src.main:app --host 0.0.0.0 --port 8000 --reload
\ No newline at end of file
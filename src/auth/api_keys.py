@@ -0,0 +1,139 @@
+# src/auth/api_keys.py
+import hashlib
+import hmac
+import os
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import FrozenSet, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from models.model import ApiKey, User
+from utils.metrics import metrics
+from utils.pagination import as_naive_utc
+from utils.lru import LRUCache
+
+
+# --------------------------
+# Service-account API keys
+# --------------------------
+# Machine clients send ``X-API-Key: mlk_<key_id>_<secret>`` instead of
+# logging in. Keys are random 256-bit secrets, so a single SHA-256 is enough
+# to store them (no argon2 on the request path). Verified keys live in an
+# in-memory index by key_id for API_KEY_CACHE_TTL_SECONDS: revoking a key
+# applies at once in this worker and within the TTL in the others.
+API_KEY_PREFIX = "mlk"
+API_KEY_CACHE_TTL_SECONDS = float(os.getenv("API_KEY_CACHE_TTL_SECONDS", 60))
+API_KEY_CACHE_MAX_ENTRIES = int(os.getenv("API_KEY_CACHE_MAX_ENTRIES", 10000))
+
+# Scopes a key can be granted; endpoints declare the one they need with
+# Security(get_current_user, scopes=[...]), and keys are refused elsewhere
+API_KEY_SCOPES = {
+    "predict": "Score customers (/predict, /predict/batch)",
+    "predictions:read": "List, fetch and export predictions",
+    "predictions:write": "Delete predictions",
+}
+
+
+@dataclass(frozen=True)
+class ApiKeyEntry:
+    id: int
+    key_id: str
+    key_hash: bytes
+    user: User  # detached snapshot of the owner
+    scopes: FrozenSet[str]
+    rate_limit_per_minute: Optional[int]
+    expires_at: Optional[datetime]
+
+
+_UNKNOWN = object()  # cached "no such key_id", so guessing does not hit the DB every time
+_DUMMY_HASH = hashlib.sha256(b"").digest()
+
+_index = LRUCache(max_entries=API_KEY_CACHE_MAX_ENTRIES, ttl=API_KEY_CACHE_TTL_SECONDS)
+
+
+def hash_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def generate_key() -> Tuple[str, str, str]:
+    """A new ``(key, key_id, key_hash)``; the key itself is shown once and never stored."""
+    key_id = secrets.token_hex(8)
+    secret = secrets.token_urlsafe(32)
+    return f"{API_KEY_PREFIX}_{key_id}_{secret}", key_id, hash_secret(secret)
+
+
+def parse_key(key: str) -> Optional[Tuple[str, str]]:
+    prefix, _, rest = key.partition("_")
+    key_id, _, secret = rest.partition("_")
+    if prefix != API_KEY_PREFIX or not key_id or not secret:
+        return None
+    return key_id, secret
+
+
+def _load(session: Session, key_id: str):
+    row = session.exec(
+        select(ApiKey, User)
+        .join(User, User.id == ApiKey.user_id)
+        .where(ApiKey.key_id == key_id, ApiKey.revoked_at.is_(None))
+    ).first()
+    if row is None:
+        return _UNKNOWN
+    api_key, user = row
+    return ApiKeyEntry(
+        id=api_key.id,
+        key_id=api_key.key_id,
+        key_hash=bytes.fromhex(api_key.key_hash),
+        user=User(**user.model_dump()),
+        scopes=frozenset(api_key.scopes or ()),
+        rate_limit_per_minute=api_key.rate_limit_per_minute,
+        expires_at=as_naive_utc(api_key.expires_at),
+    )
+
+
+def _matches(entry, secret: str) -> bool:
+    # Unknown ids are compared against a dummy hash, so response times do
+    # not tell which ids exist
+    expected = entry.key_hash if entry is not _UNKNOWN else _DUMMY_HASH
+    valid = hmac.compare_digest(hashlib.sha256(secret.encode()).digest(), expected)
+    return valid and entry is not _UNKNOWN and (
+        entry.expires_at is None or entry.expires_at > datetime.now(timezone.utc).replace(tzinfo=None)
+    )
+
+
+def authenticate(key: str, session: Session) -> Optional[ApiKeyEntry]:
+    """The active key matching ``key`` (secret compared in constant time), or None."""
+    parsed = parse_key(key)
+    if parsed is None:
+        metrics.incr("auth.api_key.rejected")
+        return None
+    key_id, secret = parsed
+
+    entry = _index.get(key_id)
+    if entry is None:
+        entry = _load(session, key_id)
+        _index.set(key_id, entry)
+
+    if not _matches(entry, secret):
+        metrics.incr("auth.api_key.rejected")
+        return None
+    metrics.incr("auth.api_key.accepted")
+    return entry
+
+
+def peek(key: str) -> Optional[ApiKeyEntry]:
+    """Like authenticate(), from the in-memory index only (None when not loaded yet); never touches the DB."""
+    parsed = parse_key(key)
+    if parsed is None:
+        return None
+    entry = _index.get(parsed[0])
+    return entry if entry is not None and _matches(entry, parsed[1]) else None
+
+
+def invalidate(key_id: Optional[str] = None) -> None:
+    """Forget ``key_id`` (e.g. after revoking it), or every key."""
+    if key_id is None:
+        _index.clear()
+    else:
+        _index.discard(lambda cached_id: cached_id == key_id)
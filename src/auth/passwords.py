@@ -0,0 +1,145 @@
+# src/auth/passwords.py
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from utils.metrics import metrics
+
+
+# --------------------------
+# Password hashing configuration
+# --------------------------
+# Hashing and verification run in a small dedicated process pool, so a burst
+# of logins neither burns the request threadpool's CPU nor holds the GIL
+# that inference and the event loop need. 0 workers hashes inline.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+# Calls queued or running at once (per web worker); beyond that 503 + Retry-After
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 16))
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 1
+
+# Cost parameters (benchmark with: cd src && python -m auth.passwords).
+# Changing them rehashes each user's password at their next login.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST_KIB = int(os.getenv("ARGON2_MEMORY_COST_KIB", 65536))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# New hashes are argon2; bcrypt hashes (older accounts, the phone-based
+# /api users) still verify and are upgraded on login
+password_hash = PasswordHash((
+    Argon2Hasher(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST_KIB, parallelism=ARGON2_PARALLELISM),
+    BcryptHasher(rounds=BCRYPT_ROUNDS),
+))
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(PASSWORD_HASH_MAX_PENDING, 1))
+
+
+# Module-level so the process pool can pickle them
+def _hash(password: str) -> str:
+    return password_hash.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return password_hash.verify_and_update(password, hashed)
+    except ValueError:
+        # e.g. a >72 byte password against a bcrypt hash, or an unknown hash format
+        return False, None
+
+
+def start_password_pool() -> Optional[Executor]:
+    """Fork the hashing workers (called early in the lifespan, before the model is loaded)."""
+    global _executor
+    if PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("fork"),
+            )
+    return _executor
+
+
+def stop_password_pool() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        metrics.incr("auth.hashing.rejected")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent sign-ins, retry shortly",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+        )
+    start = time.perf_counter()
+    try:
+        executor = start_password_pool()
+        if executor is None:
+            return fn(*args)
+        # The request thread only waits here; the hashing CPU is spent in the pool
+        return executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+        metrics.observe("auth.hashing_ms", (time.perf_counter() - start) * 1000)
+
+
+def hash_password(password: str) -> str:
+    return _run(_hash, password)
+
+
+def verify_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check ``password`` against ``hashed``.
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored hash
+    uses an older scheme or cost and should be replaced.
+    """
+    return _run(_verify_and_update, password, hashed)
+
+
+# --------------------------
+# Cost benchmark
+# --------------------------
+def benchmark(rounds: int = 5) -> dict:
+    """Median milliseconds per hash and per verification with the configured costs, in this process."""
+    results = {}
+    for name, hasher in [("argon2", password_hash.hashers[0]), ("bcrypt", password_hash.hashers[1])]:
+        hash_ms, verify_ms = [], []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            hashed = hasher.hash("correct horse battery staple")
+            hash_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            hasher.verify("correct horse battery staple", hashed)
+            verify_ms.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            "hash_ms": round(sorted(hash_ms)[rounds // 2], 1),
+            "verify_ms": round(sorted(verify_ms)[rounds // 2], 1),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    print(f"argon2 time_cost={ARGON2_TIME_COST} memory_cost={ARGON2_MEMORY_COST_KIB}KiB "
+          f"parallelism={ARGON2_PARALLELISM}; bcrypt rounds={BCRYPT_ROUNDS}")
+    results = benchmark()
+    for name, timings in results.items():
+        print(f"{name}: {timings}")
+    print(f"~{PASSWORD_HASH_WORKERS * 1000 / max(results['argon2']['verify_ms'], 1e-3):.0f} logins/s "
+          f"per web worker with {PASSWORD_HASH_WORKERS} hashing workers")
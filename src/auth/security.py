@@ -1,63 +1,87 @@
 # app/security.py
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 from typing import Optional
-import os
-import jwt
-from jwt.exceptions import InvalidTokenError
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from pwdlib import PasswordHash
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer, SecurityScopes
 from sqlmodel import Session, select
-from dotenv import load_dotenv
 
 from models.model import User
 from db.database import get_session
+from auth import api_keys, passwords, tokens, user_cache
+from auth.tokens import ACCESS_TOKEN_EXPIRE_MINUTES, InvalidTokenError
 
-load_dotenv()
+# JWT configuration; machine clients may send an API key instead
+# (auth/api_keys.py), so neither scheme rejects a request on its own
+oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl="/auth/login", scopes=api_keys.API_KEY_SCOPES, auto_error=False
+)
+api_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
 
-# Environment config
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-
-# JWT & Password configuration
-password_hash = PasswordHash.recommended()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-
-# Password utilities
+# Password utilities (hashed in the bounded pool of auth/passwords.py)
 def verify_password(plain_password, hashed_password):
-    return password_hash.verify(plain_password, hashed_password)
+    return passwords.verify_password(plain_password, hashed_password)[0]
 
 def get_password_hash(password):
-    return password_hash.hash(password)
+    return passwords.hash_password(password)
 
-# Token generation
+# Token generation (keys and verification cache in auth/tokens.py)
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return tokens.create_access_token(data, expires_delta)
 
 # Dependency: get current authenticated user
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+def get_current_user(
+    request: Request,
+    security_scopes: SecurityScopes,
+    token: Optional[str] = Depends(oauth2_scheme),
+    api_key: Optional[str] = Depends(api_key_scheme),
+    session: Session = Depends(get_session),
+):
+    """
+    The user behind the bearer token or the X-API-Key header.
+
+    Users signed in with a token may call every endpoint their role allows.
+    API keys only reach endpoints that declare a scope with
+    ``Security(get_current_user, scopes=[...])``, and only with that scope.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or expired token",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    if api_key and not token:
+        entry = api_keys.authenticate(api_key, session)
+        if entry is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+        if not security_scopes.scopes or not entry.scopes.issuperset(security_scopes.scopes):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"API key lacks the required scope: {security_scopes.scope_str or 'user session only'}",
+            )
+        request.state.api_key_id = entry.key_id
+        return entry.user
+
+    if not token:
+        raise credentials_exception
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = tokens.decode_access_token(token)
         username = payload.get("sub")
         if username is None:
             raise credentials_exception
     except InvalidTokenError:
         raise credentials_exception
 
+    # Short-lived cache (auth/user_cache.py); the session only opens a
+    # connection on a miss
+    user = user_cache.get(username, payload.get("iat"))
+    if user is not None:
+        return user
+
     user = session.exec(select(User).where(User.username == username)).first()
     if user is None:
         raise credentials_exception
-    return user
+    return user_cache.put(username, payload.get("iat"), user)
 
 # Optional: ensure user is active
 def get_current_active_user(current_user: User = Depends(get_current_user)):
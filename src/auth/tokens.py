@@ -0,0 +1,149 @@
+# src/auth/tokens.py
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import jwt
+from dotenv import load_dotenv
+from jwt.exceptions import InvalidAudienceError, InvalidTokenError
+
+from utils.metrics import metrics
+from utils.lru import LRUCache
+
+load_dotenv()
+
+__all__ = [
+    "ACCESS_TOKEN_AUDIENCE", "PHONE_TOKEN_AUDIENCE", "InvalidTokenError", "TokenVerifier",
+    "token_verifier", "create_access_token", "decode_access_token",
+]
+
+
+# --------------------------
+# Token configuration
+# --------------------------
+# Docker secrets (/run/secrets/...) take precedence over the environment
+def _setting(secret_name: str, env_name: str, default: Optional[str] = None) -> Optional[str]:
+    path = Path("/run/secrets") / secret_name
+    if path.exists():
+        return path.read_text().strip() or default
+    return os.getenv(env_name, default)
+
+
+JWT_ALGORITHM = _setting("algorithm", "ALGORITHM", "HS256")
+SECRET_KEY = _setting("secrete_key", "SECRET_KEY")  # HS* algorithms
+# PEM files for RS*/ES*/PS*/EdDSA; the private key is only needed to issue
+# tokens, the public one is derived from it when not given
+JWT_PRIVATE_KEY_FILE = os.getenv("JWT_PRIVATE_KEY_FILE")
+JWT_PUBLIC_KEY_FILE = os.getenv("JWT_PUBLIC_KEY_FILE")
+
+_expire_minutes = _setting("access_token_expire_minutes", "ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(_expire_minutes) if str(_expire_minutes).isdigit() else 30
+
+# "aud" claim of each auth stack: the two share keys, so a token issued by
+# one must not be accepted by the other
+ACCESS_TOKEN_AUDIENCE = "churn-api"  # auth/security.py, sub = username
+PHONE_TOKEN_AUDIENCE = "churn-phone-api"  # /api routes, sub = phone number
+
+# Verified tokens are remembered until they expire, so repeat requests with
+# the same token skip the signature check
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+
+
+class TokenVerifier:
+    """
+    Issues and verifies JWTs with key material parsed once.
+
+    Every token carries the ``aud`` it was issued for and ``verify`` only
+    accepts the audience it is asked for. ``verify`` keeps the claims of
+    every valid token in a bounded LRU for the token's remaining lifetime; a
+    cache hit costs a dict lookup instead of a signature verification. The
+    cached claims are read-only.
+    """
+
+    def __init__(self, algorithm: str, signing_key=None, verification_key=None,
+                 cache_size: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.algorithm = algorithm
+        prepare = jwt.get_algorithm_by_name(algorithm).prepare_key
+        self._signing_key = prepare(signing_key) if signing_key is not None else None
+        if verification_key is not None:
+            self._verification_key = prepare(verification_key)
+        elif hasattr(self._signing_key, "public_key"):
+            self._verification_key = self._signing_key.public_key()
+        else:
+            self._verification_key = self._signing_key  # HMAC: the same secret
+        self._cache = LRUCache(max_entries=cache_size, ttl=0)
+
+    @classmethod
+    def from_settings(cls) -> "TokenVerifier":
+        if JWT_ALGORITHM.startswith("HS"):
+            return cls(JWT_ALGORITHM, signing_key=SECRET_KEY)
+        private_key = Path(JWT_PRIVATE_KEY_FILE).read_bytes() if JWT_PRIVATE_KEY_FILE else None
+        public_key = Path(JWT_PUBLIC_KEY_FILE).read_bytes() if JWT_PUBLIC_KEY_FILE else None
+        return cls(JWT_ALGORITHM, signing_key=private_key, verification_key=public_key)
+
+    def issue(self, claims: dict, expires_delta: Optional[timedelta] = None,
+              audience: str = ACCESS_TOKEN_AUDIENCE) -> str:
+        if self._signing_key is None:
+            raise RuntimeError(f"No key configured to sign {self.algorithm} tokens")
+        now = datetime.now(timezone.utc)
+        to_encode = dict(claims)
+        to_encode.update({
+            "exp": now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)),
+            "iat": now,
+            "aud": audience,
+        })
+        return jwt.encode(to_encode, self._signing_key, algorithm=self.algorithm)
+
+    def verify(self, token: str, audience: str = ACCESS_TOKEN_AUDIENCE) -> Mapping:
+        """
+        Return the claims of ``token``; raises InvalidTokenError if it is
+        forged, malformed, expired or issued for another audience.
+        """
+        if self._verification_key is None:
+            raise RuntimeError(f"No key configured to verify {self.algorithm} tokens")
+        claims = self._cache.get(token)
+        if claims is not None:
+            metrics.incr("auth.token_cache.hits")
+            if claims["aud"] != audience:
+                metrics.incr("auth.token_verify_failures")
+                raise InvalidAudienceError("Audience doesn't match")
+            return claims
+
+        metrics.incr("auth.token_cache.misses")
+        start = time.perf_counter()
+        try:
+            decoded = jwt.decode(
+                token, self._verification_key, algorithms=[self.algorithm], audience=audience,
+                options={"require": ["exp", "aud"]},
+            )
+        except InvalidTokenError:
+            metrics.incr("auth.token_verify_failures")
+            raise
+        finally:
+            metrics.observe("auth.token_verify_ms", (time.perf_counter() - start) * 1000)
+
+        claims = MappingProxyType(decoded)
+        remaining = decoded["exp"] - time.time()
+        if remaining > 0:
+            self._cache.set(token, claims, ttl=remaining)
+        return claims
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+# Shared by the main auth (auth/security.py) and the phone-based /api routes,
+# which issue and verify tokens with their own audience
+token_verifier = TokenVerifier.from_settings()
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None,
+                        audience: str = ACCESS_TOKEN_AUDIENCE) -> str:
+    return token_verifier.issue(data, expires_delta, audience)
+
+
+def decode_access_token(token: str, audience: str = ACCESS_TOKEN_AUDIENCE) -> Mapping:
+    return token_verifier.verify(token, audience)
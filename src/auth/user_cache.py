@@ -0,0 +1,46 @@
+# src/auth/user_cache.py
+import os
+from typing import Optional
+
+from models.model import User
+from utils.metrics import metrics
+from utils.lru import LRUCache
+
+
+# --------------------------
+# Authenticated user cache
+# --------------------------
+# get_current_user keeps the users it loaded for USER_CACHE_TTL_SECONDS,
+# keyed by (username, token iat), so a token only hits the DB once per TTL.
+# Changes made through this worker invalidate at once; other workers see
+# them within the TTL, which bounds how long a revoked user keeps access
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+
+_users = LRUCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def get(username: str, issued_at) -> Optional[User]:
+    if not USER_CACHE_ENABLED:
+        return None
+    user = _users.get((username, issued_at))
+    metrics.incr("auth.user_cache.hits" if user is not None else "auth.user_cache.misses")
+    return user
+
+
+def put(username: str, issued_at, user: User) -> User:
+    """Cache a detached copy of ``user`` (shared across requests, so never bound to a session) and return it."""
+    if not USER_CACHE_ENABLED:
+        return user
+    snapshot = User(**user.model_dump())
+    _users.set((username, issued_at), snapshot)
+    return snapshot
+
+
+def invalidate(username: Optional[str] = None) -> None:
+    """Forget ``username`` (every token of it), or everyone when no name is given."""
+    if username is None:
+        _users.clear()
+    else:
+        _users.discard(lambda key: key[0] == username)
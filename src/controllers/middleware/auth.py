@@ -1,55 +1,34 @@
-import os
-import hashlib
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+# Top-level imports (not src.auth) so both apps share one hashing pool and
+# one token verifier
+from auth import passwords, tokens
+from auth.tokens import ACCESS_TOKEN_EXPIRE_MINUTES, PHONE_TOKEN_AUDIENCE, InvalidTokenError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
-from pathlib import Path
 
-SECRET_KEY = ""
-ALGORITHM = ""
-ACCESS_TOKEN_EXPIRE_MINUTES = 0
-
-
-secret_path = Path("/run/secrets/secrete_key")
-if secret_path.exists():
-    SECRET_KEY = secret_path.read_text().strip()
-    ALGORITHM = Path("/run/secrets/algorithm").read_text().strip() or "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES = Path("/run/secrets/access_token_expire_minutes").read_text().strip()
-    if not ACCESS_TOKEN_EXPIRE_MINUTES.isdigit():
-        ACCESS_TOKEN_EXPIRE_MINUTES = 30
-else:
-    SECRET_KEY = os.getenv("SECRET_KEY")
-    ALGORITHM = os.getenv("ALGORITHM","HS256")
-    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 bearer_scheme = HTTPBearer()
 
+# Existing bcrypt hashes still verify and are upgraded to argon2 on login
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return passwords.verify_password(plain_password, hashed_password)[0]
+
+def verify_and_update_password(plain_password, hashed_password):
+    return passwords.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password):
-    password = password.encode("utf-8")
-    if len(password) > 72:
-        password = hashlib.sha256(password).digest()       
-    return pwd_context.hash(password.decode("utf-8"))
-    
+    return passwords.hash_password(password)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return tokens.create_access_token(data, expires_delta or timedelta(minutes=15), PHONE_TOKEN_AUDIENCE)
 
 def decode_token(token: str = Depends(bearer_scheme)):
     try:
-        payload = jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = tokens.decode_access_token(token.credentials, PHONE_TOKEN_AUDIENCE)
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Token has expired or is invalid")
         return username
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Token has expired or is invalid")
\ No newline at end of file
+    except InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Token has expired or is invalid")
@@ -1,16 +1,69 @@
+import os
+import time
 import uuid
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+
 import structlog
+from starlette.datastructures import MutableHeaders
+
+# One "request_completed" line per request (uvicorn's access log is silenced
+# in utils/logging.py)
+REQUEST_LOG_ENABLED = os.getenv("REQUEST_LOG_ENABLED", "true").lower() == "true"
+
+log = structlog.get_logger("http")
+
+
+class RequestIDMiddleware:
+    """
+    Tags every request with an X-Request-ID (the client's, or a new uuid4).
+
+    Plain ASGI rather than BaseHTTPMiddleware: no extra task or response
+    stream wrapping per request, and streaming responses pass through
+    untouched. While the request runs, request_id, method and path are
+    bound in structlog's contextvars; status_code, route (the path
+    template, e.g. /predict/predictions/{prediction_id}) and duration_ms
+    are added as they become known.
+    """
+
+    def __init__(self, app, header_name: str = "X-Request-ID", log_requests: bool = REQUEST_LOG_ENABLED):
+        self.app = app
+        self.header_name = header_name
+        self._header_key = header_name.lower().encode("latin-1")
+        self.log_requests = log_requests
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        request.state.request_id = request_id
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == self._header_key:
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id  # request.state.request_id
 
-        with structlog.contextvars.bound_contextvars(request_id=request_id):
-            response = await call_next(request)
-            response.headers["X-Request-ID"] = request_id               
+        status_code = 500  # unless a response starts
+        start = time.perf_counter()
 
-            return response
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(self.header_name, request_id)
+                structlog.contextvars.bind_contextvars(status_code=status_code)
+            await send(message)
 
+        with structlog.contextvars.bound_contextvars(
+            request_id=request_id, method=scope["method"], path=scope["path"],
+            route=None, status_code=None, duration_ms=None,
+        ):
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            finally:
+                # The router stores the matched route in the (shared) scope
+                route = getattr(scope.get("route"), "path", None)
+                duration_ms = round((time.perf_counter() - start) * 1000, 3)
+                structlog.contextvars.bind_contextvars(route=route, duration_ms=duration_ms)
+                if self.log_requests:
+                    log.info("request_completed", status_code=status_code)
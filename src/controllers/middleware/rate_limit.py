@@ -0,0 +1,107 @@
+# src/controllers/middleware/rate_limit.py
+import math
+from typing import Optional, Sequence, Tuple
+
+from starlette.responses import JSONResponse
+
+# Top-level imports (not src.auth) so the token and API key caches are the
+# ones the routes fill
+from auth import api_keys, tokens
+from auth.tokens import InvalidTokenError
+from utils.metrics import metrics
+from utils.rate_limit import (
+    RATE_LIMIT_ANONYMOUS_PER_MINUTE, RATE_LIMIT_ENABLED, RATE_LIMIT_PATHS, RATE_LIMIT_PER_MINUTE,
+    ConcurrencyLimiter, MemoryRateLimitBackend, bucket_capacity,
+)
+
+
+class RateLimitMiddleware:
+    """
+    Per-caller token buckets and admission control in front of RATE_LIMIT_PATHS.
+
+    Callers are identified the way get_current_user does (bearer token
+    first, then X-API-Key), from the verified-token cache and the API key
+    index, so no DB round trip happens here. A key gets its own bucket only
+    once it resolves to a valid entry; until then (the index is filled by
+    the key's first authenticated request), and for an invalid token or key
+    or no credentials at all, the caller is limited per client IP, so
+    rotating made-up key ids does not escape the anonymous limit.
+    Over the rate the request gets 429, and when no concurrency slot frees
+    up within the queue timeout 503, both with Retry-After.
+
+    The default MemoryRateLimitBackend keeps the buckets in this worker
+    process: with N workers (WEB_CONCURRENCY, times the number of replicas)
+    a caller can get up to N times the configured rate. A backend shared by
+    all workers plugs in through ``backend``.
+    """
+
+    def __init__(self, app, paths: Sequence[str] = RATE_LIMIT_PATHS, backend=None,
+                 concurrency: Optional[ConcurrencyLimiter] = None, enabled: bool = RATE_LIMIT_ENABLED):
+        self.app = app
+        self.paths = tuple(paths)
+        self.backend = backend or MemoryRateLimitBackend()
+        self.concurrency = concurrency or ConcurrencyLimiter()
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        caller, per_minute = self.identify(scope)
+        if per_minute > 0:
+            wait = await self._take(caller, per_minute)
+            if wait > 0:
+                metrics.incr("rate_limit.rejected")
+                await self._reject(scope, receive, send, 429, "Rate limit exceeded", wait)
+                return
+
+        if self.concurrency.limit <= 0:
+            await self.app(scope, receive, send)
+            return
+        if not await self.concurrency.acquire():
+            metrics.incr("rate_limit.shed")
+            await self._reject(scope, receive, send, 503, "Server busy, retry shortly", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.concurrency.release()
+
+    @staticmethod
+    def identify(scope) -> Tuple[str, float]:
+        """(bucket key, requests per minute) of the caller."""
+        headers = dict(scope["headers"])
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        api_key = headers.get(b"x-api-key", b"").decode("latin-1")
+
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                return f"user:{tokens.decode_access_token(token).get('sub')}", RATE_LIMIT_PER_MINUTE
+            except InvalidTokenError:
+                pass
+        elif api_key:
+            entry = api_keys.peek(api_key)
+            if entry is not None:
+                return f"key:{entry.key_id}", entry.rate_limit_per_minute or RATE_LIMIT_PER_MINUTE
+
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}", RATE_LIMIT_ANONYMOUS_PER_MINUTE
+
+    async def _take(self, caller: str, per_minute: float) -> float:
+        try:
+            return await self.backend.take(caller, per_minute / 60, bucket_capacity(per_minute))
+        except Exception as e:
+            # A failing backend must not take the API down with it
+            metrics.incr("rate_limit.backend_errors")
+            print(f"Rate limit store unavailable: {e}")
+            return 0.0
+
+    @staticmethod
+    async def _reject(scope, receive, send, status_code: int, detail: str, retry_after: float) -> None:
+        response = JSONResponse(
+            {"detail": detail}, status_code=status_code,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
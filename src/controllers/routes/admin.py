@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
-from models.model import User, UserRole
+from models.model import ApiKey, User, UserRole
 from auth.security import get_password_hash, get_current_user
 from db.database import get_session
-from schemas.schema import UserCreate
+from auth import api_keys, user_cache
+from schemas.schema import ApiKeyCreate, ApiKeyCreated, ApiKeyRead, UserCreate, ModelRoutingUpdate
+from utils.model_reload import reload_model
+from utils.model_router import RoutingConfig, model_router
+from utils.pagination import as_naive_utc
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -34,5 +41,125 @@ def create_admin_user(
     session.add(new_admin)
     session.commit()
     session.refresh(new_admin)
+    user_cache.invalidate(new_admin.username)
 
     return {"message":"Admin account created successfully", "user": new_admin.username}
+
+
+@router.post("/models/reload")
+async def reload_served_model(
+    version: Optional[str] = None,
+    force: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Hot-swap the served model without a restart.
+
+    Loads ``version`` (default: latest registered in MLflow), warms it and
+    swaps it in; in-flight requests finish on the previous version. Only
+    the worker handling this request reloads immediately, the other
+    workers follow on their next poll (MODEL_POLL_INTERVAL_SECONDS).
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+    try:
+        result = await reload_model(version, force=force)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to load model: {e}")
+    return {**result, "worker_pid": os.getpid()}
+
+
+@router.get("/models/routing")
+def get_model_routing(current_user: User = Depends(get_current_user)):
+    """Primary, canary and shadow versions served by this worker."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+    return {**model_router.describe(), "worker_pid": os.getpid()}
+
+
+@router.put("/models/routing")
+async def update_model_routing(
+    routing_in: ModelRoutingUpdate,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Set the canary version/traffic share and the shadow version.
+
+    The versions are loaded and warmed before routing changes. Like model
+    reloads this applies to the worker handling the request; set
+    CANARY_*/SHADOW_* in the environment to configure every worker.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+    try:
+        await model_router.configure(RoutingConfig(**routing_in.model_dump()))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to load model: {e}")
+    return {**model_router.describe(), "worker_pid": os.getpid()}
+
+
+@router.post("/api-keys", response_model=ApiKeyCreated, status_code=201)
+def create_api_key(
+    key_in: ApiKeyCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Issue an API key for a service account; the key is only shown in this response."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+    unknown = set(key_in.scopes) - set(api_keys.API_KEY_SCOPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown scopes: {sorted(unknown)}")
+    owner = session.exec(select(User).where(User.username == key_in.username)).first()
+    if owner is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    key, key_id, key_hash = api_keys.generate_key()
+    api_key = ApiKey(
+        key_id=key_id,
+        key_hash=key_hash,
+        name=key_in.name,
+        user_id=owner.id,
+        scopes=sorted(set(key_in.scopes)),
+        rate_limit_per_minute=key_in.rate_limit_per_minute,
+        expires_at=as_naive_utc(key_in.expires_at),
+    )
+    session.add(api_key)
+    session.commit()
+    session.refresh(api_key)
+    api_keys.invalidate(key_id)  # drop a cached "unknown key" for this id
+
+    return ApiKeyCreated(**ApiKeyRead.model_validate(api_key).model_dump(), key=key)
+
+
+@router.get("/api-keys", response_model=List[ApiKeyRead])
+def list_api_keys(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+    return session.exec(select(ApiKey).order_by(ApiKey.id)).all()
+
+
+@router.delete("/api-keys/{api_key_id}", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_api_key(
+    api_key_id: int,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Revoke a key: at once on this worker, within API_KEY_CACHE_TTL_SECONDS on the others."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+    api_key = session.get(ApiKey, api_key_id)
+    if api_key is None:
+        raise HTTPException(status_code=404, detail="API key not found")
+    if api_key.revoked_at is None:
+        api_key.revoked_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        session.add(api_key)
+        session.commit()
+    api_keys.invalidate(api_key.key_id)
@@ -6,11 +6,11 @@ from datetime import timedelta
 from models.model import User
 from schemas.schema import UserCreate, Token
 from auth.security import (
-    verify_password,
     get_password_hash,
     create_access_token,
 )
 from db.database import get_session
+from auth import passwords, user_cache
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -28,6 +28,7 @@ def register(user_data: UserCreate, session: Session = Depends(get_session)):
     session.add(new_user)
     session.commit()
     session.refresh(new_user)
+    user_cache.invalidate(new_user.username)
     return {"message": "User registered successfully"}
 
 
@@ -37,8 +38,18 @@ from fastapi.security import OAuth2PasswordRequestForm
 def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
     # form_data is now an instance of OAuth2PasswordRequestForm
     user = session.exec(select(User).where(User.username == form_data.username)).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password")
+    valid, new_hash = passwords.verify_password(form_data.password, user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password")
+
+    # Stored hash predates the current scheme or cost parameters: upgrade it
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        session.add(user)
+        session.commit()
+        user_cache.invalidate(user.username)
 
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
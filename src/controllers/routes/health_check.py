@@ -1,7 +1,31 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
+import os
+from db.pool import pool_stats
+from utils.metrics import metrics, process_memory
+from utils.ml_utils import registry
 
 router = APIRouter()
 
+# async so liveness checks are answered on the event loop and never wait
+# behind the threadpool or the inference executor
 @router.get("/health")
-def health():
-    return {"status": "ok"}
+async def health():
+    return {"status": "ok", "model": registry.readiness()}
+
+
+@router.get("/health/ready")
+async def readiness(response: Response):
+    """Readiness probe: 503 until the model is loaded (or if loading failed)."""
+    model = registry.readiness()
+    if not registry.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if registry.ready else model["status"], "model": model}
+
+
+@router.get("/metrics")
+def get_metrics():
+    """In-process counters and latency summaries (ms) for this worker, and its DB connection pools."""
+    snapshot = metrics.snapshot()
+    snapshot["process"] = {"pid": os.getpid(), "memory_mb": process_memory()}
+    snapshot["db_pools"] = pool_stats()
+    return snapshot
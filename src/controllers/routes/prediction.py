@@ -1,173 +1,325 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler
-import pandas as pd
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, Security, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
-from schemas.churn_input import ChurnInput
-from models.model import User, Prediction, PredictionLog, MLModel, PredictionMetadata
+from sqlalchemy import cast, delete, func
+from sqlalchemy.dialects.postgresql import JSONB
+from schemas.churn_input import ChurnInput, ChurnBatchInput
+from models.model import Feedback, User, UserRole, Prediction, PredictionLog, PredictionMetadata, MLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from auth.security import get_current_user, get_session
+from db.database import app_engine, get_async_session
 # from app.database import get_session
-from utils.ml_utils import model, train_columns, latest_version
-from schemas.schema import PredictionRead
-from typing import List
+from utils.ml_utils import MODEL_NAME, ModelBundle, ModelNotReadyError
+from utils import export, inference, scoring
+from utils.audit_writer import AuditRecord, persist_async, resolve_model_id_async
+from utils.executors import run_inference
+from utils.metrics import StageTimer
+from utils.model_router import model_router
+from schemas.schema import PredictionRead, Page
+from utils.pagination import PageParams, as_naive_utc, page_params, paginate
+from typing import List, Optional
+from datetime import datetime, timezone
+import os
+import structlog
 
 router = APIRouter(prefix="/predict", tags=["Prediction"])
+log = structlog.get_logger("predict")
+
+
+def get_model_bundle(current_user: User = Security(get_current_user, scopes=["predict"])) -> ModelBundle:
+    """
+    Dependency: the model version serving this user (primary or canary,
+    see utils/model_router.py), or 503 while the model is loading / failed to load.
+    """
+    try:
+        return model_router.route(current_user.id)
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
 
 @router.post("/", summary="Predict Customer Churn", response_model=dict)
-def predict_churn(
+async def predict_churn(
     data: ChurnInput,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    bundle: ModelBundle = Depends(get_model_bundle),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Security(get_current_user, scopes=["predict"]),
     request: Request = None
 ):
     """
     Protected churn prediction endpoint.
-    Only accessible with a valid JWT token.
+    Only accessible with a valid JWT token or an API key with the ``predict`` scope.
+
+    Runs on the event loop: the model call is dispatched to the dedicated
+    inference executor and the audit rows are written with the async engine.
+    The whole request uses the model version that was active when it
+    arrived, even if a new one is hot-swapped in meanwhile.
+
+    With PREDICTION_AUDIT_MODE=buffered the returned ``prediction_id`` is
+    reserved up front and its rows are written shortly after the response,
+    so GET /predict/predictions/{prediction_id} can 404 until they are flushed.
     """
 
-    # Log who is making the request (optional)
-    print(f"Prediction request made by user: {current_user.username}")
+    # Log who is making the request (request_id is bound by RequestIDMiddleware)
+    log.debug("prediction_request", user=current_user.username)
 
-    # Convert input to DataFrame
-    input_df = pd.DataFrame([data.model_dump()])
+    timer = StageTimer("predict")
 
     # ----------------------------------------------------------
-    # Feature Engineering
+    # Cache lookup (PREDICTION_CACHE_ENABLED), preprocessing,
+    # inference and the audit rows, see utils/scoring.py
     # ----------------------------------------------------------
-    input_df['TotalCalls'] = input_df['InboundCalls'] + input_df['OutboundCalls']
-    input_df.drop(columns=['InboundCalls', 'OutboundCalls'], inplace=True)
+    result = await scoring.score_one(
+        data,
+        bundle,
+        session,
+        current_user.id,
+        timer,
+        request_ip=request.client.host if request and request.client else None,
+        user_agent=request.headers.get("user-agent") if request else None,
+    )
 
-    # ----------------------------------------------------------
-    # Handle Missing Values
-    # ----------------------------------------------------------
-    num_features = input_df.select_dtypes(include=['int64', 'float64']).columns
-    cat_features = input_df.select_dtypes(include=['object', 'category']).columns
+    # -----------------------------
+    # Return Response
+    # -----------------------------
+    timings = timer.finish()
+    response.headers["Server-Timing"] = timer.server_timing()
+    return {
+        "user": current_user.username,
+        "churn_prediction": result["churn_prediction"],
+        "churn_probability": result["churn_probability"],
+        "prediction_id": result["prediction_id"],
+        "model_version": bundle.version,
+        "cached": result["cached"],
+        "timings_ms": timings
+    }
 
-    num_imputer = SimpleImputer(strategy='median')
-    cat_imputer = SimpleImputer(strategy='most_frequent')
+    # return {
+    #     "user": current_user.username,
+    #     "churn_prediction": int(prediction[0]),
+    #     "churn_probability": float(probability)
+    # }
 
-    input_df[num_features] = num_imputer.fit_transform(input_df[num_features])
-    input_df[cat_features] = cat_imputer.fit_transform(input_df[cat_features])
 
-    # ----------------------------------------------------------
-    # Encode Binary Features
-    # ----------------------------------------------------------
-    binary_features = ['RespondsToMailOffers', 'MadeCallToRetentionTeam']
-    binary_mapping = {'Yes': 1, 'No': 0}
 
-    for col in binary_features:
-        if col in input_df.columns:
-            input_df[col] = input_df[col].map(binary_mapping).astype(int)
+# -----------------------------
+# Endpoint: Batch prediction
+# -----------------------------
+@router.post("/batch", summary="Predict Customer Churn (batch)", response_model=dict)
+async def predict_churn_batch(
+    batch: ChurnBatchInput,
+    response: Response,
+    bundle: ModelBundle = Depends(get_model_bundle),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Security(get_current_user, scopes=["predict"]),
+    request: Request = None
+):
+    """
+    Score a list of customers in a single vectorized pass.
 
-    # ----------------------------------------------------------
-    # One-hot Encode Low-cardinality Categorical Features
-    # ----------------------------------------------------------
-    low_card_features = ['CreditRating', 'IncomeGroup', 'Occupation', 'PrizmCode']
-    df_onehot = pd.get_dummies(input_df[low_card_features], drop_first=True)
-    input_df.drop(columns=low_card_features, inplace=True)
-    input_df = pd.concat([input_df, df_onehot], axis=1)
+    Feature engineering, encoding and model inference run once over the
+    whole batch, and all Prediction / PredictionMetadata / PredictionLog
+    rows are written with bulk inserts in one transaction. Preprocessing
+    and inference run in the inference executor, off the event loop.
+    """
+    records = batch.records
+    try:
+        inference.check_batch_size(len(records))
+    except inference.BatchTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
 
-    # Reindex columns to match training features
-    input_df = input_df.reindex(columns=train_columns, fill_value=0)
+    log.debug("batch_prediction_request", user=current_user.username, records=len(records))
 
-    # ----------------------------------------------------------
-    # Normalize Numeric Features
-    # ----------------------------------------------------------
-    scaler = StandardScaler()
-    num_cols = input_df.select_dtypes(include=['float64', 'int64']).columns
-    input_df[num_cols] = scaler.fit_transform(input_df[num_cols])
+    timer = StageTimer("predict_batch")
 
     # ----------------------------------------------------------
-    # Make Prediction
+    # Feature pipeline + inference over the whole batch
     # ----------------------------------------------------------
-    prediction = model.predict(input_df)
-    prediction_val = model.predict(input_df)[0]
-    # probability = model.predict_proba(input_df)[0, 1]
-    probability_val = float(model.predict_proba(input_df)[0, 1])
-
-    model_version=latest_version
-
-    # -----------------------------
-    # Save Prediction in DB
-    # -----------------------------
-    prediction_record = Prediction(
-        user_id=current_user.id,
-        input_data=input_df.to_json(),
-        prediction=int(prediction_val),
-        probability=probability_val
+    _, labels, churn_probabilities, stage_timings = await run_inference(
+        inference.score_records, records, bundle.version
     )
-    session.add(prediction_record)
-    session.commit()
-    session.refresh(prediction_record)
+    for stage, elapsed_ms in stage_timings.items():
+        timer.record(stage, elapsed_ms)
 
-    # -----------------------------
-# Save PredictionMetadata
-# -----------------------------
-# Retrieve the MLModel record used
-    model_record = session.exec(
-        select(MLModel).where(MLModel.name == "Churn_RandomForest", MLModel.version == latest_version)
-    ).first()
-
-    if not model_record:
-        raise HTTPException(status_code=500, detail="ML model record not found in DB")
-
-    # Create PredictionMetadata
-    metadata_record = PredictionMetadata(
-        prediction_id=prediction_record.id,
-        model_id=model_record.id
-    )
-
-    session.add(metadata_record)
-    session.commit()
-    session.refresh(metadata_record)
-
-
-    # -----------------------------
-    # Save Prediction Log
-    # -----------------------------
-    log_record = PredictionLog(
-        prediction_id=prediction_record.id,
-        user_id=current_user.id,
-        request_ip=request.client.host if request else None,
-        user_agent=request.headers.get("user-agent") if request else None
-    )
-    session.add(log_record)
-    session.commit()
+    model_router.shadow(records, bundle, churn_probabilities)
 
     # -----------------------------
-    # Return Response
+    # Bulk insert Prediction, PredictionMetadata, PredictionLog
     # -----------------------------
+    with timer.stage("persist"):
+        model_id = await resolve_model_id_async(session, bundle.name, bundle.version)
+        if model_id is None:
+            raise HTTPException(status_code=500, detail="ML model record not found in DB")
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # naive UTC, see AuditRecord
+        request_ip = request.client.host if request and request.client else None
+        user_agent = request.headers.get("user-agent") if request else None
+
+        prediction_ids = await persist_async(session, [
+            AuditRecord(
+                user_id=current_user.id,
+                input_features=record.model_dump(),
+                prediction=int(label),
+                probability=float(probability),
+                model_id=model_id,
+                request_ip=request_ip,
+                user_agent=user_agent,
+                created_at=now,
+            )
+            for record, label, probability in zip(records, labels, churn_probabilities)
+        ])
+
+    timings = timer.finish()
+    response.headers["Server-Timing"] = timer.server_timing()
     return {
         "user": current_user.username,
-        "churn_prediction": int(prediction_val),
-        "churn_probability": probability_val,
-        "prediction_id": prediction_record.id,
-        "model_version": model_version
+        "model_version": bundle.version,
+        "count": len(prediction_ids),
+        "timings_ms": timings,
+        "predictions": [
+            {
+                "prediction_id": pid,
+                "churn_prediction": int(label),
+                "churn_probability": float(probability),
+            }
+            for pid, label, probability in zip(prediction_ids, labels, churn_probabilities)
+        ],
     }
 
-    # return {
-    #     "user": current_user.username,
-    #     "churn_prediction": int(prediction[0]),
-    #     "churn_probability": float(probability)
-    # }
-
-
 
 # -----------------------------
-# Endpoint to list all predictions
+# Endpoint to list predictions (keyset-paginated)
 # -----------------------------
-@router.get("/predictions/", response_model=List[PredictionRead])
+@router.get("/predictions/", response_model=Page[PredictionRead])
 def list_predictions(
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    model_name: Optional[str] = None,
+    model_version: Optional[str] = None,
+    min_probability: Optional[float] = Query(None, ge=0, le=1),
+    max_probability: Optional[float] = Query(None, ge=0, le=1),
+    page: PageParams = Depends(page_params),
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Security(get_current_user, scopes=["predictions:read"])
 ):
     """
-    List all predictions in the database.
-    
+    List predictions, newest first, one page at a time.
+
+    Filter by user, creation date range, model (``model_version`` is a
+    version of ``model_name``, the served model by default) and churn
+    probability band; follow ``next_cursor`` for the next page.
     Authentication is required, but predictions are not user-specific.
     """
-    predictions = session.exec(select(Prediction)).all()
-    return predictions
+    statement = _filter_predictions(
+        select(Prediction), user_id, created_from, created_to, model_name, model_version,
+        min_probability, max_probability
+    )
+    if model_name is not None or model_version is not None:
+        statement = (
+            statement
+            .join(PredictionMetadata, PredictionMetadata.prediction_id == Prediction.id)
+            .join(MLModel, MLModel.id == PredictionMetadata.model_id)
+        )
+
+    return paginate(session, statement, Prediction.created_at, Prediction.id, page)
+
+
+def _filter_predictions(statement, user_id, created_from, created_to, model_name, model_version,
+                        min_probability, max_probability):
+    # model_name / model_version filter on MLModel, which the caller joins in.
+    # Version numbers are per registered model, so a version always comes
+    # with a name (the served model's unless given)
+    if user_id is not None:
+        statement = statement.where(Prediction.user_id == user_id)
+    if created_from is not None:
+        statement = statement.where(Prediction.created_at >= as_naive_utc(created_from))
+    if created_to is not None:
+        statement = statement.where(Prediction.created_at < as_naive_utc(created_to))
+    if min_probability is not None:
+        statement = statement.where(Prediction.probability >= min_probability)
+    if max_probability is not None:
+        statement = statement.where(Prediction.probability <= max_probability)
+    if model_version is not None:
+        statement = statement.where(MLModel.name == (model_name or MODEL_NAME), MLModel.version == model_version)
+    elif model_name is not None:
+        statement = statement.where(MLModel.name == model_name)
+    return statement
+
+
+# -----------------------------
+# Endpoint: Streaming export of predictions
+# -----------------------------
+EXPORT_COLUMNS = [
+    "id", "user_id", "created_at", "prediction", "probability", "input_features", "model_name", "model_version"
+]
+
+
+@router.get("/predictions/export")
+def export_predictions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    model_name: Optional[str] = None,
+    model_version: Optional[str] = None,
+    min_probability: Optional[float] = Query(None, ge=0, le=1),
+    max_probability: Optional[float] = Query(None, ge=0, le=1),
+    current_user: User = Security(get_current_user, scopes=["predictions:read"])
+):
+    """
+    Stream predictions with the model that produced them, as NDJSON, CSV or Parquet.
+
+    Rows are read through a server-side cursor and written out chunk by
+    chunk (EXPORT_CHUNK_SIZE rows, one Parquet row group each), so memory
+    use does not grow with the size of the export. Admin only.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden: Admins only")
+    if format == "parquet" and not export.parquet_available():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Parquet export requires pyarrow")
+
+    statement = _filter_predictions(
+        select(
+            Prediction.id, Prediction.user_id, Prediction.created_at, Prediction.prediction,
+            Prediction.probability,
+            func.coalesce(Prediction.input_features, cast(Prediction.input_data, JSONB)).label("input_features"),
+            MLModel.name.label("model_name"), MLModel.version.label("model_version"),
+        )
+        .outerjoin(PredictionMetadata, PredictionMetadata.prediction_id == Prediction.id)
+        .outerjoin(MLModel, MLModel.id == PredictionMetadata.model_id)
+        .order_by(Prediction.id),
+        user_id, created_from, created_to, model_name, model_version, min_probability, max_probability,
+    )
+
+    chunks = export.iter_chunks(app_engine, statement)
+    if format == "csv":
+        body = export.iter_csv(chunks, EXPORT_COLUMNS)
+    elif format == "parquet":
+        body = export.iter_parquet(chunks, _parquet_schema())
+    else:
+        body = export.iter_ndjson(chunks)
+
+    filename = f"predictions-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=export.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _parquet_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("prediction", pa.int8()),
+        ("probability", pa.float64()),
+        ("input_features", pa.string()),
+        ("model_name", pa.string()),
+        ("model_version", pa.string()),
+    ])
 
 
 # -----------------------------
@@ -177,12 +329,17 @@ def list_predictions(
 def get_prediction(
     prediction_id: int,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)  # endpoint still protected
+    current_user: User = Security(get_current_user, scopes=["predictions:read"])  # endpoint still protected
 ):
     """
     Retrieve a single prediction by its ID.
     
     Authentication is required, but predictions are not user-specific.
+
+    With PREDICTION_AUDIT_MODE=buffered the id returned by /predict is
+    reserved before its row is written, so this returns 404 for up to
+    AUDIT_FLUSH_INTERVAL_SECONDS (longer while the writer is backed up)
+    until the background writer has flushed it.
     """
     prediction = session.get(Prediction, prediction_id)
     if not prediction:
@@ -195,7 +352,7 @@ def get_prediction(
 def delete_prediction(
     prediction_id: int,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)  # endpoint still protected
+    current_user: User = Security(get_current_user, scopes=["predictions:write"])  # endpoint still protected
 ):
     """
     Delete a prediction by its ID.
@@ -206,5 +363,19 @@ def delete_prediction(
     if not prediction:
         raise HTTPException(status_code=404, detail="Prediction not found")
 
+    # No FK cascade into the partitioned tables: remove the dependent rows
+    # here. Older rows were timestamped separately from their prediction,
+    # so match on prediction_id; they are never written before it, so the
+    # lower bound still skips every earlier month's partition
+    since = as_naive_utc(prediction.created_at).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    session.execute(delete(PredictionMetadata).where(
+        PredictionMetadata.prediction_id == prediction_id,
+        PredictionMetadata.created_at >= since,
+    ))
+    session.execute(delete(PredictionLog).where(
+        PredictionLog.prediction_id == prediction_id,
+        PredictionLog.timestamp >= since,
+    ))
+    session.execute(delete(Feedback).where(Feedback.prediction_id == prediction_id))
     session.delete(prediction)
     session.commit()
\ No newline at end of file
@@ -1,13 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from schemas.schema import UserRead, FeedbackRead, FeedbackCreate, User, UserOut
-from schemas.schema import MLModelRead, MLModelCreate
+from schemas.schema import MLModelRead, MLModelCreate, Page, PredictionLogRead
 from db.database import get_session
 from auth.security import get_current_user
 from models.model import Feedback, MLModel, PredictionLog, UserRole
+from models.model import User as UserModel
+from utils.audit_writer import register_model
+from utils.ml_utils import MLFLOW_TRACKING_URI, registry, resolve_latest_version
+from utils.model_reload import reload_model
+from utils.pagination import PageParams, as_naive_utc, page_params, paginate
+import anyio.from_thread
 import mlflow
-import os
 
 router = APIRouter(prefix="/api", tags=["Telecom Churn"])
 
@@ -24,25 +30,34 @@ def get_me(current_user: User = Depends(get_current_user)):
 # # -----------------------------
 # Admin-only users listing
 # -----------------------------
-@router.get("/users/", response_model=List[UserOut])
+@router.get("/users/", response_model=Page[UserOut])
 def list_users(
+    role: Optional[UserRole] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    page: PageParams = Depends(page_params),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
-    List all users — Admin access only
+    List users, newest first (keyset-paginated) — Admin access only
     """
     # Check if the current user has an admin role
-    roles = [ur.role.name for ur in current_user.roles]
-    if "admin" not in roles:
+    if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
 
-    # Fetch all users
-    users = session.exec(select(User)).all()
-    return users
+    statement = select(UserModel)
+    if role is not None:
+        statement = statement.where(UserModel.role == role)
+    if created_from is not None:
+        statement = statement.where(UserModel.created_at >= as_naive_utc(created_from))
+    if created_to is not None:
+        statement = statement.where(UserModel.created_at < as_naive_utc(created_to))
+
+    return paginate(session, statement, UserModel.created_at, UserModel.id, page)
 
 # ============================================================
 # FEEDBACK
@@ -77,26 +92,41 @@ def create_feedback(
 # -----------------------------
 # Admin-only endpoint
 # -----------------------------
-@router.get("/feedback/", response_model=List[FeedbackRead])
+@router.get("/feedback/", response_model=Page[FeedbackRead])
 def list_feedback(
+    user_id: Optional[int] = None,
+    prediction_id: Optional[int] = None,
+    correct: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    page: PageParams = Depends(page_params),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
-    List all feedback submitted by any user.
+    List feedback submitted by any user, newest first (keyset-paginated).
     Only admin users can access this endpoint.
     """
     # Check if the current user has admin role
-    roles = [ur.role.name for ur in current_user.roles]  # ur = UserRole instance
-    if "admin" not in roles:
+    if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
 
-    # Fetch all feedback entries
-    feedbacks = session.exec(select(Feedback)).all()
-    return feedbacks
+    statement = select(Feedback)
+    if user_id is not None:
+        statement = statement.where(Feedback.user_id == user_id)
+    if prediction_id is not None:
+        statement = statement.where(Feedback.prediction_id == prediction_id)
+    if correct is not None:
+        statement = statement.where(Feedback.correct == correct)
+    if created_from is not None:
+        statement = statement.where(Feedback.created_at >= as_naive_utc(created_from))
+    if created_to is not None:
+        statement = statement.where(Feedback.created_at < as_naive_utc(created_to))
+
+    return paginate(session, statement, Feedback.created_at, Feedback.id, page)
 
 
 # -----------------------------
@@ -125,59 +155,48 @@ def list_models(
 
 
 # -----------------------------
-# Model creation with MLflow load (no admin check)
+# Model creation with MLflow load + activation (admin only)
 # -----------------------------
 @router.post("/models/", response_model=MLModelRead)
 def create_model(
     model_in: MLModelCreate,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
 ):
     """
-    Register a new ML model in the database.
-    Automatically loads the latest version from MLflow using the sklearn flavor (Endpoint to be modified)
-    """
-
-    # ---------- MLflow setup ----------
-    BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    MLFLOW_TRACKING_URI = f"file://{os.path.join(BASE_DIR, 'mlruns')}"
-    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    Register the latest MLflow version of a model in the database.
 
-    # Get latest model version
-    try:
-        latest_version_info = mlflow.client.MlflowClient().get_latest_versions(
-            model_in.name, stages=["None", "Production", "Staging"]
-        )
-        if not latest_version_info:
-            raise HTTPException(
-                status_code=400,
-                detail=f"No MLflow model found for name: {model_in.name}"
-            )
-        latest_version = max(int(v.version) for v in latest_version_info)
-        model_uri = f"models:/{model_in.name}/{latest_version}"
-    except Exception as e:
+    For the served model (MODEL_NAME) the version is also loaded, warmed
+    and hot-swapped in, so it serves this worker's next requests (the other
+    workers pick it up on their next poll).
+    """
+    if current_user.role != UserRole.ADMIN:
         raise HTTPException(
-            status_code=400,
-            detail=f"Error retrieving MLflow model: {str(e)}"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access forbidden: Admins only"
         )
 
-    # ---------- Load MLflow model (sklearn flavor) ----------
     try:
-        model = mlflow.sklearn.load_model(model_uri)
+        if model_in.name == registry.model_name:
+            # Run the swap on the event loop, like POST /admin/models/reload
+            latest_version = anyio.from_thread.run(reload_model)["model_version"]
+        else:
+            mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+            latest_version, _ = resolve_latest_version(mlflow.client.MlflowClient(), model_in.name)
     except Exception as e:
         raise HTTPException(
             status_code=400,
-            detail=f"Failed to load MLflow model: {str(e)}"
+            detail=f"Error loading MLflow model {model_in.name}: {str(e)}"
         )
 
     # ---------- Save model metadata in DB ----------
-    db_model = MLModel(
-        name=model_in.name,
-        version=str(latest_version),
-        description=model_in.description
-    )
-    session.add(db_model)
-    session.commit()
-    session.refresh(db_model)
+    model_id = register_model(session, model_in.name, latest_version, model_in.description)
+    db_model = session.get(MLModel, model_id)
+    if model_in.description and db_model.description != model_in.description:
+        db_model.description = model_in.description
+        session.add(db_model)
+        session.commit()
+        session.refresh(db_model)
 
     return db_model
 
@@ -198,18 +217,33 @@ def create_model(
 #     ).all()
 #     return logs
 
-@router.get("/logs/", response_model=List[PredictionLog])
+@router.get("/logs/", response_model=Page[PredictionLogRead])
 def list_logs(
+    user_id: Optional[int] = None,
+    prediction_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    page: PageParams = Depends(page_params),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all prediction logs (for all users). Admin only."""
-    
+    """Get prediction logs (for all users), newest first, keyset-paginated. Admin only."""
+
     # Check if current user is admin
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access forbidden: Admins only"
         )
-    logs = session.exec(select(PredictionLog)).all()
-    return logs
+
+    statement = select(PredictionLog)
+    if user_id is not None:
+        statement = statement.where(PredictionLog.user_id == user_id)
+    if prediction_id is not None:
+        statement = statement.where(PredictionLog.prediction_id == prediction_id)
+    if created_from is not None:
+        statement = statement.where(PredictionLog.timestamp >= as_naive_utc(created_from))
+    if created_to is not None:
+        statement = statement.where(PredictionLog.timestamp < as_naive_utc(created_to))
+
+    return paginate(session, statement, PredictionLog.timestamp, PredictionLog.id, page)
@@ -7,7 +7,7 @@ from src.schemas.users import User as users_schema
 from src.utils.response_wrapper import api_response
 from src.controllers.middleware.auth import (
     get_password_hash,
-    verify_password,
+    verify_and_update_password,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
@@ -65,8 +65,14 @@ def login(login_data: UserLogin, db: Session = Depends(get_db)):
         .first()
     )
 
-    if not db_user or not verify_password(login_data.password, db_user.password):
+    if not db_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    valid, new_hash = verify_and_update_password(login_data.password, db_user.password)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash is not None:
+        db_user.password = new_hash
+        db.commit()
 
     access_token = create_access_token(
         data={"sub": db_user.phone}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -1,9 +1,11 @@
-<<<<<<< HEAD
 # app/db.py
 from sqlmodel import create_engine, Session, SQLModel
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from typing import AsyncGenerator, Generator
 import os
 from dotenv import load_dotenv
+from db.pool import engine_options, register_engine
 
 # # Get absolute path to the root project directory
 # base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -23,8 +25,14 @@ DB2_NAME = os.getenv("DB2_NAME")
 
 DATABASE_URL = f"postgresql+psycopg2://{DB2_USER}:{DB2_PASS}@{DB2_HOST}:{DB2_PORT}/{DB2_NAME}"
 
-# echo=True prints SQL for debugging. Turn off in prod.
-app_engine = create_engine(DATABASE_URL, echo=True)
+# Pool sizing, timeouts, echo and PgBouncer mode come from the environment (see db/pool.py)
+app_engine = create_engine(DATABASE_URL, **engine_options("psycopg2"))
+register_engine("app", app_engine)
+
+# Async engine (asyncpg) used by the async prediction path
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB2_USER}:{DB2_PASS}@{DB2_HOST}:{DB2_PORT}/{DB2_NAME}"
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options("asyncpg"))
+register_engine("app_async", async_engine)
 
 # def create_db_and_tables_2():
 #     from model import SQLModel  # avoid circular import, but we'll import metadata differently
@@ -48,22 +56,26 @@ def create_db_and_tables() -> None:
 def get_session() -> Generator[Session, None, None]:
     with Session(app_engine) as session:
         yield session
-=======
-import os
-from sqlalchemy import create_engine, text
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+# --------------------------
+# Phone-based users (src.controllers.routes.users)
+# --------------------------
+from sqlalchemy import text
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import sessionmaker
 from pathlib import Path
-from dotenv import load_dotenv
-
-load_dotenv()
 
-DATABASE_URL = ""
+USERS_DATABASE_URL = ""
 secret_path = Path("/run/secrets/postgres_password")
 if secret_path.exists():
-    DATABASE_URL = (
+    USERS_DATABASE_URL = (
     f"postgresql+psycopg://"
     f"{Path('/run/secrets/postgres_user').read_text().strip()}:"
     f"{secret_path.read_text().strip()}@"
@@ -73,7 +85,7 @@ if secret_path.exists():
 )
 else:
         
-    DATABASE_URL = (
+    USERS_DATABASE_URL = (
     f"postgresql+psycopg://"
     f"{os.getenv('POSTGRES_USER')}:"
     f"{os.getenv('POSTGRES_PASSWORD')}@"
@@ -83,7 +95,8 @@ else:
 )    
 
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(USERS_DATABASE_URL, **engine_options("psycopg"))
+register_engine("users", engine)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
 
@@ -105,4 +118,3 @@ def get_db():
         yield db
     finally:
         db.close()
->>>>>>> origin/main
@@ -0,0 +1,142 @@
+# src/db/pool.py
+import os
+import time
+from typing import Dict, List
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from utils.metrics import metrics
+
+
+# --------------------------
+# Connection pool configuration (shared by every engine)
+# --------------------------
+# Each gunicorn worker holds its own pools, so the server sees up to
+# WEB_CONCURRENCY * engines * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections;
+# keep that under max_connections (or put PgBouncer in front)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))  # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds; -1 never recycles
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))  # 0 = server default
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"  # log every statement (debugging only)
+# Behind PgBouncer in transaction mode: PgBouncer does the pooling (NullPool
+# here), and no startup options or server-side prepared statements, which
+# do not survive a change of server connection
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
+
+class _TimedPoolMixin:
+    """Records how long checkouts wait for a connection, and checkout timeouts, per engine."""
+
+    metrics_name = "db"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.incr(f"db.{self.metrics_name}.pool_timeouts")
+            raise
+        finally:
+            metrics.observe(f"db.{self.metrics_name}.pool_wait_ms", (time.perf_counter() - start) * 1000)
+
+    def recreate(self):
+        # engine.dispose() (e.g. gunicorn post_fork) swaps in a fresh pool
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(driver: str) -> dict:
+    """create_engine keyword arguments for ``driver`` (psycopg2, psycopg or asyncpg)."""
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    connect_args = {}
+
+    if DB_PGBOUNCER:
+        options["poolclass"] = NullPool
+        if driver == "asyncpg":
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+        elif driver == "psycopg":
+            connect_args["prepare_threshold"] = None
+        # statement_timeout belongs on the role/database (ALTER ROLE ... SET)
+        return {**options, "connect_args": connect_args}
+
+    options.update(
+        poolclass=TimedAsyncQueuePool if driver == "asyncpg" else TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        if driver == "asyncpg":
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return {**options, "connect_args": connect_args}
+
+
+# --------------------------
+# Pool metrics
+# --------------------------
+_engines: Dict[str, object] = {}
+# Every engine ever registered, including later ones under a taken name
+_all_engines: List[object] = []
+
+
+def register_engine(name: str, engine) -> None:
+    """
+    Name ``engine`` in the pool metrics (async engines are registered by their sync_engine).
+
+    The first engine registered under a name keeps it: db/database.py is
+    imported both as ``db.database`` (first, by the app and its routes) and
+    as ``src.db.database``, and each import creates its own engines.
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    if isinstance(engine.pool, _TimedPoolMixin):
+        engine.pool.metrics_name = name
+    if not any(e is engine for e in _all_engines):
+        _all_engines.append(engine)
+    _engines.setdefault(name, engine)
+
+
+def dispose_engines() -> None:
+    """
+    Replace every registered engine's pool without closing its connections
+    (gunicorn post_fork: the sockets belong to the master, which keeps using them).
+    """
+    for engine in _all_engines:
+        engine.dispose(close=False)
+
+
+def pool_stats() -> Dict[str, dict]:
+    """Current size, checked-out and overflow connections of every registered engine's pool."""
+    stats = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            stats[name] = {"pool": type(pool).__name__}
+            continue
+        stats[name] = {
+            "pool": type(pool).__name__,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": DB_MAX_OVERFLOW,
+        }
+    return stats
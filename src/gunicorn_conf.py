@@ -0,0 +1,44 @@
+# src/gunicorn_conf.py
+# Gunicorn settings for the API (used by entrypoint.sh).
+#
+# With MODEL_PRELOAD enabled the app and the model are loaded once in the
+# master process before the workers are forked. Workers then share the
+# model's memory pages copy-on-write instead of each unpickling their own
+# copy: the tree node arrays are never written after loading, and
+# gc.freeze() keeps the garbage collector from touching (and therefore
+# copying) the pages holding the preloaded objects.
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "true").lower() in ("1", "true", "yes")
+preload_app = MODEL_PRELOAD
+
+
+def when_ready(server):
+    """Runs in the master after the app is imported, before any worker is forked."""
+    if not MODEL_PRELOAD:
+        return
+
+    from utils.ml_utils import registry
+
+    try:
+        bundle = registry.load()
+        server.log.info(f"Preloaded model {bundle.name} v{bundle.version} ({bundle.source}) in master")
+    except Exception as e:
+        # Workers retry the load in their lifespan and report it via /health
+        server.log.warning(f"Model preload failed: {e}")
+
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Drop DB connections inherited from the master; each worker opens its own."""
+    from db.pool import dispose_engines
+
+    dispose_engines()
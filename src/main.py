@@ -4,11 +4,22 @@ import pandas as pd
 import os
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+import asyncio
 # from sqlmodel import Session, select
-from db.database import create_db_and_tables
+from sqlmodel import Session
+from db.database import create_db_and_tables, app_engine
 from utils.create_admin_user import create_default_admin
+from auth.passwords import start_password_pool, stop_password_pool
+from utils.audit_writer import register_model, start_audit_writer, stop_audit_writer
+from utils.ml_utils import registry
+from utils.executors import start_inference_executor, shutdown_inference_executor
+from utils.batching import start_batcher, stop_batcher
+from utils.model_reload import load_with_retry, start_model_poller, stop_model_poller
+from utils.model_router import configure_from_env, model_router
+from utils.partitions import start_partition_maintenance, stop_partition_maintenance
 
 from controllers.routes import auth, prediction, user, admin, health_check
+from controllers.middleware.rate_limit import RateLimitMiddleware
 from init_db import create_database_if_not_exists
 
 import structlog
@@ -119,17 +130,80 @@ log = structlog.get_logger()
 
 
 
+def _resolve_model_id() -> None:
+    # Resolve (or create) the MLModel id once; prediction requests reuse the cached value
+    bundle = registry.get()
+    with Session(app_engine) as session:
+        register_model(session, bundle.name, bundle.version)
+
+
+async def load_model() -> None:
+    """Background startup task: load the model (retrying until it succeeds), then start the inference executor."""
+    await load_with_retry()
+
+    try:
+        await asyncio.to_thread(_resolve_model_id)
+    except Exception as e:
+        print("Failed to resolve the MLModel id on startup:", e)
+
+    # Canary / shadow versions (CANARY_MODEL_VERSION, SHADOW_MODEL_VERSION)
+    try:
+        await configure_from_env()
+    except Exception as e:
+        print("Failed to load the canary/shadow model versions:", e)
+
+    # Dedicated executor for CPU-bound inference, forked after the model is
+    # loaded so process workers inherit it (no-op when the lifespan already
+    # started it for a preloaded model); off the loop, as forking and
+    # warming the workers blocks
+    await asyncio.to_thread(start_inference_executor)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- Startup code ---
+    # Model preloaded in the gunicorn master (MODEL_PRELOAD): fork the
+    # inference workers now, before this process starts any threads, so
+    # they inherit the model without also inheriting held locks
+    if registry.ready:
+        start_inference_executor()
+
+    # Fork the password hashing workers while this process is still small
+    start_password_pool()
+
     create_db_and_tables()  # ensure tables exist
     try:
         create_default_admin()  # ensure admin user exists
     except Exception as e:
         print("Failed to create default admin on startup:", e)
 
+    # Load the model off the event loop; /health reports readiness meanwhile
+    app.state.model_loader = asyncio.create_task(load_model())
+
+    # Dynamic batching of concurrent /predict requests (MICRO_BATCHING_ENABLED)
+    start_batcher()
+
+    # Hot-swap newly registered model versions (MODEL_POLL_INTERVAL_SECONDS)
+    start_model_poller()
+
+    # Background writer for prediction audit rows (PREDICTION_AUDIT_MODE=buffered)
+    start_audit_writer(app_engine)
+
+    # Monthly partitions ahead of time and retention (PARTITION_RETENTION_MONTHS)
+    start_partition_maintenance(app_engine)
+
     yield  # app runs here
 
+    # --- Shutdown code ---
+    app.state.model_loader.cancel()  # still retrying a failed load
+    await stop_partition_maintenance()
+    await stop_model_poller()
+    await model_router.stop()  # let in-flight shadow scoring finish
+    await stop_batcher()
+    stop_audit_writer()  # flush queued audit rows
+    shutdown_inference_executor()
+    stop_password_pool()
+
 
 
 # @asynccontextmanager
@@ -209,6 +283,8 @@ async def lifespan(app: FastAPI):
 #     }
 
 
+# The one served application: the churn API routers and the phone-based
+# /api routes share its middleware stack and lifespan
 app = FastAPI(title="Churn Prediction API", lifespan=lifespan)
 
 # Register routers
@@ -217,12 +293,12 @@ app.include_router(auth.router)
 app.include_router(prediction.router)
 app.include_router(admin.router)
 app.include_router(user.router)
+app.include_router(users_router, prefix="/api", tags=["users"])
+# Per-user / per-key rate limits and admission control on /predict
+# (RATE_LIMIT_*); added first so the request id wraps its 429/503 responses
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(RequestIDMiddleware)
 
-configure_logging(log_level="INFO", json_logs=True)
-
-log = structlog.get_logger()
-
 # @asynccontextmanager
 # async def lifespan(app: FastAPI):
 #     try:
@@ -232,9 +308,6 @@ log = structlog.get_logger()
 
 #     yield
 
-app = FastAPI(lifespan=lifespan)
-
-
 # app.add_middleware(
 #     CORSMiddleware,
 #     allow_origins=["*"],  
@@ -244,11 +317,6 @@ app = FastAPI(lifespan=lifespan)
 # )
 
 
-app.add_middleware(RequestIDMiddleware)
-
-
-app.include_router(users_router, prefix="/api", tags=["users"])
-
 @app.get("/")
 def root():
     log.info("root_endpoint_called", method="GET", path="/")
@@ -1,4 +1,6 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Column, Index, JSON, Sequence, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime, timezone
 from typing import Optional, List
 from enum import Enum
@@ -46,6 +48,8 @@ class UserRole(str, Enum):
 
 
 class User(SQLModel, table=True):
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(index=True, unique=True)
     email: str = Field(index=True, unique=True)
@@ -56,27 +60,70 @@ class User(SQLModel, table=True):
     predictions: List["Prediction"] = Relationship(back_populates="user")
     feedbacks: List["Feedback"] = Relationship(back_populates="user")
     logs: List["PredictionLog"] = Relationship(back_populates="user")
+    api_keys: List["ApiKey"] = Relationship(back_populates="user")
+
+
+class ApiKey(SQLModel, table=True):
+    """
+    Long-lived credential of a service account (machine clients).
+
+    Keys look like ``mlk_<key_id>_<secret>``; only the SHA-256 of the secret
+    is stored, and requests are matched by key_id (see auth/api_keys.py).
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    key_id: str = Field(index=True, unique=True)  # public part, safe to log
+    key_hash: str  # hex SHA-256 of the secret part
+    name: str
+    user_id: int = Field(foreign_key="user.id", index=True)  # the key acts as this user
+    scopes: List[str] = Field(
+        default_factory=list, sa_column=Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    )
+    rate_limit_per_minute: Optional[int] = None  # None: RATE_LIMIT_PER_MINUTE (utils/rate_limit.py)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    expires_at: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
+
+    user: Optional[User] = Relationship(back_populates="api_keys")
 
 # ============================================================
 # PREDICTIONS & ML MODELS
 # ============================================================
 
 class Prediction(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
+    # Keyset pagination walks (created_at, id); the user filter and the
+    # user FK use the leading user_id column of the second index.
+    # Range-partitioned by month on created_at (utils/partitions.py), so the
+    # table key is (id, created_at) while rows are still identified by id
+    __table_args__ = (
+        Index("ix_prediction_created_at_id", "created_at", "id"),
+        Index("ix_prediction_user_id_created_at_id", "user_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_args=[Sequence("prediction_id_seq")])
     user_id: int = Field(foreign_key="user.id")
-    input_data: str  # store JSON string of input
+    input_data: Optional[str] = None  # legacy: JSON text of the scaled feature row
+    input_features: Optional[dict] = Field(  # raw ChurnInput, stored as JSONB
+        default=None, sa_column=Column(JSON().with_variant(JSONB(), "postgresql"))
+    )
     prediction: int
     probability: float
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), primary_key=True)
 
     user: Optional[User] = Relationship(back_populates="predictions")
     prediction_metadata: Optional["PredictionMetadata"] = Relationship(
         back_populates="prediction",
-        sa_relationship_kwargs={"uselist": False}
+        sa_relationship_kwargs={
+            "uselist": False,
+            "primaryjoin": "Prediction.id == foreign(PredictionMetadata.prediction_id)",
+        }
     )
 
 
 class MLModel(SQLModel, table=True):
+    __table_args__ = (UniqueConstraint("name", "version", name="uq_mlmodel_name_version"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     version: str
@@ -87,14 +134,26 @@ class MLModel(SQLModel, table=True):
 
 
 class PredictionMetadata(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    prediction_id: int = Field(foreign_key="prediction.id")
+    # (model_id, prediction_id) serves the model_version filter join.
+    # Partitioned like Prediction; prediction_id has no FK constraint because
+    # Postgres cannot reference a partitioned table by id alone
+    __table_args__ = (
+        Index("ix_predictionmetadata_model_id_prediction_id", "model_id", "prediction_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_args=[Sequence("predictionmetadata_id_seq")])
+    prediction_id: int = Field(index=True)
     model_id: int = Field(foreign_key="mlmodel.id")
     # features_used: Optional[str]  # JSON string of features used for prediction
     # feature_version: Optional[str]  # Track feature engineering version
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), primary_key=True)
 
-    prediction: Optional[Prediction] = Relationship(back_populates="prediction_metadata")
+    prediction: Optional[Prediction] = Relationship(
+        back_populates="prediction_metadata",
+        sa_relationship_kwargs={"primaryjoin": "foreign(PredictionMetadata.prediction_id) == Prediction.id"}
+    )
     model: Optional[MLModel] = Relationship(back_populates="prediction_metadata")
 
 
@@ -103,24 +162,41 @@ class PredictionMetadata(SQLModel, table=True):
 # ============================================================
 
 class Feedback(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_feedback_created_at_id", "created_at", "id"),
+        Index("ix_feedback_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    prediction_id: int = Field(foreign_key="prediction.id")
+    prediction_id: int = Field(index=True)  # no FK: prediction is partitioned
     user_id: int = Field(foreign_key="user.id")
     correct: Optional[bool]  # Was the prediction correct?
     comment: Optional[str]
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-    prediction: Optional[Prediction] = Relationship()
+    prediction: Optional[Prediction] = Relationship(
+        sa_relationship_kwargs={"primaryjoin": "foreign(Feedback.prediction_id) == Prediction.id"}
+    )
     user: Optional[User] = Relationship(back_populates="feedbacks")
 
 
 class PredictionLog(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    prediction_id: int = Field(foreign_key="prediction.id")
+    # Partitioned by month on timestamp, like Prediction
+    __table_args__ = (
+        Index("ix_predictionlog_timestamp_id", "timestamp", "id"),
+        Index("ix_predictionlog_user_id_timestamp_id", "user_id", "timestamp", "id"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_args=[Sequence("predictionlog_id_seq")])
+    prediction_id: int = Field(index=True)  # no FK: prediction is partitioned
     user_id: int = Field(foreign_key="user.id")
     request_ip: Optional[str]
     user_agent: Optional[str]
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), primary_key=True)
 
-    prediction: Optional[Prediction] = Relationship()
+    prediction: Optional[Prediction] = Relationship(
+        sa_relationship_kwargs={"primaryjoin": "foreign(PredictionLog.prediction_id) == Prediction.id"}
+    )
     user: Optional[User] = Relationship(back_populates="logs")
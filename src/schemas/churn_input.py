@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
 
 class ChurnInput(BaseModel):
     MonthlyRevenue: float
@@ -25,3 +26,7 @@ class ChurnInput(BaseModel):
     IncomeGroup: str
     Occupation: str
     PrizmCode: str
+
+
+class ChurnBatchInput(BaseModel):
+    records: List[ChurnInput] = Field(..., min_length=1)
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+import json
+from pydantic import BaseModel, Field, model_validator
+from typing import Generic, List, Optional, TypeVar
 from datetime import datetime
 
 # --------------------------
@@ -24,7 +25,7 @@ class UserOut(BaseModel):
     id: int
     username: str
     email: str
-    created_at: Optional[str]
+    created_at: Optional[datetime]
 
     class Config:
        from_attributes= True  # allow ORM objects (SQLModel) to be returned
@@ -86,12 +87,87 @@ class MLModelCreate(BaseModel):
     description: Optional[str] = None
 
 
+class PredictionLogRead(BaseModel):
+    id: int
+    prediction_id: int
+    user_id: int
+    request_ip: Optional[str]
+    user_agent: Optional[str]
+    timestamp: datetime
+
+    class Config:
+        from_attributes= True
+
+
+# -----------------------------
+# Keyset-paginated list responses (see utils/pagination.py)
+# -----------------------------
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None  # pass as ?cursor= to get the next page
+    limit: int
+
+
+# -----------------------------
+# Canary / shadow routing (admin)
+# -----------------------------
+class ModelRoutingUpdate(BaseModel):
+    canary_version: Optional[str] = None
+    canary_percent: float = Field(0.0, ge=0, le=100)
+    shadow_version: Optional[str] = None
+    shadow_percent: float = Field(100.0, ge=0, le=100)
+
+
+# -----------------------------
+# Service-account API keys (admin)
+# -----------------------------
+class ApiKeyCreate(BaseModel):
+    username: str  # the service account the key acts as
+    name: str
+    scopes: List[str] = ["predict"]
+    rate_limit_per_minute: Optional[int] = Field(None, gt=0)
+    expires_at: Optional[datetime] = None
+
+
+class ApiKeyRead(BaseModel):
+    id: int
+    key_id: str
+    name: str
+    user_id: int
+    scopes: List[str]
+    rate_limit_per_minute: Optional[int] = None
+    created_at: datetime
+    expires_at: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes= True
+
+
+class ApiKeyCreated(ApiKeyRead):
+    key: str  # returned once, only its hash is stored
+
+
 class PredictionRead(BaseModel):
     id: int
-    input_data: str
+    input_features: Optional[dict] = None
     prediction: int
     probability: float
     created_at: Optional[datetime]
 
     class Config:
-        from_attributes= True
\ No newline at end of file
+        from_attributes= True
+
+    @model_validator(mode="before")
+    @classmethod
+    def decode_input(cls, data):
+        # Rows written before input_features existed only carry the JSON
+        # text of the scaled feature row in input_data
+        if not isinstance(data, dict):
+            data = {name: getattr(data, name, None) for name in (*cls.model_fields, "input_data")}
+        if data.get("input_features") is None and data.get("input_data"):
+            data = {**data, "input_features": json.loads(data["input_data"])}
+        return data
\ No newline at end of file
@@ -0,0 +1,201 @@
+# src/utils/artifact_cache.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import joblib
+
+
+# --------------------------
+# Local model artifact cache
+# --------------------------
+MODEL_CACHE_ENABLED = os.getenv("MODEL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", os.path.expanduser("~/.cache/churn-models"))
+
+MANIFEST_FILE = "manifest.json"
+MODEL_FILE = "model.joblib"
+COLUMNS_FILE = "train_columns.json"
+PARAMS_FILE = "preprocessing_params.json"
+
+
+class CacheCorruptedError(RuntimeError):
+    """Raised when a cached artifact does not match its recorded checksum."""
+
+
+def sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CachedArtifacts:
+    """Artifacts of one cached model version, as loaded from disk."""
+
+    def __init__(self, path: str, manifest: dict, model, train_columns: List[str], preprocessing_params: Optional[dict]):
+        self.path = path
+        self.manifest = manifest
+        self.model = model
+        self.train_columns = train_columns
+        self.preprocessing_params = preprocessing_params
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    @property
+    def run_id(self) -> Optional[str]:
+        return self.manifest.get("run_id")
+
+    @property
+    def preprocess_run_id(self) -> Optional[str]:
+        return self.manifest.get("preprocess_run_id")
+
+
+class ArtifactCache:
+    """
+    On-disk cache of model artifacts keyed by model name, version, model run
+    id and preprocessing run id.
+
+    Layout: ``<root>/<name>/<version>/<run_id>_<preprocess_run_id>/`` holding
+    the joblib-pickled model, the training columns, the preprocessing
+    parameters and a manifest with the sha256 of every file. A new
+    preprocessing run therefore gets its own entry instead of being served
+    the parameters cached with the previous one. Entries are written to a
+    temporary directory and renamed into place, so readers never see a
+    partial entry.
+    """
+
+    def __init__(self, root: str = MODEL_CACHE_DIR):
+        self.root = root
+
+    def entry_path(self, name: str, version, run_id: Optional[str], preprocess_run_id: Optional[str]) -> str:
+        return os.path.join(self.root, name, str(version), f"{run_id or 'none'}_{preprocess_run_id or 'none'}")
+
+    # --------------------------
+    # Read
+    # --------------------------
+    def get(self, name: str, version, run_id: Optional[str], preprocess_run_id: Optional[str]) -> Optional[CachedArtifacts]:
+        """Load a cached entry; returns None if missing and drops it if corrupted."""
+        path = self.entry_path(name, version, run_id, preprocess_run_id)
+        if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            return None
+        try:
+            return self._load(path)
+        except (CacheCorruptedError, OSError, ValueError) as e:
+            print(f"Discarding invalid model cache entry {path}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+    def latest(self, name: str, version=None) -> Optional[CachedArtifacts]:
+        """
+        Newest valid cached version of ``name`` (used when MLflow is unreachable),
+        or the newest cached run of ``version`` when one is given.
+        """
+        for manifest_path in self._manifests(name):
+            key = self._key(manifest_path)
+            if version is not None and key[0] != str(version):
+                continue
+            entry = self.get(name, *key)
+            if entry is not None:
+                return entry
+        return None
+
+    def _manifests(self, name: str) -> List[str]:
+        model_dir = os.path.join(self.root, name)
+        if not os.path.isdir(model_dir):
+            return []
+        found = []
+        for version in os.listdir(model_dir):
+            version_dir = os.path.join(model_dir, version)
+            for run_id in os.listdir(version_dir) if os.path.isdir(version_dir) else []:
+                if run_id.startswith("."):
+                    continue  # in-progress write
+                manifest = os.path.join(version_dir, run_id, MANIFEST_FILE)
+                if os.path.exists(manifest):
+                    found.append(manifest)
+        return sorted(found, key=lambda p: (_version_key(self._key(p)[0]), os.path.getmtime(p)), reverse=True)
+
+    @staticmethod
+    def _key(manifest_path: str):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        return manifest["version"], manifest.get("run_id"), manifest.get("preprocess_run_id")
+
+    def _load(self, path: str) -> CachedArtifacts:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        self.verify(path, manifest)
+
+        model = joblib.load(os.path.join(path, MODEL_FILE))
+        with open(os.path.join(path, COLUMNS_FILE)) as f:
+            train_columns = json.load(f)
+        params = None
+        if PARAMS_FILE in manifest["files"]:
+            with open(os.path.join(path, PARAMS_FILE)) as f:
+                params = json.load(f)
+        return CachedArtifacts(path, manifest, model, train_columns, params)
+
+    @staticmethod
+    def verify(path: str, manifest: dict) -> None:
+        for filename, expected in manifest["files"].items():
+            actual = sha256_file(os.path.join(path, filename))
+            if actual != expected:
+                raise CacheCorruptedError(f"checksum mismatch for {filename}")
+
+    # --------------------------
+    # Write
+    # --------------------------
+    def put(
+        self,
+        name: str,
+        version,
+        run_id: Optional[str],
+        model,
+        train_columns: List[str],
+        preprocessing_params: Optional[dict] = None,
+        preprocess_run_id: Optional[str] = None,
+    ) -> str:
+        """Store artifacts for (name, version, run_id, preprocess_run_id) atomically and return the entry path."""
+        path = self.entry_path(name, version, run_id, preprocess_run_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(path))
+        try:
+            joblib.dump(model, os.path.join(tmp, MODEL_FILE))
+            with open(os.path.join(tmp, COLUMNS_FILE), "w") as f:
+                json.dump(list(train_columns), f)
+            files = [MODEL_FILE, COLUMNS_FILE]
+            if preprocessing_params is not None:
+                with open(os.path.join(tmp, PARAMS_FILE), "w") as f:
+                    json.dump(preprocessing_params, f)
+                files.append(PARAMS_FILE)
+
+            manifest = {
+                "name": name,
+                "version": str(version),
+                "run_id": run_id,
+                "preprocess_run_id": preprocess_run_id,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "files": {filename: sha256_file(os.path.join(tmp, filename)) for filename in files},
+            }
+            with open(os.path.join(tmp, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return path
+
+
+def _version_key(version) -> int:
+    return int(version) if str(version).isdigit() else -1
+
+
+artifact_cache = ArtifactCache()
@@ -0,0 +1,346 @@
+# src/utils/audit_writer.py
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, text
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from models.model import MLModel, Prediction, PredictionLog, PredictionMetadata
+from utils.metrics import metrics
+
+
+# --------------------------
+# Configuration
+# --------------------------
+# "sync": Prediction/PredictionMetadata/PredictionLog are written in one
+#         transaction on the request path.
+# "buffered": rows are queued in memory and flushed in bulk by a background
+#         writer thread; prediction ids are reserved up front from the
+#         Postgres sequence so responses still carry them. Until the next
+#         flush those ids are not in the database yet (GET by id is a 404).
+PREDICTION_AUDIT_MODE = os.getenv("PREDICTION_AUDIT_MODE", "sync").lower()
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", 0.5))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+AUDIT_MAX_QUEUE = int(os.getenv("AUDIT_MAX_QUEUE", 50000))
+AUDIT_ID_BLOCK_SIZE = int(os.getenv("AUDIT_ID_BLOCK_SIZE", 1000))
+
+PREDICTION_ID_SEQUENCE = "prediction_id_seq"
+
+
+@dataclass
+class AuditRecord:
+    """One prediction with its metadata and request log."""
+    user_id: int
+    input_features: dict
+    prediction: int
+    probability: float
+    model_id: int
+    request_ip: Optional[str] = None
+    user_agent: Optional[str] = None
+    prediction_id: Optional[int] = None
+    # Naive UTC: the timestamp columns are "timestamp without time zone",
+    # which asyncpg refuses to bind an aware datetime to
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+
+# --------------------------
+# Model id cache
+# --------------------------
+_model_ids: Dict[Tuple[str, str], int] = {}
+_model_ids_lock = threading.Lock()
+
+
+def resolve_model_id(session: Session, name: str, version) -> Optional[int]:
+    """Return the MLModel id for (name, version), querying the DB only once."""
+    key = (name, str(version))
+    model_id = _model_ids.get(key)
+    if model_id is not None:
+        return model_id
+
+    model_record = session.exec(
+        select(MLModel).where(MLModel.name == name, MLModel.version == str(version))
+    ).first()
+    if model_record is None:
+        return None
+
+    with _model_ids_lock:
+        _model_ids[key] = model_record.id
+    return model_record.id
+
+
+def register_model(session: Session, name: str, version, description: Optional[str] = None) -> int:
+    """Return the MLModel id for (name, version), creating the record if it does not exist."""
+    model_id = resolve_model_id(session, name, version)
+    if model_id is not None:
+        return model_id
+
+    model_record = MLModel(name=name, version=str(version), description=description)
+    session.add(model_record)
+    session.commit()
+    session.refresh(model_record)
+    with _model_ids_lock:
+        _model_ids[(name, str(version))] = model_record.id
+    return model_record.id
+
+
+# --------------------------
+# Single-transaction write
+# --------------------------
+def write_records(session: Session, records: Sequence[AuditRecord], commit: bool = True) -> List[int]:
+    """
+    Insert predictions, metadata and logs for ``records`` in one transaction.
+
+    Records without a ``prediction_id`` get one from the database
+    (INSERT ... RETURNING); the ids are returned in input order.
+    """
+    if not records:
+        return []
+
+    prediction_rows = [
+        {
+            "user_id": r.user_id,
+            "input_features": r.input_features,
+            "prediction": r.prediction,
+            "probability": r.probability,
+            "created_at": r.created_at,
+        }
+        for r in records
+    ]
+
+    if all(r.prediction_id is not None for r in records):
+        for row, r in zip(prediction_rows, records):
+            row["id"] = r.prediction_id
+        session.execute(insert(Prediction), prediction_rows)
+        prediction_ids = [r.prediction_id for r in records]
+    else:
+        prediction_ids = session.scalars(
+            insert(Prediction).returning(Prediction.id, sort_by_parameter_order=True),
+            prediction_rows,
+        ).all()
+
+    session.execute(
+        insert(PredictionMetadata),
+        [
+            {"prediction_id": pid, "model_id": r.model_id, "created_at": r.created_at}
+            for pid, r in zip(prediction_ids, records)
+        ],
+    )
+    session.execute(
+        insert(PredictionLog),
+        [
+            {
+                "prediction_id": pid,
+                "user_id": r.user_id,
+                "request_ip": r.request_ip,
+                "user_agent": r.user_agent,
+                "timestamp": r.created_at,
+            }
+            for pid, r in zip(prediction_ids, records)
+        ],
+    )
+    if commit:
+        session.commit()
+    return list(prediction_ids)
+
+
+# --------------------------
+# Buffered (deferred) writes
+# --------------------------
+class IdAllocator:
+    """Reserves blocks of prediction ids from the Postgres sequence."""
+
+    def __init__(self, engine, block_size: int = AUDIT_ID_BLOCK_SIZE):
+        self.engine = engine
+        self.block_size = block_size
+        self._ids: List[int] = []
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> int:
+        return len(self._ids)
+
+    def take(self, n: int = 1) -> List[int]:
+        with self._lock:
+            if len(self._ids) < n:
+                self._ids.extend(self._reserve(max(n, self.block_size)))
+            taken, self._ids = self._ids[:n], self._ids[n:]
+            return taken
+
+    def take_reserved(self, n: int = 1) -> Optional[List[int]]:
+        """Like take(), from the ids already reserved only (None when short); never touches the DB."""
+        with self._lock:
+            if len(self._ids) < n:
+                return None
+            taken, self._ids = self._ids[:n], self._ids[n:]
+            return taken
+
+    def _reserve(self, n: int) -> List[int]:
+        with self.engine.connect() as conn:
+            ids = conn.execute(
+                text(f"SELECT nextval('{PREDICTION_ID_SEQUENCE}') FROM generate_series(1, :n)"),
+                {"n": n},
+            ).scalars().all()
+            conn.commit()
+        return list(ids)
+
+
+class AuditWriter:
+    """
+    Background writer for prediction audit rows.
+
+    Requests enqueue records (with pre-reserved prediction ids) and return
+    immediately; a daemon thread flushes them in bulk every
+    AUDIT_FLUSH_INTERVAL_SECONDS or AUDIT_BATCH_SIZE records. If the queue
+    is full, the caller writes synchronously instead of dropping rows.
+    """
+
+    def __init__(
+        self,
+        engine,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        max_queue: int = AUDIT_MAX_QUEUE,
+    ):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.ids = IdAllocator(engine)
+        self._queue: "queue.Queue[AuditRecord]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the writer thread after flushing everything queued."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def submit(self, records: Sequence[AuditRecord]) -> List[int]:
+        """Assign prediction ids to ``records`` and queue them for writing."""
+        for record, pid in zip(records, self.ids.take(len(records))):
+            record.prediction_id = pid
+
+        overflow = self._enqueue(records)
+        if overflow:
+            self._write(overflow)
+        return [r.prediction_id for r in records]
+
+    async def submit_async(self, records: Sequence[AuditRecord]) -> List[int]:
+        """
+        submit() for the event loop: reserving a new block of ids and
+        writing queue overflow both block on the DB, so they run in the threadpool.
+        """
+        ids = self.ids.take_reserved(len(records))
+        if ids is None:
+            return await run_in_threadpool(self.submit, records)
+        for record, pid in zip(records, ids):
+            record.prediction_id = pid
+
+        overflow = self._enqueue(records)
+        if overflow:
+            await run_in_threadpool(self._write, overflow)
+        return [r.prediction_id for r in records]
+
+    def _enqueue(self, records: Sequence[AuditRecord]) -> List[AuditRecord]:
+        """Queue ``records``; returns those that did not fit (the caller writes them)."""
+        overflow = []
+        for record in records:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                overflow.append(record)
+        if overflow:
+            metrics.incr("audit.queue_full", len(overflow))
+        metrics.set_gauge("audit.queue_depth", self._queue.qsize())
+        return overflow
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._drain()
+            if batch:
+                self._write(batch)
+
+    def _drain(self) -> List[AuditRecord]:
+        batch: List[AuditRecord] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[AuditRecord]) -> None:
+        start = time.perf_counter()
+        for attempt in (1, 2):
+            try:
+                with Session(self.engine) as session:
+                    write_records(session, batch)
+                break
+            except Exception as e:
+                if attempt == 2:
+                    metrics.incr("audit.dropped", len(batch))
+                    print(f"Audit writer failed to persist {len(batch)} records: {e}")
+        metrics.observe("audit.flush_ms", (time.perf_counter() - start) * 1000)
+        metrics.observe("audit.flush_size", len(batch))
+        metrics.set_gauge("audit.queue_depth", self._queue.qsize())
+
+
+audit_writer: Optional[AuditWriter] = None
+
+
+def start_audit_writer(engine) -> Optional[AuditWriter]:
+    """Start the background writer when PREDICTION_AUDIT_MODE=buffered."""
+    global audit_writer
+    if PREDICTION_AUDIT_MODE != "buffered":
+        return None
+    audit_writer = AuditWriter(engine)
+    audit_writer.start()
+    return audit_writer
+
+
+def stop_audit_writer() -> None:
+    if audit_writer is not None:
+        audit_writer.stop()
+
+
+def persist(session: Session, records: Sequence[AuditRecord]) -> List[int]:
+    """Persist ``records`` according to PREDICTION_AUDIT_MODE and return their ids."""
+    if audit_writer is not None:
+        return audit_writer.submit(records)
+    return write_records(session, records)
+
+
+async def resolve_model_id_async(session: AsyncSession, name: str, version) -> Optional[int]:
+    """Async counterpart of resolve_model_id (no DB round trip once cached)."""
+    model_id = _model_ids.get((name, str(version)))
+    if model_id is not None:
+        return model_id
+    return await session.run_sync(resolve_model_id, name, version)
+
+
+async def persist_async(session: AsyncSession, records: Sequence[AuditRecord]) -> List[int]:
+    """Async counterpart of persist for the async prediction path."""
+    if audit_writer is not None:
+        return await audit_writer.submit_async(records)
+
+    prediction_ids = await session.run_sync(write_records, records, False)
+    await session.commit()
+    return prediction_ids
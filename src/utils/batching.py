@@ -0,0 +1,206 @@
+# src/utils/batching.py
+import asyncio
+import os
+import time
+from itertools import groupby
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from utils import inference
+from utils.executors import INFERENCE_WORKERS, run_inference
+from utils.metrics import metrics
+
+
+# --------------------------
+# Dynamic batching configuration
+# --------------------------
+MICRO_BATCHING_ENABLED = os.getenv("MICRO_BATCHING_ENABLED", "true").lower() in ("1", "true", "yes")
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", 64))
+MICRO_BATCH_WINDOW_MS = float(os.getenv("MICRO_BATCH_WINDOW_MS", 3))
+
+
+class MicroBatcher:
+    """
+    In-process dynamic batching in front of the model.
+
+    Concurrent requests submit their feature rows; a collector task waits
+    up to ``window_ms`` (or until ``max_batch_size`` rows are queued), runs
+    a single vectorized inference in the inference executor and hands each
+    caller back its own slice of the result. Up to ``max_in_flight``
+    batches run at once so every executor worker stays busy. Rows are only
+    batched with rows for the same model version (they differ briefly
+    around a hot swap).
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+        window_ms: float = MICRO_BATCH_WINDOW_MS,
+        max_in_flight: int = INFERENCE_WORKERS,
+        score_fn=inference.predict_features,
+    ):
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self.score_fn = score_fn
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._max_in_flight = max(1, max_in_flight)
+        self._collector: Optional[asyncio.Task] = None
+        self._pending: set = set()
+
+    def start(self) -> None:
+        """Start the collector task (must be called from the running event loop)."""
+        if self._collector is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self._max_in_flight)
+        self._collector = asyncio.create_task(self._collect(), name="micro-batcher")
+
+    async def stop(self) -> None:
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        self._collector = None
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        while not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            future.cancel()
+
+    async def run_when_idle(self, fn, *args):
+        """
+        Run low-priority ``fn(*args)`` in the inference executor on a batch
+        slot that is free right now (holding it meanwhile); returns None
+        without running it when every slot is busy, so requests never wait behind it.
+        """
+        if self._slots is None or self._slots.locked():
+            return None
+        await self._slots.acquire()  # free, so this does not wait
+        try:
+            return await run_inference(fn, *args)
+        finally:
+            self._slots.release()
+
+    async def submit(self, features: np.ndarray, version=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Queue ``features`` (n_rows x n_features) and wait for ``(labels, probabilities)``."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, version, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            try:
+                rows = len(items[0][0])
+                deadline = loop.time() + self.window
+
+                while rows < self.max_batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    items.append(item)
+                    rows += len(item[0])
+
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                for _, _, future, _ in items:
+                    future.cancel()
+                raise
+
+            task = asyncio.create_task(self._run_batch(items))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _run_batch(self, items: List[tuple]) -> None:
+        try:
+            dispatched = time.perf_counter()
+            for _, _, _, enqueued in items:
+                metrics.observe("batching.queue_wait_ms", (dispatched - enqueued) * 1000)
+
+            items = sorted(items, key=lambda item: str(item[1]))
+            for version, group in groupby(items, key=lambda item: item[1]):
+                await self._score(list(group), version)
+
+            metrics.observe("batching.inference_ms", (time.perf_counter() - dispatched) * 1000)
+        finally:
+            self._slots.release()
+
+    async def _score(self, items: List[tuple], version) -> None:
+        X = items[0][0] if len(items) == 1 else np.vstack([features for features, _, _, _ in items])
+        metrics.observe("batching.batch_size", len(X))
+        metrics.incr("batching.batches")
+
+        try:
+            labels, probabilities = await run_inference(self.score_fn, X, version)
+        except Exception as e:
+            for _, _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for features, _, future, _ in items:
+            n = len(features)
+            if not future.done():
+                future.set_result((labels[offset:offset + n], probabilities[offset:offset + n]))
+            offset += n
+
+
+batcher: Optional[MicroBatcher] = None
+# Requests scoring directly on the executor (micro-batching disabled)
+_direct_in_flight = 0
+
+
+def start_batcher() -> Optional[MicroBatcher]:
+    """Start the micro-batcher when MICRO_BATCHING_ENABLED (called from the lifespan)."""
+    global batcher
+    if not MICRO_BATCHING_ENABLED:
+        return None
+    batcher = MicroBatcher()
+    batcher.start()
+    return batcher
+
+
+async def stop_batcher() -> None:
+    if batcher is not None:
+        await batcher.stop()
+
+
+async def predict(features: np.ndarray, version=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Score ``features`` through the micro-batcher, or directly when it is disabled."""
+    global _direct_in_flight
+    if batcher is not None:
+        return await batcher.submit(features, version)
+    _direct_in_flight += 1
+    try:
+        return await run_inference(inference.predict_features, features, version)
+    finally:
+        _direct_in_flight -= 1
+
+
+async def run_when_idle(fn, *args):
+    """
+    Run low-priority work (shadow scoring) in the inference executor only
+    when it cannot delay a request: a micro-batch slot, or without the
+    batcher an executor worker, must be free. Returns None when skipped.
+    """
+    global _direct_in_flight
+    if batcher is not None:
+        return await batcher.run_when_idle(fn, *args)
+    if _direct_in_flight >= INFERENCE_WORKERS:
+        return None
+    _direct_in_flight += 1
+    try:
+        return await run_inference(fn, *args)
+    finally:
+        _direct_in_flight -= 1
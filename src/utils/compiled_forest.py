@@ -0,0 +1,218 @@
+# src/utils/compiled_forest.py
+from typing import Optional
+
+import numpy as np
+import sklearn
+
+
+# Before scikit-learn 1.4 tree_.value held weighted class counts that
+# predict_proba normalized per row; since 1.4 it holds the fractions.
+_NORMALIZE_LEAVES = tuple(int(p) for p in sklearn.__version__.split(".")[:2]) < (1, 4)
+
+
+class CompiledForest:
+    """
+    Array-backed copy of a fitted sklearn forest classifier.
+
+    All trees are flattened into contiguous NumPy tables (split feature,
+    threshold, left child, missing-value direction and per-leaf class
+    probabilities). Nodes are renumbered breadth-first so the right child
+    always follows the left one, and one step of the traversal is just
+    ``node = left[node] + (x > threshold[node])``. ``predict_proba`` walks
+    every (row, tree) pair in lockstep, dropping pairs as they reach a
+    leaf, without sklearn's per-call validation and joblib dispatch.
+
+    The arithmetic mirrors sklearn's so results are bit-for-bit identical:
+    rows are cast to float32 and compared with the float64 thresholds as
+    ``x <= threshold``, NaNs follow ``missing_go_to_left``, and the trees'
+    probabilities are added one tree at a time, in estimator order, into a
+    float64 zero matrix before dividing by the number of trees (which is
+    what sklearn computes with n_jobs=1).
+
+    The lockstep walk wins on the small batches online traffic produces;
+    batches above ``max_rows`` are handed to the sklearn model, whose
+    compiled per-row traversal is faster there and gives the same result.
+    """
+
+    def __init__(
+        self,
+        classes,
+        n_features: int,
+        roots: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        missing_left: np.ndarray,
+        leaf_values: np.ndarray,
+        model=None,
+        max_rows: Optional[int] = None,
+    ):
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = n_features
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left  # -1 for leaves; the right child is left + 1
+        self.missing_left = missing_left
+        self.leaf_values = leaf_values
+        self.model = model
+        self.max_rows = max_rows
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model, max_rows: Optional[int] = None) -> "CompiledForest":
+        """Flatten a fitted RandomForestClassifier / ExtraTreesClassifier (single output)."""
+        estimators = getattr(model, "estimators_", None)
+        if not estimators or getattr(model, "n_outputs_", 1) != 1:
+            raise TypeError(f"Cannot compile {type(model).__name__}: expected a single-output forest classifier")
+
+        n_classes = int(model.n_classes_)
+        roots, features, thresholds, lefts, missing, values = [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            order = _breadth_first_order(tree.children_left, tree.children_right)
+            new_id = np.empty(len(order), dtype=np.intp)
+            new_id[order] = np.arange(len(order))
+            children = tree.children_left[order]
+            is_leaf = children == -1
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature[order]))
+            thresholds.append(tree.threshold[order])
+            lefts.append(np.where(is_leaf, -1, new_id[np.where(is_leaf, 0, children)] + offset))
+            go_left = getattr(tree, "missing_go_to_left", None)
+            missing.append(np.zeros(len(order), dtype=bool) if go_left is None else np.asarray(go_left, dtype=bool)[order])
+
+            proba = np.array(tree.value[order, 0, :n_classes], dtype=np.float64)
+            if _NORMALIZE_LEAVES:
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+            values.append(proba)
+            offset += len(order)
+
+        return cls(
+            classes=model.classes_,
+            n_features=int(model.n_features_in_),
+            roots=np.asarray(roots, dtype=np.intp),
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            missing_left=np.ascontiguousarray(np.concatenate(missing)),
+            leaf_values=np.ascontiguousarray(np.concatenate(values)),
+            model=model,
+            max_rows=max_rows,
+        )
+
+    # --------------------------
+    # Inference
+    # --------------------------
+    def apply(self, X) -> np.ndarray:
+        """Leaf index (into the flattened tables) of every row in every tree, shape (n_rows, n_trees)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+
+        n_pairs = len(X) * self.n_trees
+        flat_X = X.ravel()
+        row_offsets = np.repeat(np.arange(len(X), dtype=np.intp) * X.shape[1], self.n_trees)
+        nodes = np.tile(self.roots, len(X))
+        pairs = np.arange(n_pairs)
+        leaves = np.empty(n_pairs, dtype=np.intp)
+        check_nan = bool(self.missing_left.any()) and bool(np.isnan(flat_X).any())
+
+        while pairs.size:
+            left = self.left[nodes]
+            done = left < 0
+            if done.any():
+                leaves[pairs[done]] = nodes[done]
+                active = ~done
+                pairs, nodes, row_offsets, left = pairs[active], nodes[active], row_offsets[active], left[active]
+                if not pairs.size:
+                    break
+
+            x = flat_X[row_offsets + self.feature[nodes]]
+            go_right = ~(x <= self.threshold[nodes])
+            if check_nan:
+                go_right &= ~(np.isnan(x) & self.missing_left[nodes])
+            nodes = left + go_right
+        return leaves.reshape(len(X), self.n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.max_rows is not None and self.model is not None and len(X) > self.max_rows:
+            return self.model.predict_proba(X)
+
+        leaves = self.apply(X)
+        proba = np.zeros((len(leaves), len(self.classes_)), dtype=np.float64)
+        for t in range(self.n_trees):
+            proba += self.leaf_values[leaves[:, t]]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def _breadth_first_order(children_left: np.ndarray, children_right: np.ndarray) -> np.ndarray:
+    """Node ids level by level, each internal node's children emitted as an adjacent (left, right) pair."""
+    levels = [np.array([0], dtype=np.intp)]
+    while True:
+        frontier = levels[-1]
+        internal = frontier[children_left[frontier] != -1]
+        if not internal.size:
+            break
+        levels.append(np.column_stack([children_left[internal], children_right[internal]]).ravel())
+    return np.concatenate(levels)
+
+
+def sklearn_reference_proba(model, X) -> np.ndarray:
+    """model.predict_proba with n_jobs=1, i.e. trees summed in estimator order."""
+    n_jobs = getattr(model, "n_jobs", None)
+    try:
+        if n_jobs not in (None, 1):
+            model.n_jobs = 1
+        return model.predict_proba(X)
+    finally:
+        if n_jobs not in (None, 1):
+            model.n_jobs = n_jobs
+
+
+def compile_and_verify(
+    model, max_rows: Optional[int] = None, probe: Optional[np.ndarray] = None, seed: int = 0
+) -> CompiledForest:
+    """
+    Compile ``model`` and check it reproduces sklearn exactly.
+
+    The probe rows include random standardized features plus rows set
+    exactly to split thresholds, so both sides of ``<=`` are exercised.
+    Raises ValueError on any difference.
+    """
+    compiled = CompiledForest.from_sklearn(model, max_rows=max_rows)
+    if probe is None:
+        rng = np.random.default_rng(seed)
+        probe = rng.standard_normal((128, compiled.n_features_in_))
+        internal = np.flatnonzero(compiled.left >= 0)
+        picks = rng.choice(internal, size=min(len(internal), 128), replace=False) if len(internal) else []
+        at_threshold = np.array(probe[:len(picks)])
+        for row, node in zip(at_threshold, picks):
+            row[compiled.feature[node]] = compiled.threshold[node]
+        probe = np.vstack([probe, at_threshold, np.zeros((1, compiled.n_features_in_))])
+
+    expected = sklearn_reference_proba(model, probe)
+    leaves = compiled.apply(probe)
+    actual = np.zeros_like(expected)
+    for t in range(compiled.n_trees):
+        actual += compiled.leaf_values[leaves[:, t]]
+    actual /= compiled.n_trees
+    if not np.array_equal(expected, actual):
+        mismatches = int(np.sum(np.any(expected != actual, axis=1)))
+        raise ValueError(f"Compiled forest differs from sklearn on {mismatches}/{len(probe)} probe rows")
+    return compiled
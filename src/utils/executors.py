@@ -0,0 +1,84 @@
+# src/utils/executors.py
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+
+# --------------------------
+# Inference executor configuration
+# --------------------------
+# "process": GIL-bound model calls run in a dedicated process pool (default)
+# "thread": a dedicated thread pool, separate from Starlette's threadpool
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "process").lower()
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 2))
+
+_executor: Optional[Executor] = None
+
+
+def _warmup() -> bool:
+    return True
+
+
+def _create_executor() -> Executor:
+    if INFERENCE_EXECUTOR == "thread":
+        return ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+    executor = ProcessPoolExecutor(
+        max_workers=INFERENCE_WORKERS,
+        mp_context=multiprocessing.get_context("fork"),
+    )
+    for future in [executor.submit(_warmup) for _ in range(INFERENCE_WORKERS)]:
+        future.result()
+    return executor
+
+
+def start_inference_executor() -> Executor:
+    """
+    Create the inference executor (called from the FastAPI lifespan).
+
+    Process workers are forked from the web worker, so they inherit the
+    already-loaded model and preprocessing pipeline instead of reloading
+    them. A no-op task is submitted so the fork happens at startup rather
+    than on the first request.
+    """
+    global _executor
+    if _executor is None:
+        _executor = _create_executor()
+    return _executor
+
+
+async def restart_inference_executor() -> None:
+    """
+    Fork a fresh process pool so its workers inherit a newly loaded model.
+
+    Called on the event loop during a hot swap. Tasks already queued on
+    the old pool still complete there; new tasks go to the new pool. Thread
+    workers share the registry with the web worker and need no restart.
+    """
+    global _executor
+    if _executor is None or INFERENCE_EXECUTOR == "thread":
+        return
+    new_executor = await asyncio.to_thread(_create_executor)
+    old_executor, _executor = _executor, new_executor
+    old_executor.shutdown(wait=False)
+
+
+def shutdown_inference_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def run_inference(fn, *args, **kwargs):
+    """
+    Run a CPU-bound inference function off the event loop.
+
+    ``fn`` must be a module-level function when the process executor is used.
+    """
+    executor = _executor or start_inference_executor()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
@@ -0,0 +1,121 @@
+# src/utils/export.py
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Iterable, Iterator, List
+
+from sqlmodel import Session
+
+
+# --------------------------
+# Streaming export configuration
+# --------------------------
+# Rows fetched per round trip from the server-side cursor; also the size of
+# each NDJSON/CSV chunk and Parquet row group
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 5000))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def iter_chunks(engine, statement, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[dict]]:
+    """
+    Yield the rows of ``statement`` as lists of dicts, ``chunk_size`` at a time.
+
+    Uses a server-side cursor (``yield_per``), so memory stays bounded by
+    one chunk whatever the size of the result. The session is opened here
+    rather than taken from the request, because it must stay open while the
+    response is streamed.
+    """
+    with Session(engine) as session:
+        result = session.execute(statement.execution_options(yield_per=chunk_size))
+        for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _flatten(rows: List[dict]) -> List[dict]:
+    """JSON-encode dict/list values (e.g. JSONB columns) for the flat CSV and Parquet formats."""
+    return [
+        {key: json.dumps(value) if isinstance(value, (dict, list)) else value for key, value in row.items()}
+        for row in rows
+    ]
+
+
+def iter_ndjson(chunks: Iterable[List[dict]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(json.dumps(row, default=_json_default) + "\n" for row in rows).encode()
+
+
+def iter_csv(chunks: Iterable[List[dict]], columns: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for rows in chunks:
+        writer.writerows(_flatten(rows))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _StreamSink:
+    """Write-only file object that hands back whatever ParquetWriter wrote since the last take()."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def iter_parquet(chunks: Iterable[List[dict]], schema) -> Iterator[bytes]:
+    """Stream a Parquet file, one row group per chunk (requires the optional ``pyarrow``)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(_flatten(rows), schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,79 @@
+# src/utils/inference.py
+import os
+import time
+from typing import Tuple
+
+import numpy as np
+
+
+# Probability above which a customer is labelled as churning.
+# 0.5 reproduces model.predict() for a binary classifier.
+DECISION_THRESHOLD = float(os.getenv("DECISION_THRESHOLD", 0.5))
+
+# Upper bound on records accepted by /predict/batch in a single request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 10000))
+
+
+class BatchTooLargeError(ValueError):
+    """Raised when a batch exceeds MAX_BATCH_SIZE (413 in the API)."""
+
+
+def check_batch_size(size: int, limit: int = MAX_BATCH_SIZE) -> None:
+    if size > limit:
+        raise BatchTooLargeError(f"Batch size {size} exceeds the limit of {limit}")
+
+
+def positive_class_index(model) -> int:
+    """Column of predict_proba holding the churn (positive) class."""
+    classes = list(model.classes_)
+    return classes.index(1) if 1 in classes else len(classes) - 1
+
+
+def predict(model, features: np.ndarray, threshold: float = DECISION_THRESHOLD) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run a single predict_proba pass and derive the labels from it.
+
+    ``model`` is anything with predict_proba and classes_: the sklearn model
+    or its CompiledForest (ModelBundle.scorer).
+
+    Returns ``(labels, churn_probabilities)``, one entry per row of ``features``.
+    The label is 1 when the churn probability is strictly greater than
+    ``threshold`` (ties go to the negative class, as in model.predict()).
+    """
+    probabilities = model.predict_proba(features)[:, positive_class_index(model)]
+    labels = (probabilities > threshold).astype(int)
+    return labels, probabilities
+
+
+# --------------------------
+# Executor entry points (see utils/executors.py)
+# --------------------------
+# Callers pass the model version they preprocessed with, so a hot swap
+# between preprocessing and scoring never mixes two versions.
+def _bundle(version=None):
+    from utils.ml_utils import registry
+    return registry.get_version(version) if version is not None else registry.ensure_loaded()
+
+
+def predict_features(features: np.ndarray, version=None, threshold: float = DECISION_THRESHOLD):
+    """Score already-preprocessed features with ``version`` (the active model by default)."""
+    return predict(_bundle(version).scorer, features, threshold)
+
+
+def score_records(records, version=None, threshold: float = DECISION_THRESHOLD):
+    """
+    Preprocess and score a batch of ChurnInput records.
+
+    Returns ``(features, labels, churn_probabilities, timings_ms)``.
+    """
+    bundle = _bundle(version)
+    start = time.perf_counter()
+    features = bundle.preprocessor.transform_many(records)
+    preprocessed = time.perf_counter()
+    labels, probabilities = predict(bundle.scorer, features, threshold)
+    done = time.perf_counter()
+    timings = {
+        "preprocess": (preprocessed - start) * 1000,
+        "inference": (done - preprocessed) * 1000,
+    }
+    return features, labels, probabilities, timings
@@ -0,0 +1,86 @@
+# src/utils/log_preprocessing.py
+import argparse
+import json
+import os
+import tempfile
+from typing import Optional, Sequence
+
+import mlflow
+import pandas as pd
+from mlflow.tracking import MlflowClient
+
+from utils.preprocessing import ChurnPreprocessor, PREPROCESSING_PARAMS_ARTIFACT
+
+
+# --------------------------
+# Training-side export of the preprocessing parameters
+# --------------------------
+# The API refuses to serve a model whose preprocessing run lacks
+# preprocessing_params.json (utils/ml_utils.py), since unscaled features
+# would silently change predictions. Run this on the raw training data after
+# the preprocessing run, e.g.
+#   cd src && python -m utils.log_preprocessing --data train.csv --run-id <run id> --model-run-id <model run id>
+# --model-run-id tags the model's training run with the preprocessing run, so
+# that model version keeps being served with these parameters (see
+# resolve_preprocess_run in utils/ml_utils.py)
+COLUMNS_ARTIFACT = "X_final_columns.csv"
+
+
+def log_preprocessing_params(frame: pd.DataFrame, train_columns: Optional[Sequence[str]] = None,
+                             run_id: Optional[str] = None, experiment_name: Optional[str] = None,
+                             model_run_id: Optional[str] = None) -> str:
+    """
+    Fit ChurnPreprocessor on the raw training ``frame`` and log its parameters to MLflow.
+
+    With ``run_id`` the artifact is added to that run and the training
+    columns are read from its X_final_columns.csv; otherwise a new run is
+    started in ``experiment_name`` with both artifacts. With ``model_run_id``
+    that model's training run is tagged with the preprocessing run id.
+    Returns the run id.
+    """
+    from utils.ml_utils import PREPROCESS_RUN_TAG
+
+    client = MlflowClient()
+    if run_id is not None and train_columns is None:
+        columns_uri = mlflow.artifacts.download_artifacts(run_id=run_id, artifact_path=COLUMNS_ARTIFACT)
+        train_columns = pd.read_csv(columns_uri)["columns"].tolist()
+    if train_columns is None:
+        raise ValueError("train_columns are required when no run_id is given")
+
+    preprocessor = ChurnPreprocessor.fit(frame, train_columns)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        params_path = os.path.join(tmp, PREPROCESSING_PARAMS_ARTIFACT)
+        with open(params_path, "w") as f:
+            json.dump(preprocessor.to_dict(), f, indent=2)
+
+        if run_id is None:
+            if experiment_name:
+                mlflow.set_experiment(experiment_name)
+            with mlflow.start_run() as run:
+                run_id = run.info.run_id
+            columns_path = os.path.join(tmp, COLUMNS_ARTIFACT)
+            pd.DataFrame({"columns": list(train_columns)}).to_csv(columns_path, index=False)
+            client.log_artifact(run_id, columns_path)
+        client.log_artifact(run_id, params_path)
+    if model_run_id is not None:
+        client.set_tag(model_run_id, PREPROCESS_RUN_TAG, run_id)
+
+    print(f"Logged {PREPROCESSING_PARAMS_ARTIFACT} to run {run_id}")
+    return run_id
+
+
+if __name__ == "__main__":
+    from utils.ml_utils import MLFLOW_TRACKING_URI, PREPROCESS_EXPERIMENT_NAME
+
+    parser = argparse.ArgumentParser(description="Log preprocessing_params.json for the serving API")
+    parser.add_argument("--data", required=True, help="CSV of the raw training data (one column per ChurnInput field)")
+    parser.add_argument("--run-id", help="preprocessing run to attach to (default: a new run)")
+    parser.add_argument("--columns", help="CSV with a 'columns' column (required without --run-id)")
+    parser.add_argument("--model-run-id", help="model training run to bind to this preprocessing run")
+    args = parser.parse_args()
+
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    columns = pd.read_csv(args.columns)["columns"].tolist() if args.columns else None
+    log_preprocessing_params(pd.read_csv(args.data), columns, args.run_id, PREPROCESS_EXPERIMENT_NAME,
+                             model_run_id=args.model_run_id)
@@ -13,6 +13,7 @@ def configure_logging(log_level: str = "INFO", json_logs: bool = True):
     logging.getLogger().setLevel(log_level)
 
     shared_processors = [
+        structlog.contextvars.merge_contextvars,  # request_id etc. (RequestIDMiddleware)
         structlog.stdlib.filter_by_level,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
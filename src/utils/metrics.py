@@ -0,0 +1,135 @@
+# src/utils/metrics.py
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict
+
+# Number of most recent observations kept per latency metric
+WINDOW_SIZE = 2048
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics store (per worker).
+
+    Counters are monotonic totals; latency metrics keep a rolling window
+    of recent observations and report count/mean/percentiles in milliseconds.
+    """
+
+    def __init__(self, window_size: int = WINDOW_SIZE):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._totals: Dict[str, int] = defaultdict(int)
+        self._windows: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window_size))
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            self._totals[name] += 1
+            self._windows[name].append(value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            windows = {name: (self._totals[name], sorted(values)) for name, values in self._windows.items()}
+
+        summaries = {}
+        for name, (total, values) in windows.items():
+            if not values:
+                continue
+            summaries[name] = {
+                "count": total,
+                "mean": round(sum(values) / len(values), 4),
+                "p50": round(_percentile(values, 0.50), 4),
+                "p95": round(_percentile(values, 0.95), 4),
+                "p99": round(_percentile(values, 0.99), 4),
+                "max": round(values[-1], 4),
+            }
+        return {"counters": counters, "gauges": gauges, "summaries": summaries}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._totals.clear()
+            self._windows.clear()
+
+
+def _percentile(sorted_values, q: float) -> float:
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class StageTimer:
+    """
+    Per-request stage timer.
+
+    Usage:
+        timer = StageTimer("predict")
+        with timer.stage("inference"):
+            ...
+        timer.server_timing()  # value for the Server-Timing header
+    """
+
+    def __init__(self, prefix: str, registry: "MetricsRegistry" = None):
+        self.prefix = prefix
+        self.registry = registry or metrics
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed_ms
+        self.registry.observe(f"{self.prefix}.{name}_ms", elapsed_ms)
+
+    def finish(self) -> Dict[str, float]:
+        """Record the total elapsed time and return the breakdown (ms)."""
+        self.record("total", (time.perf_counter() - self._start) * 1000)
+        return {name: round(ms, 3) for name, ms in self.timings.items()}
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={ms:.3f}" for name, ms in self.timings.items())
+
+
+def process_memory() -> Dict[str, float]:
+    """
+    Memory of this process in MB from /proc/self/smaps_rollup (Linux only).
+
+    ``shared`` is the part of ``rss`` still shared with other processes, e.g.
+    model pages inherited copy-on-write from the gunicorn master; ``pss``
+    splits shared pages across their users, so summing it over workers gives
+    the real footprint.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared"}
+    usage: Dict[str, float] = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    name = fields[key]
+                    usage[name] = usage.get(name, 0.0) + int(rest.split()[0]) / 1024
+    except OSError:
+        return {}
+    return {name: round(mb, 1) for name, mb in usage.items()}
+
+
+# Process-wide registry exposed on GET /metrics
+metrics = MetricsRegistry()
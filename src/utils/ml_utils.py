@@ -1,107 +1,435 @@
 # from fastapi import FastAPI
 import mlflow
+import numpy as np
 import pandas as pd
 import os
+import json
+import threading
+import time
+import warnings
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from mlflow.tracking import MlflowClient
-# from sqlmodel import Session, select
+from utils.preprocessing import ChurnPreprocessor, PREPROCESSING_PARAMS_ARTIFACT
+from utils.artifact_cache import CachedArtifacts, MODEL_CACHE_ENABLED, artifact_cache
+from utils.compiled_forest import compile_and_verify
 
 
 # --------------------------
-# Load MLflow model from Registry
+# MLflow configuration
 # --------------------------
 load_dotenv()
 
-# Absolute path to your mlruns folder
-# BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-
-# MLFLOW_TRACKING_URI = f"file://{os.path.join(BASE_DIR, 'mlruns')}"
-
-# MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI")
-
-# mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
-
-# # Absolute path to your desired mlruns folder
-# BASE_DIR = "/Users/ammi/Documents/telCustomerChurn"
-# MLRUNS_PATH = os.path.join(BASE_DIR, "mlruns")
-
-# # Make sure the directory exists
-# os.makedirs(MLRUNS_PATH, exist_ok=True)
-
-# # Set MLflow tracking URI
-# MLFLOW_TRACKING_URI = f"{MLRUNS_PATH}"
-
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI")
-
-mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
-
 MODEL_NAME = os.getenv("MODEL_NAME", "Churn_RandomForest")
-# MODEL_VERSION = os.getenv("MODEL_VERSION", "1")  # specify a version explicitly
-
-# Get the latest version of the model from MLflow
-client = MlflowClient()
-latest_version_info = client.get_latest_versions(MODEL_NAME, stages=["None", "Production", "Staging"])
-
-# Sort by version number to get the latest
-latest_version = max([int(v.version) for v in latest_version_info])
-
-# Construct the MLflow model URI for the latest version
-model_uri = f"models:/{MODEL_NAME}/{latest_version}"
-
-print(f"Using model URI: {model_uri}")
-
-# # Construct the MLflow model URI
-# model_uri = f"models:/{MODEL_NAME}/{MODEL_VERSION}"
-
-# # Load the model using the sklearn flavor
-model = mlflow.sklearn.load_model(model_uri)
-
-
-# client = MlflowClient()
-
-# # Get all versions of the model
-# all_versions = client.get_latest_versions(MODEL_NAME)
-
-# # Get the latest version
-# latest_version_info = max(all_versions, key=lambda v: int(v.version))
-# run_id = latest_version_info.run_id
-
-# # Optionally, print vers1:5000 (Press CTRL+C to quit)ion and stage
-# print(f"Latest version: {latest_version_info.version}, stage: {latest_version_info.current_stage}")
-
-
 # Get experiment name from environment or use default
 PREPROCESS_EXPERIMENT_NAME = os.getenv("EXPERIMENT_NAME", "telecom_churn_preprocessing")
+# Tag (or param) on a model's training run naming the preprocessing run its
+# features were built with, so each version is served with its own parameters
+PREPROCESS_RUN_TAG = "preprocess_run_id"
+# Model versions kept in memory: the active one plus recently replaced ones,
+# so requests that started before a hot swap finish on the version they began with
+MODEL_KEEP_VERSIONS = max(1, int(os.getenv("MODEL_KEEP_VERSIONS", 2)))
+# "sklearn": model.predict_proba; "compiled": flattened NumPy tree tables
+# (utils/compiled_forest.py), checked bit-for-bit against sklearn at load
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "sklearn").lower()
+# Larger batches go to sklearn's own traversal, which is faster for them
+COMPILED_MAX_ROWS = int(os.getenv("COMPILED_MAX_ROWS", 256))
+
+# Features are passed to the model as a NumPy matrix aligned with train_columns
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+class ModelStatus(str, Enum):
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when a prediction is requested before the model is loaded."""
+
+
+class MissingPreprocessingParamsError(ValueError):
+    """Raised when a model's preprocessing run has no preprocessing_params.json."""
+
+
+@dataclass
+class ModelBundle:
+    """Everything needed to serve one model version."""
+    name: str
+    version: str
+    model: object
+    train_columns: List[str]
+    preprocessor: ChurnPreprocessor
+    run_id: Optional[str] = None
+    preprocess_run_id: Optional[str] = None
+    source: str = "mlflow"  # "mlflow" or "cache"
+    loaded_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # Object whose predict_proba/classes_ are used for inference (see INFERENCE_BACKEND)
+    scorer: object = None
+
+    def __post_init__(self):
+        if self.scorer is None:
+            self.scorer = make_scorer(self.model)
+
+    @property
+    def backend(self) -> str:
+        return "sklearn" if self.scorer is self.model else "compiled"
+
+
+def make_scorer(model):
+    """The compiled forest when INFERENCE_BACKEND=compiled and it matches sklearn, else the model."""
+    if INFERENCE_BACKEND != "compiled":
+        return model
+    try:
+        return compile_and_verify(model, max_rows=COMPILED_MAX_ROWS)
+    except Exception as e:
+        print(f"Warning: compiled inference backend unavailable ({e}); using sklearn")
+        return model
 
-# Initialize MLflow client
-client = MlflowClient()
-
-# Get the experiment by name
-experiment = client.get_experiment_by_name(PREPROCESS_EXPERIMENT_NAME)
-
-if experiment is None:
-    raise ValueError(f"Experiment '{PREPROCESS_EXPERIMENT_NAME}' not found!")
 
-# Search for the latest run in that experiment
-runs = mlflow.search_runs(
-    experiment_ids=[experiment.experiment_id],
-    order_by=["start_time DESC"],
-    max_results=1
-)
-
-if runs.empty:
-    raise ValueError(f"No runs found in experiment '{PREPROCESS_EXPERIMENT_NAME}'.")
-
-# Extract the latest run ID dynamically
-latest_run_id = runs.loc[0, "run_id"]
-print(f"Latest run ID: {latest_run_id}")
-
-# Optional: Get model version info if a model was logged in this run
-model_versions = client.search_model_versions(f"run_id='{latest_run_id}'")
-
-# Load the artifact file into a DataFrame
-columns_path = "X_final_columns.csv"
-artifact_uri = mlflow.artifacts.download_artifacts(run_id=latest_run_id, artifact_path=columns_path)
-train_columns = pd.read_csv(artifact_uri)["columns"].tolist()
-
-print("Loaded training columns from MLflow:", train_columns)
\ No newline at end of file
+# --------------------------
+# Load MLflow model from Registry
+# --------------------------
+def resolve_latest_version(client: MlflowClient, model_name: str):
+    """Return ``(version, run_id)`` of the latest registered version of ``model_name``."""
+    latest_version_info = client.get_latest_versions(model_name, stages=["None", "Production", "Staging"])
+    if not latest_version_info:
+        raise ValueError(f"No registered versions found for model '{model_name}'")
+    latest = max(latest_version_info, key=lambda v: int(v.version))
+    return str(latest.version), latest.run_id
+
+
+def resolve_version(client: MlflowClient, model_name: str, version=None):
+    """``(version, run_id)`` of ``version``, or of the latest version when it is None."""
+    if version is None:
+        return resolve_latest_version(client, model_name)
+    model_version = client.get_model_version(model_name, str(version))
+    return str(model_version.version), model_version.run_id
+
+
+def resolve_preprocess_run(client: MlflowClient, model_run_id: Optional[str] = None) -> str:
+    """
+    Id of the preprocessing run of the model trained in ``model_run_id``
+    (its PREPROCESS_RUN_TAG tag or param), or of the latest run in the
+    preprocessing experiment for models logged without one.
+    Metadata calls only, no download.
+    """
+    if model_run_id is not None:
+        run = client.get_run(model_run_id)
+        bound = run.data.tags.get(PREPROCESS_RUN_TAG) or run.data.params.get(PREPROCESS_RUN_TAG)
+        if bound:
+            return bound
+        print(f"Warning: model run {model_run_id} has no '{PREPROCESS_RUN_TAG}' tag; "
+              f"using the latest preprocessing run")
+
+    # Get the experiment by name
+    experiment = client.get_experiment_by_name(PREPROCESS_EXPERIMENT_NAME)
+    if experiment is None:
+        raise ValueError(f"Experiment '{PREPROCESS_EXPERIMENT_NAME}' not found!")
+
+    # Search for the latest run in that experiment
+    runs = mlflow.search_runs(
+        experiment_ids=[experiment.experiment_id],
+        order_by=["start_time DESC"],
+        max_results=1
+    )
+    if runs.empty:
+        raise ValueError(f"No runs found in experiment '{PREPROCESS_EXPERIMENT_NAME}'.")
+
+    # Extract the latest run ID dynamically
+    latest_run_id = runs.loc[0, "run_id"]
+    print(f"Latest run ID: {latest_run_id}")
+    return latest_run_id
+
+
+def download_artifacts(client: MlflowClient, model_name: str, version: str, latest_run_id: Optional[str] = None):
+    """
+    Fetch the model and its preprocessing artifacts from MLflow
+    (those of preprocessing run ``latest_run_id``, the latest one by default).
+
+    Returns ``(model, train_columns, preprocessing_params, preprocess_run_id)``.
+    """
+    # Construct the MLflow model URI for the version
+    model_uri = f"models:/{model_name}/{version}"
+    print(f"Using model URI: {model_uri}")
+    model = mlflow.sklearn.load_model(model_uri)
+
+    if latest_run_id is None:
+        latest_run_id = resolve_preprocess_run(client)
+
+    # Load the artifact file into a DataFrame
+    columns_path = "X_final_columns.csv"
+    artifact_uri = mlflow.artifacts.download_artifacts(run_id=latest_run_id, artifact_path=columns_path)
+    train_columns = pd.read_csv(artifact_uri)["columns"].tolist()
+    print("Loaded training columns from MLflow:", train_columns)
+
+    # Load the fitted preprocessing parameters logged with the same run
+    # (imputation values and scaler statistics from the training set). The
+    # model is not served without them: unscaled features would silently
+    # change its predictions
+    try:
+        params_uri = mlflow.artifacts.download_artifacts(
+            run_id=latest_run_id, artifact_path=PREPROCESSING_PARAMS_ARTIFACT
+        )
+        with open(params_uri) as f:
+            preprocessing_params = json.load(f)
+    except Exception as e:
+        raise MissingPreprocessingParamsError(
+            f"'{PREPROCESSING_PARAMS_ARTIFACT}' not available for preprocessing run {latest_run_id} ({e}); "
+            f"log it with: python -m utils.log_preprocessing --data <train.csv> --run-id {latest_run_id}"
+        ) from e
+    print("Loaded preprocessing parameters from MLflow")
+
+    return model, train_columns, preprocessing_params, latest_run_id
+
+
+def _bundle_from_cache(model_name: str, cached: CachedArtifacts) -> ModelBundle:
+    return ModelBundle(
+        name=model_name,
+        version=cached.version,
+        run_id=cached.run_id,
+        model=cached.model,
+        train_columns=cached.train_columns,
+        preprocessor=_make_preprocessor(cached.train_columns, cached.preprocessing_params),
+        preprocess_run_id=cached.preprocess_run_id,
+        source="cache",
+    )
+
+
+def _make_preprocessor(train_columns, preprocessing_params) -> ChurnPreprocessor:
+    if preprocessing_params is None:
+        raise MissingPreprocessingParamsError(f"'{PREPROCESSING_PARAMS_ARTIFACT}' is missing")
+    return ChurnPreprocessor.from_dict(train_columns, preprocessing_params)
+
+
+def load_bundle(model_name: str = MODEL_NAME, version=None) -> ModelBundle:
+    """
+    Load ``version`` of ``model_name`` (the latest registered one by default).
+
+    MLflow is only asked which version is current and which preprocessing
+    run it was trained with (see resolve_preprocess_run);
+    the artifacts come from the local cache (utils/artifact_cache.py) when
+    that combination is already there and are downloaded and cached otherwise. If the tracking
+    server cannot be reached, the newest cached version is served.
+    """
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    client = MlflowClient()
+
+    try:
+        version, run_id = resolve_version(client, model_name, version)
+        preprocess_run_id = resolve_preprocess_run(client, run_id)
+    except Exception as e:
+        cached = artifact_cache.latest(model_name, version) if MODEL_CACHE_ENABLED else None
+        if cached is None:
+            raise
+        print(f"MLflow unavailable ({e}); serving cached {model_name} v{cached.version}")
+        return _bundle_from_cache(model_name, cached)
+
+    if MODEL_CACHE_ENABLED:
+        cached = artifact_cache.get(model_name, version, run_id, preprocess_run_id)
+        # Entries written without preprocessing parameters are downloaded again
+        if cached is not None and cached.preprocessing_params is not None:
+            print(f"Loaded {model_name} v{version} from local cache {cached.path}")
+            return _bundle_from_cache(model_name, cached)
+
+    model, train_columns, preprocessing_params, preprocess_run_id = download_artifacts(
+        client, model_name, version, preprocess_run_id
+    )
+
+    if MODEL_CACHE_ENABLED:
+        try:
+            artifact_cache.put(
+                model_name, version, run_id, model, train_columns,
+                preprocessing_params=preprocessing_params,
+                preprocess_run_id=preprocess_run_id,
+            )
+        except Exception as e:
+            print(f"Warning: could not write model cache entry: {e}")
+
+    return ModelBundle(
+        name=model_name,
+        version=version,
+        run_id=run_id,
+        model=model,
+        train_columns=train_columns,
+        preprocessor=_make_preprocessor(train_columns, preprocessing_params),
+        preprocess_run_id=preprocess_run_id,
+        source="mlflow",
+    )
+
+
+def warm_up(bundle: ModelBundle) -> None:
+    """Run one prediction so the first request does not pay for lazy initialization."""
+    bundle.scorer.predict_proba(np.zeros((1, len(bundle.train_columns))))
+
+
+class ModelRegistry:
+    """
+    Lazily-initialized holder of the served model.
+
+    Nothing is loaded at import time; the FastAPI lifespan starts
+    ``load()`` in the background and the health check reports the
+    readiness state. Prediction routes call ``get()``, which raises
+    ModelNotReadyError until the model is available.
+
+    New versions are hot-swapped (see utils/model_reload.py): ``prepare()``
+    loads and warms a version off the request path and keeps it resident,
+    ``activate()`` then swaps the reference atomically. A request keeps the
+    bundle it started with, and executor tasks look their version up with
+    ``get_version()``.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, keep_versions: int = MODEL_KEEP_VERSIONS):
+        self.model_name = model_name
+        self.keep_versions = keep_versions
+        self.status = ModelStatus.NOT_LOADED
+        self.error: Optional[str] = None
+        self.reload_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._bundle: Optional[ModelBundle] = None
+        self._bundles: Dict[str, ModelBundle] = {}
+        self._pinned: set = set()  # versions kept resident for canary/shadow routing
+        self._lock = threading.Lock()
+
+    def load(self) -> ModelBundle:
+        """Load the model synchronously (idempotent, thread-safe)."""
+        with self._lock:
+            if self._bundle is not None:
+                return self._bundle
+
+            self.status = ModelStatus.LOADING
+            self.error = None
+            start = time.perf_counter()
+            try:
+                bundle = load_bundle(self.model_name)
+                warm_up(bundle)
+            except Exception as e:
+                self.status = ModelStatus.FAILED
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"Failed to load model '{self.model_name}': {self.error}")
+                raise
+            self.load_seconds = round(time.perf_counter() - start, 3)
+            self._bundles[bundle.version] = bundle
+            self._set_active(bundle)
+            return bundle
+
+    # --------------------------
+    # Hot swap
+    # --------------------------
+    def latest_version(self) -> str:
+        """Latest registered version in MLflow (metadata call only, no download)."""
+        mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+        return resolve_latest_version(MlflowClient(), self.model_name)[0]
+
+    def prepare(self, version=None, pin: bool = False) -> ModelBundle:
+        """
+        Load and warm ``version`` (latest by default) and keep it resident, without serving it.
+
+        Pinned versions are never dropped by later swaps (see unpin()).
+        """
+        resident = self._bundles.get(str(version)) if version is not None else None
+        if resident is not None:
+            if pin:
+                self._pinned.add(resident.version)
+            return resident
+
+        start = time.perf_counter()
+        try:
+            bundle = load_bundle(self.model_name, version)
+            warm_up(bundle)
+        except Exception as e:
+            self.reload_error = f"{type(e).__name__}: {e}"
+            print(f"Failed to load model '{self.model_name}' v{version or 'latest'}: {self.reload_error}")
+            raise
+        with self._lock:
+            self._bundles[bundle.version] = bundle
+            if pin:
+                self._pinned.add(bundle.version)
+        print(f"Prepared {self.model_name} v{bundle.version} in {time.perf_counter() - start:.2f}s")
+        return bundle
+
+    def activate(self, bundle: ModelBundle) -> None:
+        """Start serving ``bundle``; requests already running keep their own reference."""
+        with self._lock:
+            self._bundles[bundle.version] = bundle
+            self._set_active(bundle)
+
+    def _set_active(self, bundle: ModelBundle) -> None:
+        self._bundle = bundle
+        self.status = ModelStatus.READY
+        self.error = None
+        self.reload_error = None
+
+        self._prune()
+
+    def _prune(self) -> None:
+        # Drop the oldest inactive, unpinned versions beyond keep_versions
+        active = self._bundle
+        inactive = sorted(
+            (b for b in self._bundles.values() if b is not active and b.version not in self._pinned),
+            key=lambda b: b.loaded_at,
+        )
+        excess = len(self._bundles) - len(self._pinned - {active.version if active else None}) - self.keep_versions
+        for old in inactive[:max(0, excess)]:
+            del self._bundles[old.version]
+
+    def unpin(self, version) -> None:
+        with self._lock:
+            self._pinned.discard(str(version))
+            self._prune()
+
+    def get(self) -> ModelBundle:
+        bundle = self._bundle
+        if bundle is None:
+            raise ModelNotReadyError(
+                f"Model '{self.model_name}' is {self.status.value}" + (f": {self.error}" if self.error else "")
+            )
+        return bundle
+
+    def resident(self, version) -> Optional[ModelBundle]:
+        """Bundle for ``version`` if it is already in memory (never loads)."""
+        return self._bundles.get(str(version))
+
+    def get_version(self, version) -> ModelBundle:
+        """Bundle for ``version``, loading it (normally from the local cache) if it is not resident."""
+        bundle = self._bundles.get(str(version))
+        if bundle is not None:
+            return bundle
+        # Loaded without holding the lock, so a download does not stall
+        # swaps and other versions; if two callers race, the first insert wins
+        bundle = load_bundle(self.model_name, version)
+        with self._lock:
+            return self._bundles.setdefault(bundle.version, bundle)
+
+    def ensure_loaded(self) -> ModelBundle:
+        """Return the bundle, loading it in this process if needed (executor workers)."""
+        return self._bundle or self.load()
+
+    @property
+    def ready(self) -> bool:
+        return self._bundle is not None
+
+    def readiness(self) -> dict:
+        bundle = self._bundle
+        return {
+            "status": self.status.value,
+            "model_name": self.model_name,
+            "model_version": bundle.version if bundle else None,
+            "source": bundle.source if bundle else None,
+            "backend": bundle.backend if bundle else None,
+            "loaded_at": bundle.loaded_at.isoformat() if bundle else None,
+            "load_seconds": self.load_seconds,
+            "resident_versions": sorted(self._bundles),
+            "pinned_versions": sorted(self._pinned),
+            "error": self.error,
+            "reload_error": self.reload_error,
+        }
+
+
+registry = ModelRegistry()
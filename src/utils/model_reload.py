@@ -0,0 +1,130 @@
+# src/utils/model_reload.py
+import asyncio
+import os
+from typing import Optional
+
+from sqlmodel import Session
+
+from utils.audit_writer import register_model
+from utils.executors import restart_inference_executor
+from utils.metrics import metrics
+from utils.ml_utils import ModelBundle, registry
+from utils import prediction_cache
+
+
+# --------------------------
+# Hot reload configuration
+# --------------------------
+# How often each worker asks MLflow for a newer version (0 disables polling;
+# POST /admin/models/reload still works)
+MODEL_POLL_INTERVAL_SECONDS = float(os.getenv("MODEL_POLL_INTERVAL_SECONDS", 60))
+# A failed startup load is retried after this many seconds, doubling up to the maximum
+MODEL_LOAD_RETRY_SECONDS = float(os.getenv("MODEL_LOAD_RETRY_SECONDS", 5))
+MODEL_LOAD_RETRY_MAX_SECONDS = float(os.getenv("MODEL_LOAD_RETRY_MAX_SECONDS", 300))
+
+_reload_lock: Optional[asyncio.Lock] = None
+_poller: Optional[asyncio.Task] = None
+
+
+def register_bundle(bundle: ModelBundle) -> int:
+    # Every served version needs an MLModel row so PredictionMetadata can point at it
+    from db.database import app_engine
+
+    with Session(app_engine) as session:
+        return register_model(session, bundle.name, bundle.version)
+
+
+def swap_lock() -> asyncio.Lock:
+    """Serializes model swaps and routing changes (both re-fork the inference pool)."""
+    global _reload_lock
+    if _reload_lock is None:
+        _reload_lock = asyncio.Lock()
+    return _reload_lock
+
+
+async def load_with_retry(
+    initial_delay: float = MODEL_LOAD_RETRY_SECONDS,
+    max_delay: float = MODEL_LOAD_RETRY_MAX_SECONDS,
+) -> ModelBundle:
+    """
+    Load the served model off the event loop, retrying with exponential
+    backoff until it succeeds (MLflow or the artifact store may come up
+    after the API). Between attempts /health reports ``failed`` with the
+    last error; the lifespan cancels the task on shutdown.
+    """
+    delay = initial_delay
+    while True:
+        try:
+            return await asyncio.to_thread(registry.load)
+        except Exception as e:
+            metrics.incr("model.load_failures")
+            print(f"Model load failed, retrying in {delay:g}s: {e}")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+async def reload_model(version=None, force: bool = False) -> dict:
+    """
+    Hot-swap the served model to ``version`` (the latest registered one by default).
+
+    The new version is loaded, warmed and registered in the database off the
+    event loop while the current one keeps serving; process inference
+    workers are re-forked so they hold it too, and only then is it
+    activated. Requests in flight finish on the version they started with.
+    """
+    async with swap_lock():
+        previous = registry.get() if registry.ready else None
+        if version is None and previous is not None and not force:
+            latest = await asyncio.to_thread(registry.latest_version)
+            if latest == previous.version:
+                return {"changed": False, "model_version": previous.version}
+
+        bundle = await asyncio.to_thread(registry.prepare, version)
+        if previous is not None and (bundle.version, bundle.run_id) == (previous.version, previous.run_id):
+            return {"changed": False, "model_version": previous.version}
+
+        await asyncio.to_thread(register_bundle, bundle)
+        await restart_inference_executor()
+        registry.activate(bundle)
+        prediction_cache.invalidate()
+        metrics.incr("model.reloads")
+
+    print(f"Now serving {bundle.name} v{bundle.version} (was {previous.version if previous else 'none'})")
+    return {
+        "changed": True,
+        "model_version": bundle.version,
+        "previous_version": previous.version if previous else None,
+    }
+
+
+async def _poll(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        if not registry.ready:
+            continue  # initial load (or its retries) still running
+        try:
+            await reload_model()
+        except Exception as e:
+            metrics.incr("model.reload_failures")
+            print(f"Model poll failed: {e}")
+
+
+def start_model_poller() -> Optional[asyncio.Task]:
+    """Start polling MLflow for new versions (called from the lifespan)."""
+    global _poller
+    if MODEL_POLL_INTERVAL_SECONDS <= 0 or _poller is not None:
+        return _poller
+    _poller = asyncio.create_task(_poll(MODEL_POLL_INTERVAL_SECONDS), name="model-poller")
+    return _poller
+
+
+async def stop_model_poller() -> None:
+    global _poller
+    if _poller is None:
+        return
+    _poller.cancel()
+    try:
+        await _poller
+    except asyncio.CancelledError:
+        pass
+    _poller = None
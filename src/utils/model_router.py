@@ -0,0 +1,173 @@
+# src/utils/model_router.py
+import asyncio
+import os
+import zlib
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from utils import batching, inference
+from utils.executors import restart_inference_executor
+from utils.metrics import metrics
+from utils.ml_utils import ModelBundle, registry
+from utils.model_reload import register_bundle, swap_lock
+
+
+# --------------------------
+# Canary / shadow routing configuration
+# --------------------------
+# CANARY_MODEL_VERSION serves CANARY_TRAFFIC_PERCENT of users (sticky per
+# user); SHADOW_MODEL_VERSION scores SHADOW_TRAFFIC_PERCENT of requests in
+# the background for comparison only. Both are optional and can be changed
+# at runtime with PUT /admin/models/routing.
+CANARY_MODEL_VERSION = os.getenv("CANARY_MODEL_VERSION") or None
+CANARY_TRAFFIC_PERCENT = float(os.getenv("CANARY_TRAFFIC_PERCENT", 0))
+SHADOW_MODEL_VERSION = os.getenv("SHADOW_MODEL_VERSION") or None
+SHADOW_TRAFFIC_PERCENT = float(os.getenv("SHADOW_TRAFFIC_PERCENT", 100))
+# Shadow requests beyond this many in flight are skipped, never queued; they
+# are also skipped whenever no inference slot is free (see batching.run_when_idle)
+SHADOW_MAX_IN_FLIGHT = int(os.getenv("SHADOW_MAX_IN_FLIGHT", 8))
+
+
+@dataclass
+class RoutingConfig:
+    canary_version: Optional[str] = None
+    canary_percent: float = 0.0
+    shadow_version: Optional[str] = None
+    shadow_percent: float = 100.0
+
+
+def _bucket(key) -> float:
+    """Stable position of ``key`` in [0, 100) so a user always gets the same route."""
+    return (zlib.crc32(str(key).encode()) % 10000) / 100
+
+
+class ModelRouter:
+    """
+    Chooses the model version serving each request.
+
+    The primary model is the registry's active version. A canary version
+    takes a sticky share of users; a shadow version re-scores sampled
+    requests in a background task whose result only feeds the
+    ``shadow.*`` metrics, so it adds no latency to the response, and only
+    on spare inference capacity. Canary
+    and shadow versions are pinned in the registry so hot swaps never
+    evict them.
+    """
+
+    def __init__(self, config: Optional[RoutingConfig] = None, max_shadow_in_flight: int = SHADOW_MAX_IN_FLIGHT):
+        self.config = config or RoutingConfig()
+        self.max_shadow_in_flight = max_shadow_in_flight
+        self._shadow_tasks: set = set()
+
+    # --------------------------
+    # Request path
+    # --------------------------
+    def route(self, key) -> ModelBundle:
+        """Bundle serving the request identified by ``key`` (the user id)."""
+        primary = registry.get()
+        config = self.config
+        if (
+            config.canary_version
+            and config.canary_version != primary.version
+            and _bucket(key) < config.canary_percent
+        ):
+            bundle = registry.resident(config.canary_version)
+            if bundle is not None:
+                metrics.incr("routing.canary")
+                return bundle
+            metrics.incr("routing.canary_errors")
+        metrics.incr("routing.primary")
+        return primary
+
+    def shadow(self, records: Sequence, served: ModelBundle, probabilities: np.ndarray) -> None:
+        """
+        Score the ChurnInput ``records`` on the shadow version in the
+        background (fire and forget), through its own preprocessor.
+        """
+        version = self.config.shadow_version
+        if not version or version == served.version:
+            return
+        if np.random.random() * 100 >= self.config.shadow_percent:
+            return
+        if len(self._shadow_tasks) >= self.max_shadow_in_flight:
+            metrics.incr("shadow.skipped")
+            return
+
+        task = asyncio.create_task(self._score_shadow(records, version, probabilities))
+        self._shadow_tasks.add(task)
+        task.add_done_callback(self._shadow_tasks.discard)
+
+    async def _score_shadow(self, records: Sequence, version: str, served_probabilities: np.ndarray) -> None:
+        try:
+            scored = await batching.run_when_idle(inference.score_records, records, version)
+        except Exception as e:
+            metrics.incr("shadow.errors")
+            print(f"Shadow scoring on v{version} failed: {e}")
+            return
+        if scored is None:
+            metrics.incr("shadow.skipped")  # no spare inference capacity
+            return
+
+        _, labels, probabilities, _ = scored
+        served_labels = (served_probabilities > inference.DECISION_THRESHOLD).astype(int)
+        metrics.incr("shadow.scored", len(labels))
+        metrics.incr("shadow.agreements", int(np.sum(labels == served_labels)))
+        for delta in np.abs(probabilities - served_probabilities):
+            metrics.observe("shadow.probability_delta", float(delta))
+
+    async def stop(self) -> None:
+        if self._shadow_tasks:
+            await asyncio.gather(*self._shadow_tasks, return_exceptions=True)
+
+    # --------------------------
+    # Configuration
+    # --------------------------
+    async def configure(self, config: RoutingConfig) -> RoutingConfig:
+        """
+        Load, warm and register the canary/shadow versions, then switch routing to ``config``.
+
+        The process inference pool is re-forked so its workers hold the new
+        versions before any request is routed to them.
+        """
+        async with swap_lock():
+            previous = self.config
+            wanted = {v for v in (config.canary_version, config.shadow_version) if v}
+            for version in wanted:
+                bundle = await asyncio.to_thread(registry.prepare, version, True)
+                await asyncio.to_thread(register_bundle, bundle)
+            if wanted:
+                await restart_inference_executor()
+
+            self.config = config
+            for version in {previous.canary_version, previous.shadow_version} - wanted - {None}:
+                registry.unpin(version)
+        print(f"Model routing: {self.describe()}")
+        return config
+
+    def describe(self) -> dict:
+        config = self.config
+        return {
+            "primary_version": registry.get().version if registry.ready else None,
+            "canary_version": config.canary_version,
+            "canary_percent": config.canary_percent,
+            "shadow_version": config.shadow_version,
+            "shadow_percent": config.shadow_percent,
+            "shadow_in_flight": len(self._shadow_tasks),
+        }
+
+
+model_router = ModelRouter()
+
+
+async def configure_from_env() -> None:
+    """Apply the CANARY_*/SHADOW_* settings (called once the primary model is loaded)."""
+    if not (CANARY_MODEL_VERSION or SHADOW_MODEL_VERSION):
+        return
+    await model_router.configure(RoutingConfig(
+        canary_version=CANARY_MODEL_VERSION,
+        canary_percent=CANARY_TRAFFIC_PERCENT,
+        shadow_version=SHADOW_MODEL_VERSION,
+        shadow_percent=SHADOW_TRAFFIC_PERCENT,
+    ))
@@ -0,0 +1,85 @@
+# src/utils/pagination.py
+import base64
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import tuple_
+from sqlmodel import Session
+
+
+# --------------------------
+# Keyset pagination for list endpoints
+# --------------------------
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 1000))
+
+
+@dataclass
+class PageParams:
+    limit: int
+    cursor: Optional[str]
+
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+) -> PageParams:
+    """Dependency: page size (capped at MAX_PAGE_SIZE) and the opaque cursor."""
+    return PageParams(limit=limit, cursor=cursor)
+
+
+def as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    ``value`` as naive UTC, the form the timestamp (without time zone)
+    columns store: aware values are converted to UTC, naive ones are taken
+    to be UTC already.
+    """
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return as_naive_utc(datetime.fromisoformat(created_at)), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def page_statement(statement, created_col, id_col, params: PageParams):
+    """The query paginate() runs for one page (one row more than the limit, to detect the last page)."""
+    if params.cursor:
+        after_created, after_id = decode_cursor(params.cursor)
+        statement = statement.where(tuple_(created_col, id_col) < tuple_(after_created, after_id))
+    return statement.order_by(created_col.desc(), id_col.desc()).limit(params.limit + 1)
+
+
+def paginate(session: Session, statement, created_col, id_col, params: PageParams) -> dict:
+    """
+    Run ``statement`` one page at a time, newest first.
+
+    Rows are ordered by (created_col, id_col) descending and the cursor is
+    the key of the last row returned, so each page is a single index range
+    scan on (created_col, id_col) regardless of how deep the client pages
+    (no OFFSET). Returns ``{"items", "next_cursor", "limit"}``;
+    ``next_cursor`` is None on the last page.
+    """
+    rows = session.exec(page_statement(statement, created_col, id_col, params)).all()
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return {"items": rows, "next_cursor": next_cursor, "limit": params.limit}
@@ -0,0 +1,190 @@
+# src/utils/partitions.py
+import asyncio
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from utils.metrics import metrics
+
+
+# --------------------------
+# Monthly partitions & retention
+# --------------------------
+# prediction, predictionmetadata and predictionlog are range-partitioned by
+# month on their timestamp (see the 5b0e7f3a9c12 migration). The three rows
+# of a prediction share one timestamp, so they land in the same month and
+# are purged together.
+PARTITIONED_TABLES: Dict[str, str] = {
+    "prediction": "created_at",
+    "predictionmetadata": "created_at",
+    "predictionlog": "timestamp",
+}
+
+# Months of history kept besides the current one (0 keeps everything)
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", 0))
+# drop | detach (detached partitions stay as plain tables, e.g. for archiving)
+PARTITION_RETENTION_ACTION = os.getenv("PARTITION_RETENTION_ACTION", "drop").lower()
+# Future months created ahead of time, so inserts never fall into the default partition
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", 3))
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", 3600))
+
+# Only one worker runs maintenance at a time
+_ADVISORY_LOCK_ID = 0x5041_5254
+
+_maintenance: Optional[asyncio.Task] = None
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_of(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def parse_partition(table: str, name: str) -> Optional[date]:
+    """Month of a partition named by partition_name(), None for any other child (e.g. the default one)."""
+    match = re.fullmatch(rf"{re.escape(table)}_(\d{{4}})_(\d{{2}})", name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def expired_months(months: List[date], now: datetime, retention_months: int) -> List[date]:
+    """Partition months that end before the retention window (current month plus ``retention_months``)."""
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_of(now), -retention_months)
+    return sorted(m for m in months if m < cutoff)
+
+
+# --------------------------
+# DDL
+# --------------------------
+def is_partitioned(conn, table: str) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t)"), {"t": table}
+    ).first() is not None
+
+
+def list_partitions(conn, table: str) -> List[str]:
+    return list(conn.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = to_regclass(:t)"),
+        {"t": table},
+    ).scalars())
+
+
+def create_partition(conn, table: str, month: date) -> None:
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+
+
+def create_default_partition(conn, table: str) -> None:
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'))
+
+
+def ensure_partitions(conn, first: date, last: date) -> List[str]:
+    """Create the default partition and one partition per month in [first, last] for every table."""
+    created = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(conn, table):
+            continue  # not migrated yet (alembic upgrade head)
+        existing = set(list_partitions(conn, table))
+        create_default_partition(conn, table)
+        month = first
+        while month <= last:
+            if partition_name(table, month) not in existing:
+                try:
+                    with conn.begin_nested():
+                        create_partition(conn, table, month)
+                    created.append(partition_name(table, month))
+                except Exception as e:
+                    # e.g. the default partition already holds rows for that month
+                    print(f"Could not create partition {partition_name(table, month)}: {e}")
+            month = add_months(month, 1)
+    return created
+
+
+def purge_partitions(conn, now: datetime, retention_months: int, action: str = "drop") -> List[str]:
+    """
+    Detach (and by default drop) the partitions older than the retention window.
+
+    Removing a month is a catalog operation on each table, however many
+    rows it holds, unlike a DELETE. Feedback rows are not partitioned and
+    outlive the predictions they point at.
+    """
+    purged = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(conn, table):
+            continue
+        months = {parse_partition(table, name): name for name in list_partitions(conn, table)}
+        months.pop(None, None)
+        for month in expired_months(list(months), now, retention_months):
+            name = months[month]
+            conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            if action == "drop":
+                conn.execute(text(f'DROP TABLE "{name}"'))
+            purged.append(name)
+    return purged
+
+
+def run_maintenance(engine, now: Optional[datetime] = None) -> Tuple[List[str], List[str]]:
+    """Create upcoming partitions and purge expired ones; returns (created, purged)."""
+    now = now or datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID}).scalar():
+            return [], []  # another worker is on it
+        current = month_of(now)
+        created = ensure_partitions(conn, current, add_months(current, PARTITION_PREMAKE_MONTHS))
+        purged = purge_partitions(conn, now, PARTITION_RETENTION_MONTHS, PARTITION_RETENTION_ACTION)
+
+    metrics.incr("partitions.created", len(created))
+    metrics.incr("partitions.purged", len(purged))
+    if created or purged:
+        print(f"Partition maintenance: created {created}, {PARTITION_RETENTION_ACTION} {purged}")
+    return created, purged
+
+
+# --------------------------
+# Background job
+# --------------------------
+async def _maintain(engine, interval: float) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(run_maintenance, engine)
+        except Exception as e:
+            metrics.incr("partitions.maintenance_failures")
+            print(f"Partition maintenance failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_partition_maintenance(engine) -> Optional[asyncio.Task]:
+    """Run partition maintenance now and every PARTITION_MAINTENANCE_INTERVAL_SECONDS (called from the lifespan)."""
+    global _maintenance
+    if PARTITION_MAINTENANCE_INTERVAL_SECONDS <= 0 or _maintenance is not None:
+        return _maintenance
+    _maintenance = asyncio.create_task(
+        _maintain(engine, PARTITION_MAINTENANCE_INTERVAL_SECONDS), name="partition-maintenance"
+    )
+    return _maintenance
+
+
+async def stop_partition_maintenance() -> None:
+    global _maintenance
+    if _maintenance is None:
+        return
+    _maintenance.cancel()
+    try:
+        await _maintenance
+    except asyncio.CancelledError:
+        pass
+    _maintenance = None
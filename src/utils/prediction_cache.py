@@ -0,0 +1,118 @@
+# src/utils/prediction_cache.py
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from schemas.churn_input import ChurnInput
+from utils.lru import LRUCache
+from utils.metrics import metrics
+
+
+# --------------------------
+# Prediction cache configuration (opt-in)
+# --------------------------
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", 10000))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 3600))
+
+
+def canonical_key(data: ChurnInput, model_name: str, model_version) -> str:
+    """
+    Stable cache key for ``data`` scored by ``model_name`` v``model_version``.
+
+    Fields are serialized in sorted order with floats normalized (-0.0 and
+    0.0, 1 and 1.0 hash the same), so equal inputs always produce the same
+    key regardless of field order in the request body.
+    """
+    canonical = {}
+    for name, value in sorted(data.model_dump().items()):
+        if isinstance(value, float):
+            value = repr(value + 0.0)
+        canonical[name] = value
+    digest = hashlib.blake2b(
+        json.dumps(canonical, separators=(",", ":")).encode(), digest_size=16
+    ).hexdigest()
+    return f"{model_name}:{model_version}:{digest}"
+
+
+# --------------------------
+# Shared backends
+# --------------------------
+class MemorySharedBackend:
+    """
+    In-process implementation of the shared store interface (async
+    ``get(key)`` / ``set(key, value, ttl)`` on JSON strings). A store
+    shared by all workers plugs into PredictionCache(shared=...) the same way.
+    """
+
+    def __init__(self):
+        self._store: Dict[str, Tuple[float, str]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._store.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._store.pop(key, None)
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._store[key] = (time.monotonic() + ttl, value)
+
+
+class PredictionCache:
+    """
+    Cache of prediction results keyed by canonical_key().
+
+    Lookups go to the in-process LRU first, then to the optional shared
+    store (a shared hit is copied into the LRU). Because the model version
+    is part of the key, entries from a replaced model are never served;
+    ``clear()`` is also called on every model swap to free them.
+    Errors from the shared store count as misses and never fail a request.
+    """
+
+    def __init__(self, local: Optional[LRUCache] = None, shared=None, ttl: float = PREDICTION_CACHE_TTL_SECONDS):
+        self.local = local or LRUCache(max_entries=PREDICTION_CACHE_MAX_ENTRIES, ttl=ttl)
+        self.shared = shared
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            try:
+                raw = await self.shared.get(key)
+            except Exception as e:
+                metrics.incr("prediction_cache.shared_errors")
+                print(f"Prediction cache shared store unavailable: {e}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value)
+                metrics.incr("prediction_cache.shared_hits")
+
+        metrics.incr("prediction_cache.hits" if value is not None else "prediction_cache.misses")
+        return value
+
+    async def set(self, key: str, value: dict) -> None:
+        self.local.set(key, value)
+        metrics.set_gauge("prediction_cache.size", len(self.local))
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, json.dumps(value), self.ttl)
+            except Exception as e:
+                metrics.incr("prediction_cache.shared_errors")
+                print(f"Prediction cache shared store unavailable: {e}")
+
+    def clear(self) -> None:
+        self.local.clear()
+        metrics.set_gauge("prediction_cache.size", 0)
+
+
+prediction_cache: Optional[PredictionCache] = PredictionCache() if PREDICTION_CACHE_ENABLED else None
+
+
+def invalidate() -> None:
+    """Drop cached results (called when the served model changes)."""
+    if prediction_cache is not None:
+        prediction_cache.clear()
@@ -0,0 +1,213 @@
+# src/utils/preprocessing.py
+from operator import attrgetter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from schemas.churn_input import ChurnInput
+
+
+# --------------------------
+# Feature definitions (must match the training pipeline)
+# --------------------------
+CALL_FEATURES = ["InboundCalls", "OutboundCalls"]
+BINARY_FEATURES = ["RespondsToMailOffers", "MadeCallToRetentionTeam"]
+BINARY_MAPPING = {"Yes": 1.0, "No": 0.0}
+LOW_CARD_FEATURES = ["CreditRating", "IncomeGroup", "Occupation", "PrizmCode"]
+
+# Raw numeric inputs as declared on ChurnInput, in declaration order
+RAW_NUMERIC_FEATURES = [
+    name for name, field in ChurnInput.model_fields.items()
+    if field.annotation in (int, float)
+]
+INT_FEATURES = {name for name, field in ChurnInput.model_fields.items() if field.annotation is int}
+CATEGORICAL_FEATURES = BINARY_FEATURES + LOW_CARD_FEATURES
+
+# Numeric features after feature engineering (InboundCalls + OutboundCalls -> TotalCalls)
+NUMERIC_FEATURES = [f for f in RAW_NUMERIC_FEATURES if f not in CALL_FEATURES] + ["TotalCalls"]
+
+PREPROCESSING_PARAMS_ARTIFACT = "preprocessing_params.json"
+
+
+class ChurnPreprocessor:
+    """
+    Feature pipeline fitted once from the training artifacts.
+
+    Reproduces the training transformations (TotalCalls, median/mode
+    imputation, Yes/No encoding, one-hot encoding with drop_first,
+    standard scaling) with precomputed column indices, so incoming
+    ChurnInput objects are turned straight into a model-ready NumPy
+    matrix aligned with ``train_columns``.
+    """
+
+    def __init__(
+        self,
+        train_columns: Sequence[str],
+        numeric_medians: Optional[Dict[str, float]] = None,
+        categorical_modes: Optional[Dict[str, str]] = None,
+        scaler_columns: Optional[Sequence[str]] = None,
+        scaler_mean: Optional[Sequence[float]] = None,
+        scaler_scale: Optional[Sequence[float]] = None,
+    ):
+        self.columns: List[str] = list(train_columns)
+        self.numeric_medians = dict(numeric_medians or {})
+        self.categorical_modes = dict(categorical_modes or {})
+        self.scaler_columns = list(scaler_columns or [])
+        self.fitted = bool(self.scaler_columns)
+
+        index = {col: i for i, col in enumerate(self.columns)}
+
+        # Numeric features present in the training matrix
+        self._numeric = [(f, index[f]) for f in NUMERIC_FEATURES if f in index]
+        self._numeric_medians = np.array(
+            [self.numeric_medians.get(f, 0.0) for f, _ in self._numeric], dtype=np.float64
+        )
+        self._numeric_idx = np.array([i for _, i in self._numeric], dtype=np.intp)
+
+        # Binary Yes/No features present in the training matrix
+        self._binary = {f: index[f] for f in BINARY_FEATURES if f in index}
+
+        # One-hot columns: feature -> {category: column index}. The first
+        # category was dropped at training time and maps to all zeros.
+        self._onehot: Dict[str, Dict[str, int]] = {}
+        for feature in LOW_CARD_FEATURES:
+            prefix = f"{feature}_"
+            self._onehot[feature] = {
+                col[len(prefix):]: i for col, i in index.items() if col.startswith(prefix)
+            }
+
+        self._get_raw_numeric = attrgetter(*RAW_NUMERIC_FEATURES)
+        self._get_categorical = attrgetter(*CATEGORICAL_FEATURES)
+        self._inbound = RAW_NUMERIC_FEATURES.index("InboundCalls")
+        self._outbound = RAW_NUMERIC_FEATURES.index("OutboundCalls")
+        self._raw_positions = [
+            RAW_NUMERIC_FEATURES.index(f) for f, _ in self._numeric if f != "TotalCalls"
+        ]
+
+        # Scaling vectors over the full matrix; unscaled columns use (0, 1)
+        self._mean = np.zeros(len(self.columns), dtype=np.float64)
+        self._scale = np.ones(len(self.columns), dtype=np.float64)
+        for col, mean, scale in zip(self.scaler_columns, scaler_mean or [], scaler_scale or []):
+            if col in index:
+                self._mean[index[col]] = mean
+                self._scale[index[col]] = scale if scale else 1.0
+
+    # --------------------------
+    # Inference
+    # --------------------------
+    def transform(self, data: ChurnInput) -> np.ndarray:
+        """Transform a single input into a (1, n_features) matrix."""
+        return self.transform_many([data])
+
+    def transform_many(self, inputs: Sequence[ChurnInput]) -> np.ndarray:
+        """Transform a batch of inputs into a (n_rows, n_features) matrix."""
+        n_rows = len(inputs)
+        X = np.zeros((n_rows, len(self.columns)), dtype=np.float64)
+        if n_rows == 0:
+            return X
+
+        # Numeric features (+ TotalCalls), median-imputed
+        raw = np.array([self._get_raw_numeric(r) for r in inputs], dtype=np.float64).reshape(n_rows, -1)
+        numeric = raw[:, self._raw_positions]
+        if self._numeric and self._numeric[-1][0] == "TotalCalls":
+            total_calls = raw[:, self._inbound] + raw[:, self._outbound]
+            numeric = np.column_stack([numeric, total_calls])
+        missing = np.isnan(numeric)
+        if missing.any():
+            numeric = np.where(missing, self._numeric_medians, numeric)
+        X[:, self._numeric_idx] = numeric
+
+        # Categorical features, mode-imputed
+        categorical = [self._get_categorical(r) for r in inputs]
+        for pos, feature in enumerate(CATEGORICAL_FEATURES):
+            mode = self.categorical_modes.get(feature)
+            if feature in BINARY_FEATURES:
+                idx = self._binary.get(feature)
+                if idx is None:
+                    continue
+                default = BINARY_MAPPING.get(mode, 0.0)
+                X[:, idx] = [BINARY_MAPPING.get(row[pos], default) for row in categorical]
+            else:
+                mapping = self._onehot[feature]
+                if not mapping:
+                    continue
+                for row_idx, row in enumerate(categorical):
+                    col = mapping.get(row[pos] or mode)
+                    if col is not None:
+                        X[row_idx, col] = 1.0
+
+        # Standard scaling with the training statistics
+        X -= self._mean
+        X /= self._scale
+        return X
+
+    # --------------------------
+    # Fitting & (de)serialization
+    # --------------------------
+    @classmethod
+    def fit(cls, frame, train_columns: Sequence[str], scale_columns: Optional[Sequence[str]] = None):
+        """
+        Fit the pipeline on the raw training frame (one column per ChurnInput field).
+
+        ``scale_columns`` defaults to the engineered numeric features.
+        """
+        frame = frame.copy()
+        frame["TotalCalls"] = frame["InboundCalls"] + frame["OutboundCalls"]
+
+        # Integer fields are imputed with a whole number: the filled rows are
+        # validated as ChurnInput below, and an even row count can put the
+        # median halfway between two counts
+        def median(f):
+            value = float(frame[f].median())
+            return float(round(value)) if f in INT_FEATURES else value
+
+        numeric_medians = {f: median(f) for f in NUMERIC_FEATURES if f in frame}
+        categorical_modes = {f: str(frame[f].mode().iloc[0]) for f in CATEGORICAL_FEATURES if f in frame}
+
+        frame = frame.fillna({**numeric_medians, **categorical_modes})
+        for f in CALL_FEATURES:
+            frame[f] = frame[f].fillna(median(f))
+
+        unscaled = cls(train_columns, numeric_medians, categorical_modes)
+        records = [ChurnInput(**row) for row in frame[list(ChurnInput.model_fields)].to_dict("records")]
+        X = unscaled.transform_many(records)
+
+        if scale_columns is None:
+            scale_columns = [f for f in NUMERIC_FEATURES if f in unscaled.columns]
+        positions = [unscaled.columns.index(c) for c in scale_columns]
+        mean = X[:, positions].mean(axis=0)
+        scale = X[:, positions].std(axis=0)
+        scale[scale == 0] = 1.0
+
+        return cls(
+            train_columns,
+            numeric_medians,
+            categorical_modes,
+            scaler_columns=list(scale_columns),
+            scaler_mean=mean.tolist(),
+            scaler_scale=scale.tolist(),
+        )
+
+    def to_dict(self) -> dict:
+        positions = [self.columns.index(c) for c in self.scaler_columns]
+        return {
+            "numeric_medians": self.numeric_medians,
+            "categorical_modes": self.categorical_modes,
+            "scaler": {
+                "columns": self.scaler_columns,
+                "mean": self._mean[positions].tolist(),
+                "scale": self._scale[positions].tolist(),
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, train_columns: Sequence[str], params: dict):
+        scaler = params.get("scaler", {})
+        return cls(
+            train_columns,
+            numeric_medians=params.get("numeric_medians"),
+            categorical_modes=params.get("categorical_modes"),
+            scaler_columns=scaler.get("columns"),
+            scaler_mean=scaler.get("mean"),
+            scaler_scale=scaler.get("scale"),
+        )
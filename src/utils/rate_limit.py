@@ -0,0 +1,121 @@
+# src/utils/rate_limit.py
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+
+from utils.metrics import metrics
+from utils.lru import LRUCache
+
+
+# --------------------------
+# Rate limit configuration
+# --------------------------
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Path prefixes the limits apply to (comma separated)
+RATE_LIMIT_PATHS = [p.strip() for p in os.getenv("RATE_LIMIT_PATHS", "/predict").split(",") if p.strip()]
+# Requests per minute per user (bearer token) or API key without its own
+# rate_limit_per_minute, and per client IP for unauthenticated requests; 0 disables.
+# Enforced per worker process (MemoryRateLimitBackend): the effective limit of
+# a deployment is this rate times the number of workers serving the caller
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", 600))
+RATE_LIMIT_ANONYMOUS_PER_MINUTE = float(os.getenv("RATE_LIMIT_ANONYMOUS_PER_MINUTE", 60))
+# Bursts of up to this many seconds' worth of requests go through at once
+RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", 10))
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", 100000))
+
+# Admission control (per worker): requests beyond RATE_LIMIT_MAX_CONCURRENT
+# wait up to RATE_LIMIT_QUEUE_TIMEOUT_SECONDS for a slot, then get a 503
+RATE_LIMIT_MAX_CONCURRENT = int(os.getenv("RATE_LIMIT_MAX_CONCURRENT", 64))
+RATE_LIMIT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("RATE_LIMIT_QUEUE_TIMEOUT_SECONDS", 2))
+
+
+# --------------------------
+# Token bucket
+# --------------------------
+class TokenBucket:
+    """
+    ``rate`` tokens per second refill a bucket of ``capacity`` tokens; each
+    request takes one. Thread-safe, in-process state only.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, now: Optional[float] = None) -> float:
+        """Take a token; returns 0 when allowed, else the seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+def bucket_capacity(per_minute: float) -> float:
+    return max(1.0, per_minute / 60 * RATE_LIMIT_BURST_SECONDS)
+
+
+# --------------------------
+# Backends
+# --------------------------
+class MemoryRateLimitBackend:
+    """
+    Token buckets in this process, so each worker allows the full rate.
+
+    RateLimitMiddleware takes any object with the same async ``take(key,
+    rate, capacity)`` as its ``backend``, e.g. one keeping the buckets in a
+    store shared by all workers.
+    """
+
+    def __init__(self, max_entries: int = RATE_LIMIT_MAX_BUCKETS):
+        self._buckets = LRUCache(max_entries=max_entries, ttl=0)
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.rate != rate or bucket.capacity != capacity:
+            bucket = TokenBucket(rate, capacity)
+        wait = bucket.take()
+        # An idle bucket is full again after capacity / rate seconds, so
+        # forgetting it then changes nothing
+        self._buckets.set(key, bucket, ttl=capacity / rate)
+        return wait
+
+
+# --------------------------
+# Admission control
+# --------------------------
+class ConcurrencyLimiter:
+    """At most ``limit`` requests in flight; the rest queue for up to ``queue_timeout`` seconds."""
+
+    def __init__(self, limit: int = RATE_LIMIT_MAX_CONCURRENT,
+                 queue_timeout: float = RATE_LIMIT_QUEUE_TIMEOUT_SECONDS):
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; False when none freed up within the queue timeout."""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            metrics.observe("rate_limit.queue_wait_ms", (time.perf_counter() - start) * 1000)
+        self.in_flight += 1
+        metrics.set_gauge("rate_limit.in_flight", self.in_flight)
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        metrics.set_gauge("rate_limit.in_flight", self.in_flight)
+        self._semaphore.release()
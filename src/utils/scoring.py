@@ -0,0 +1,93 @@
+# src/utils/scoring.py
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from schemas.churn_input import ChurnInput
+from utils import batching
+from utils.audit_writer import AuditRecord, persist_async, resolve_model_id_async
+from utils.metrics import StageTimer
+from utils.ml_utils import ModelBundle
+from utils.model_router import model_router
+from utils.prediction_cache import canonical_key, prediction_cache
+
+
+# --------------------------
+# Single-customer scoring (POST /predict)
+# --------------------------
+async def score_one(
+    data: ChurnInput,
+    bundle: ModelBundle,
+    session: AsyncSession,
+    user_id: int,
+    timer: StageTimer,
+    request_ip: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> dict:
+    """
+    Score ``data`` with ``bundle`` and persist the prediction for ``user_id``.
+
+    With PREDICTION_CACHE_ENABLED, identical input on the same model version
+    reuses the cached label and probability (no preprocessing or
+    inference). Only that model output is cached: every request is still
+    persisted, so each caller gets its own prediction_id and audit rows.
+
+    Returns ``churn_prediction``, ``churn_probability``, ``prediction_id`` and ``cached``.
+    """
+    cache_key = None
+    cached = None
+    if prediction_cache is not None:
+        with timer.stage("cache"):
+            cache_key = canonical_key(data, bundle.name, bundle.version)
+            cached = await prediction_cache.get(cache_key)
+
+    if cached is not None:
+        prediction_val = int(cached["churn_prediction"])
+        probability_val = float(cached["churn_probability"])
+    else:
+        # Feature engineering, encoding & scaling (fitted once at startup,
+        # see utils/preprocessing.py)
+        with timer.stage("preprocess"):
+            features = bundle.preprocessor.transform(data)
+
+        # Single predict_proba pass, micro-batched with concurrent requests
+        with timer.stage("inference"):
+            labels, probabilities = await batching.predict(features, bundle.version)
+        prediction_val = int(labels[0])
+        probability_val = float(probabilities[0])
+
+        # Candidate model comparison, scored in the background
+        model_router.shadow([data], bundle, probabilities)
+
+        if cache_key is not None:
+            await prediction_cache.set(cache_key, {
+                "churn_prediction": prediction_val,
+                "churn_probability": probability_val,
+            })
+
+    # Prediction, PredictionMetadata and PredictionLog in one transaction
+    # (or handed to the background writer)
+    with timer.stage("persist"):
+        model_id = await resolve_model_id_async(session, bundle.name, bundle.version)
+        if model_id is None:
+            raise HTTPException(status_code=500, detail="ML model record not found in DB")
+
+        prediction_ids = await persist_async(session, [
+            AuditRecord(
+                user_id=user_id,
+                input_features=data.model_dump(),
+                prediction=prediction_val,
+                probability=probability_val,
+                model_id=model_id,
+                request_ip=request_ip,
+                user_agent=user_agent,
+            )
+        ])
+
+    return {
+        "churn_prediction": prediction_val,
+        "churn_probability": probability_val,
+        "prediction_id": prediction_ids[0],
+        "cached": cached is not None,
+    }
@@ -0,0 +1,60 @@
+"""
+Requests per second through RequestIDMiddleware and through the previous
+BaseHTTPMiddleware implementation, on a bare ASGI endpoint.
+
+Not collected by pytest (wall-clock numbers vary with the machine); run with
+    python tests/bench_request_id_middleware.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+import structlog
+from starlette.middleware.base import BaseHTTPMiddleware
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from controllers.middleware.middleware import RequestIDMiddleware  # noqa: E402
+
+
+class BaseHTTPRequestIDMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, kept as the benchmark baseline."""
+
+    async def dispatch(self, request, call_next):
+        request_id = request.headers.get("X-Request-ID") or "fixed"
+        request.state.request_id = request_id
+        with structlog.contextvars.bound_contextvars(request_id=request_id):
+            response = await call_next(request)
+            response.headers["X-Request-ID"] = request_id
+            return response
+
+
+async def _endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _requests_per_second(app, requests: int = 2000) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(requests):
+            scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b"",
+                     "http_version": "1.1", "scheme": "http", "server": ("test", 80), "client": None,
+                     "root_path": ""}
+            await app(scope, receive, send)
+        return requests / (time.perf_counter() - start)
+
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    new = _requests_per_second(RequestIDMiddleware(_endpoint, log_requests=False))
+    old = _requests_per_second(BaseHTTPRequestIDMiddleware(_endpoint))
+    print(f"RequestIDMiddleware: {new:.0f} req/s, BaseHTTPMiddleware version: {old:.0f} req/s")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The application imports its packages relative to src/ (e.g. ``from models.model import ...``)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
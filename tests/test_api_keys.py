@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from auth import api_keys
+from models.model import ApiKey, User
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[User.__table__, ApiKey.__table__])
+    with Session(engine) as session:
+        session.add(User(id=1, username="scheduler", email="scheduler@example.com", hashed_password="x"))
+        session.commit()
+        yield session
+    api_keys.invalidate()
+
+
+def add_key(session, **fields):
+    key, key_id, key_hash = api_keys.generate_key()
+    session.add(ApiKey(key_id=key_id, key_hash=key_hash, name="batch", user_id=1, **fields))
+    session.commit()
+    return key
+
+
+def test_authenticate_matches_the_hashed_secret(session):
+    key = add_key(session, scopes=["predict"])
+    assert api_keys.peek(key) is None  # not in the index until authenticated once
+    entry = api_keys.authenticate(key, session)
+    assert api_keys.peek(key) is entry
+    assert entry.user.username == "scheduler" and entry.scopes == {"predict"}
+
+    key_id = api_keys.parse_key(key)[0]
+    assert api_keys.authenticate(f"mlk_{key_id}_wrong", session) is None
+    assert api_keys.authenticate("mlk_0000000000000000_secret", session) is None
+    assert api_keys.authenticate("not-a-key", session) is None
+
+    expired = add_key(session, expires_at=datetime.now(timezone.utc) - timedelta(minutes=1))
+    assert api_keys.authenticate(expired, session) is None
+
+
+def test_revoked_keys_are_refused_once_invalidated(session):
+    key = add_key(session)
+    assert api_keys.authenticate(key, session) is not None
+
+    api_key = session.get(ApiKey, 1)
+    api_key.revoked_at = datetime.now(timezone.utc)
+    session.add(api_key)
+    session.commit()
+    api_keys.invalidate(api_key.key_id)
+    assert api_keys.authenticate(key, session) is None
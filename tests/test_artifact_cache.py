@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from utils.artifact_cache import MODEL_FILE, ArtifactCache
+
+PARAMS = {"numeric_medians": {}, "categorical_modes": {}, "scaler": {"columns": [], "mean": [], "scale": []}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArtifactCache(str(tmp_path))
+
+
+def put(cache, version="1", run_id="run", preprocess_run_id="prep", model=None):
+    return cache.put("churn", version, run_id, model or {"trees": [1, 2, 3]}, ["a", "b"],
+                     preprocessing_params=PARAMS, preprocess_run_id=preprocess_run_id)
+
+
+def test_round_trip_keyed_by_preprocess_run(cache):
+    put(cache, preprocess_run_id="prep-1", model={"fitted": 1})
+
+    entry = cache.get("churn", "1", "run", "prep-1")
+    assert entry.model == {"fitted": 1} and entry.train_columns == ["a", "b"]
+    assert entry.preprocessing_params == PARAMS and entry.preprocess_run_id == "prep-1"
+
+    # A new preprocessing run is a cache miss, not the parameters of the old one
+    assert cache.get("churn", "1", "run", "prep-2") is None
+    put(cache, preprocess_run_id="prep-2", model={"fitted": 2})
+    assert cache.get("churn", "1", "run", "prep-2").model == {"fitted": 2}
+    assert cache.get("churn", "1", "run", "prep-1").model == {"fitted": 1}
+
+
+def test_checksum_mismatch_discards_the_entry(cache):
+    path = put(cache)
+    with open(os.path.join(path, MODEL_FILE), "ab") as f:
+        f.write(b"bit rot")
+
+    assert cache.get("churn", "1", "run", "prep") is None
+    assert not os.path.exists(path)
+
+
+def test_partial_entries_are_ignored(cache, monkeypatch):
+    put(cache, version="1")
+
+    # A write interrupted before the rename leaves only a hidden temp directory
+    def fail_dump(model, path):
+        open(path, "wb").close()
+        raise OSError("disk full")
+
+    monkeypatch.setattr("utils.artifact_cache.joblib.dump", fail_dump)
+    with pytest.raises(OSError):
+        put(cache, version="2")
+    monkeypatch.undo()
+    assert os.listdir(os.path.join(cache.root, "churn", "2")) == []
+
+    # A crashed writer's leftovers and an entry without a manifest are skipped
+    os.makedirs(os.path.join(cache.root, "churn", "3", ".tmp-crashed"))
+    os.makedirs(os.path.join(cache.root, "churn", "4", "run_prep"))
+
+    assert cache.get("churn", "4", "run", "prep") is None
+    assert cache.latest("churn").version == "1"
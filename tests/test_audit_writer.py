@@ -0,0 +1,193 @@
+import asyncio
+import itertools
+import os
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from utils import audit_writer
+from utils.audit_writer import AuditRecord, AuditWriter, IdAllocator
+from utils.metrics import metrics
+from utils.partitions import add_months, ensure_partitions, month_of
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class FakeSequence:
+    """Stands in for the engine: answers nextval() from an in-memory sequence."""
+
+    def __init__(self):
+        self._next = itertools.count(1)
+        self.reservations = []
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params):
+        assert "nextval('prediction_id_seq')" in str(statement)
+        self._ids = [next(self._next) for _ in range(params["n"])]
+        self.reservations.append(params["n"])
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._ids
+
+    def commit(self):
+        pass
+
+
+def record(i=0):
+    return AuditRecord(user_id=1, input_features={"i": i}, prediction=0, probability=0.1, model_id=1)
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Batches passed to write_records by the writer."""
+    batches = []
+    lock = threading.Lock()
+
+    def fake_write(session, records, commit=True):
+        with lock:
+            batches.append(list(records))
+        return [r.prediction_id for r in records]
+
+    monkeypatch.setattr(audit_writer, "write_records", fake_write)
+    return batches
+
+
+def make_writer(**kwargs):
+    writer = AuditWriter(create_engine("sqlite://"), **kwargs)
+    writer.ids = IdAllocator(FakeSequence(), block_size=4)
+    return writer
+
+
+def test_id_allocator_reserves_blocks():
+    sequence = FakeSequence()
+    ids = IdAllocator(sequence, block_size=4)
+
+    assert ids.take() == [1]
+    assert ids.take(2) == [2, 3]
+    assert ids.available == 1
+    assert sequence.reservations == [4]
+
+    # Not enough left: one round trip reserves the request or a block, whichever is larger
+    assert ids.take(3) == [4, 5, 6]
+    assert ids.take(6) == [7, 8, 9, 10, 11, 12]
+    assert sequence.reservations == [4, 4, 6]
+
+
+def test_buffered_flush_and_stop_drains_queue(written):
+    writer = make_writer(flush_interval=0.05, batch_size=2)
+    ids = writer.submit([record(i) for i in range(5)])
+    assert ids == [1, 2, 3, 4, 5]
+    assert written == []  # nothing written on the request path
+
+    writer.start()
+    writer.stop()
+
+    assert [len(batch) for batch in written] == [2, 2, 1]
+    assert [r.prediction_id for batch in written for r in batch] == ids
+    assert writer._queue.empty()
+
+
+def test_queue_overflow_is_written_by_the_caller(written):
+    metrics.reset()
+    writer = make_writer(max_queue=2)
+
+    ids = writer.submit([record(i) for i in range(3)])
+
+    assert len(written) == 1 and [r.prediction_id for r in written[0]] == [ids[2]]
+    assert writer._queue.qsize() == 2
+    assert metrics.snapshot()["counters"]["audit.queue_full"] == 1
+
+
+def test_submit_async_keeps_db_round_trips_off_the_loop(monkeypatch):
+    threads = []
+
+    def fake_write(session, records, commit=True):
+        threads.append(("write", threading.current_thread()))
+
+    monkeypatch.setattr(audit_writer, "write_records", fake_write)
+    writer = make_writer(max_queue=3)
+    reserve = writer.ids._reserve
+
+    def tracked_reserve(n):
+        threads.append(("reserve", threading.current_thread()))
+        return reserve(n)
+
+    monkeypatch.setattr(writer.ids, "_reserve", tracked_reserve)
+
+    async def scenario():
+        loop_thread = threading.current_thread()
+        first = await writer.submit_async([record(0)])  # reserves a block
+        second = await writer.submit_async([record(1), record(2)])  # reserved ids, queue fits
+        third = await writer.submit_async([record(3)])  # reserved id, queue full
+        return loop_thread, first + second + third
+
+    loop_thread, ids = asyncio.run(scenario())
+
+    assert ids == [1, 2, 3, 4]
+    assert [kind for kind, _ in threads] == ["reserve", "write"]
+    assert all(thread is not loop_thread for _, thread in threads)
+
+
+def test_records_are_stamped_in_naive_utc():
+    created_at = record().created_at
+    assert created_at.tzinfo is None
+    assert abs(datetime.now(timezone.utc).replace(tzinfo=None) - created_at).total_seconds() < 5
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+def test_persist_async_writes_through_asyncpg(monkeypatch):
+    from models.model import MLModel, Prediction, PredictionLog, PredictionMetadata, User
+
+    schema = "audit_writer_test"
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={schema}"})
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        current = month_of(datetime.now(timezone.utc))
+        ensure_partitions(conn, current, add_months(current, 1))
+        conn.execute(text("""INSERT INTO "user" (id, username, email, hashed_password, role, created_at)
+                             VALUES (1, 'u1', 'u1@example.com', 'x', 'USER', now())"""))
+        conn.execute(text("INSERT INTO mlmodel (id, name, version, created_at) VALUES (1, 'churn', '1', now())"))
+
+    monkeypatch.setattr(audit_writer, "audit_writer", None)
+    async_url = make_url(TEST_DATABASE_URL).set(drivername="postgresql+asyncpg")
+    async_engine = create_async_engine(async_url, connect_args={"server_settings": {"search_path": schema}})
+
+    async def scenario():
+        async with AsyncSession(async_engine) as session:
+            ids = await audit_writer.persist_async(session, [record(0), record(1)])
+            rows = [
+                (await session.execute(select(column))).scalars().all()
+                for column in (Prediction.id, PredictionMetadata.prediction_id, PredictionLog.prediction_id)
+            ]
+        await async_engine.dispose()
+        return ids, rows
+
+    try:
+        ids, rows = asyncio.run(scenario())
+        assert len(ids) == 2
+        assert all(sorted(found) == sorted(ids) for found in rows)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        engine.dispose()
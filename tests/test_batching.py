@@ -0,0 +1,80 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from utils import batching
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Run score_fn inline and record each batch it receives."""
+    recorded = []
+
+    async def run_inline(fn, X, version):
+        recorded.append((X.copy(), version))
+        return fn(X, version)
+
+    monkeypatch.setattr(batching, "run_inference", run_inline)
+    return recorded
+
+
+def first_column(X, version):
+    return (X[:, 0] > 0).astype(int), X[:, 0]
+
+
+def test_concurrent_requests_share_one_batch(calls):
+    async def scenario():
+        batcher = batching.MicroBatcher(max_batch_size=64, window_ms=50, score_fn=first_column)
+        batcher.start()
+        try:
+            requests = [np.array([[1.0]]), np.array([[-2.0], [3.0]]), np.array([[4.0]])]
+            return await asyncio.gather(*(batcher.submit(X, "1") for X in requests))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    np.testing.assert_array_equal(calls[0][0][:, 0], [1.0, -2.0, 3.0, 4.0])
+    assert [probabilities.tolist() for _, probabilities in results] == [[1.0], [-2.0, 3.0], [4.0]]
+    assert [labels.tolist() for labels, _ in results] == [[1], [0, 1], [1]]
+
+
+def test_versions_are_scored_separately(calls):
+    async def scenario():
+        batcher = batching.MicroBatcher(max_batch_size=64, window_ms=50, score_fn=first_column)
+        batcher.start()
+        try:
+            return await asyncio.gather(
+                batcher.submit(np.array([[1.0]]), "1"),
+                batcher.submit(np.array([[2.0]]), "2"),
+            )
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+
+    assert sorted(version for _, version in calls) == ["1", "2"]
+    assert [probabilities.tolist() for _, probabilities in results] == [[1.0], [2.0]]
+
+
+def test_error_fans_out_to_every_request(calls):
+    def fail(X, version):
+        raise RuntimeError("model exploded")
+
+    async def scenario():
+        batcher = batching.MicroBatcher(max_batch_size=64, window_ms=50, score_fn=fail)
+        batcher.start()
+        try:
+            return await asyncio.gather(
+                *(batcher.submit(np.array([[float(i)]]), "1") for i in range(3)),
+                return_exceptions=True,
+            )
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(isinstance(r, RuntimeError) and str(r) == "model exploded" for r in results)
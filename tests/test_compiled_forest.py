@@ -0,0 +1,60 @@
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from utils.compiled_forest import CompiledForest, compile_and_verify
+
+
+def make_data(n=400, n_features=12, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n, n_features))
+    X[:, 3] = rng.integers(0, 4, n)  # discrete column, many rows equal to split values
+    y = ((X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(0, 0.5, n)) > 0).astype(int)
+    return X, y
+
+
+def test_matches_sklearn_bit_for_bit():
+    X, y = make_data()
+    X_test, _ = make_data(n=1000, seed=1)
+    for model in (
+        RandomForestClassifier(n_estimators=30, random_state=0),
+        RandomForestClassifier(n_estimators=10, max_depth=4, min_samples_leaf=5, random_state=1),
+        ExtraTreesClassifier(n_estimators=15, random_state=2),
+    ):
+        model.fit(X, y)
+        compiled = CompiledForest.from_sklearn(model)
+
+        assert np.array_equal(compiled.predict_proba(X_test), model.predict_proba(X_test))
+        assert np.array_equal(compiled.predict_proba(X_test[:1]), model.predict_proba(X_test[:1]))
+        assert np.array_equal(compiled.predict(X_test), model.predict(X_test))
+
+
+def test_rows_on_split_thresholds_and_verification():
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    compiled = compile_and_verify(model)
+
+    # Rows whose values sit exactly on split thresholds go left, as in sklearn
+    internal = np.flatnonzero(compiled.left >= 0)
+    rows = np.zeros((len(internal), X.shape[1]), dtype=np.float32)
+    rows[np.arange(len(internal)), compiled.feature[internal]] = compiled.threshold[internal]
+    assert np.array_equal(compiled.predict_proba(rows), model.predict_proba(rows))
+
+
+def test_missing_values_follow_sklearn():
+    X, y = make_data()
+    rng = np.random.default_rng(3)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    X_test, _ = make_data(n=500, seed=4)
+    X_test[rng.random(X_test.shape) < 0.2] = np.nan
+
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    compiled = CompiledForest.from_sklearn(model)
+    assert np.array_equal(compiled.predict_proba(X_test), model.predict_proba(X_test))
+
+
+def test_large_batches_delegate_to_sklearn():
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    compiled = CompiledForest.from_sklearn(model, max_rows=16)
+    assert np.array_equal(compiled.predict_proba(X[:16]), model.predict_proba(X[:16]))
+    assert np.array_equal(compiled.predict_proba(X), model.predict_proba(X))
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from db.pool import TimedQueuePool, dispose_engines, pool_stats, register_engine
+from utils.metrics import metrics
+
+
+def test_pool_wait_timeouts_and_stats(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    register_engine("test", engine)
+    metrics.reset()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert pool_stats()["test"]["checked_out"] == 1
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["db.test.pool_timeouts"] == 1
+    assert snapshot["summaries"]["db.test.pool_wait_ms"]["count"] == 2
+
+    engine.dispose()  # a fresh pool keeps reporting under the same name
+    assert engine.pool.metrics_name == "test"
+
+
+def test_post_fork_disposes_registered_engines(tmp_path):
+    import gunicorn_conf
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'fork.db'}", poolclass=TimedQueuePool, pool_size=1)
+    register_engine("forked", engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    inherited = engine.pool
+    assert inherited.checkedin() == 1
+
+    gunicorn_conf.post_fork(server=None, worker=None)
+
+    assert engine.pool is not inherited
+    assert engine.pool.checkedin() == 0
+    assert engine.pool.metrics_name == "forked"
+
+
+def test_first_engine_keeps_its_name(tmp_path):
+    # db/database.py runs twice (as db.database and src.db.database); the
+    # metrics must describe the first engines, which the routes use
+    first = create_engine(f"sqlite:///{tmp_path / 'a.db'}", poolclass=TimedQueuePool, pool_size=1)
+    second = create_engine(f"sqlite:///{tmp_path / 'b.db'}", poolclass=TimedQueuePool, pool_size=1)
+    register_engine("twice", first)
+    register_engine("twice", second)
+
+    with first.connect():
+        assert pool_stats()["twice"]["checked_out"] == 1
+    with second.connect():
+        assert pool_stats()["twice"]["checked_out"] == 0
+
+    # Both hold connections inherited across a fork, so both are disposed
+    pools = first.pool, second.pool
+    dispose_engines()
+    assert first.pool is not pools[0] and second.pool is not pools[1]
+
+
+def test_app_pool_stats_describe_the_routes_engine():
+    try:
+        from controllers.routes import prediction
+        import src.db.database  # noqa: F401  (the second import, as in main.py)
+    except Exception as e:  # needs the database driver and a reachable database
+        pytest.skip(f"application database not available: {e}")
+    from db import pool
+
+    assert pool._engines["app"] is prediction.app_engine
+    assert pool_stats()["app"]["size"] == prediction.app_engine.pool.size()
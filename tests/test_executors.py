@@ -0,0 +1,50 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from utils import executors
+
+
+def worker_identity():
+    return os.getpid(), threading.current_thread().name
+
+
+@pytest.fixture(autouse=True)
+def fresh_executor():
+    executors.shutdown_inference_executor()
+    yield
+    executors.shutdown_inference_executor()
+
+
+def test_thread_executor_runs_off_the_loop(monkeypatch):
+    monkeypatch.setattr(executors, "INFERENCE_EXECUTOR", "thread")
+
+    async def scenario():
+        return await executors.run_inference(worker_identity)
+
+    pid, thread_name = asyncio.run(scenario())
+    assert pid == os.getpid()
+    assert thread_name.startswith("inference")
+
+    executor = executors._executor
+    asyncio.run(executors.restart_inference_executor())
+    assert executors._executor is executor  # threads share the registry, nothing to restart
+
+
+def test_process_executor_forks_workers_and_restarts(monkeypatch):
+    monkeypatch.setattr(executors, "INFERENCE_EXECUTOR", "process")
+    monkeypatch.setattr(executors, "INFERENCE_WORKERS", 1)
+    executor = executors.start_inference_executor()
+
+    async def scenario():
+        first = await executors.run_inference(worker_identity)
+        await executors.restart_inference_executor()
+        second = await executors.run_inference(worker_identity)
+        return first, second
+
+    (first_pid, _), (second_pid, _) = asyncio.run(scenario())
+    assert first_pid != os.getpid()
+    assert second_pid not in (os.getpid(), first_pid)
+    assert executors._executor is not executor
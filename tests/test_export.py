@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlmodel import select
+
+from models.model import Prediction
+from utils import export
+
+from test_pagination import make_session
+
+
+COLUMNS = ["id", "user_id", "created_at", "prediction", "probability", "input_features"]
+
+
+def chunks(chunk_size=4):
+    engine = make_session().get_bind()
+    statement = select(
+        Prediction.id, Prediction.user_id, Prediction.created_at, Prediction.prediction, Prediction.probability,
+        Prediction.input_features,
+    ).order_by(Prediction.id)
+    return export.iter_chunks(engine, statement, chunk_size=chunk_size)
+
+
+def test_ndjson_and_csv_stream_every_row():
+    parts = list(export.iter_ndjson(chunks()))
+    assert len(parts) == 7  # 25 rows in chunks of 4
+    rows = [json.loads(line) for line in b"".join(parts).decode().splitlines()]
+    assert [r["id"] for r in rows] == list(range(1, 26))
+    assert rows[9]["input_features"] == {"CustomerID": 10}
+
+    text = b"".join(export.iter_csv(chunks(), COLUMNS)).decode()
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert len(rows) == 25 and rows[0]["probability"] == "0.0"
+    assert json.loads(rows[9]["input_features"]) == {"CustomerID": 10}
+
+
+def test_parquet_row_groups():
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    schema = pa.schema([
+        ("id", pa.int64()), ("user_id", pa.int64()), ("created_at", pa.timestamp("us", tz="UTC")),
+        ("prediction", pa.int8()), ("probability", pa.float64()), ("input_features", pa.string()),
+    ])
+    data = b"".join(export.iter_parquet(chunks(chunk_size=10), schema))
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().column("id").to_pylist() == list(range(1, 26))
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from schemas.churn_input import ChurnInput
+from utils import inference
+from utils.ml_utils import ModelBundle, registry
+from utils.preprocessing import ChurnPreprocessor
+
+from test_preprocessing import make_frame, reference_features
+
+
+def make_bundle(version="1"):
+    frame = make_frame(n=80)
+    features = reference_features(frame)
+    preprocessor = ChurnPreprocessor.fit(frame, list(features.columns))
+    records = [ChurnInput(**row) for row in frame.to_dict("records")]
+    X = preprocessor.transform_many(records)
+    model = LogisticRegression(max_iter=500).fit(X, (frame["MonthlyRevenue"] > 50).astype(int))
+    bundle = ModelBundle(name="churn", version=version, model=model,
+                         train_columns=list(features.columns), preprocessor=preprocessor, scorer=model)
+    return bundle, records
+
+
+def test_batch_size_limit():
+    inference.check_batch_size(3, limit=3)
+    with pytest.raises(inference.BatchTooLargeError, match="Batch size 4 exceeds the limit of 3"):
+        inference.check_batch_size(4, limit=3)
+
+
+def test_score_records_keeps_input_order(monkeypatch):
+    bundle, records = make_bundle()
+    monkeypatch.setitem(registry._bundles, bundle.version, bundle)
+
+    shuffled = [records[i] for i in np.random.default_rng(1).permutation(len(records))]
+    _, labels, probabilities, timings = inference.score_records(shuffled, bundle.version)
+
+    assert set(timings) == {"preprocess", "inference"}
+    for record, label, probability in zip(shuffled, labels, probabilities):
+        single_labels, single_probabilities = inference.predict_features(
+            bundle.preprocessor.transform(record), bundle.version
+        )
+        assert label == single_labels[0]
+        assert probability == pytest.approx(single_probabilities[0])
+
+
+class StubModel:
+    """predict_proba returns fixed probabilities; churn is the first class."""
+
+    classes_ = np.array([1, 0])
+
+    def __init__(self, churn_probabilities):
+        self.churn_probabilities = np.asarray(churn_probabilities, dtype=float)
+
+    def predict_proba(self, X):
+        return np.column_stack([self.churn_probabilities, 1 - self.churn_probabilities])
+
+
+def test_threshold_applied_to_churn_probability():
+    model = StubModel([0.2, 0.5, 0.65, 0.9])
+    X = np.zeros((4, 1))
+
+    labels, probabilities = inference.predict(model, X)
+    np.testing.assert_allclose(probabilities, [0.2, 0.5, 0.65, 0.9])
+    assert labels.tolist() == [0, 0, 1, 1]  # a tie goes to the negative class
+
+    labels, _ = inference.predict(model, X, threshold=0.7)
+    assert labels.tolist() == [0, 0, 0, 1]
+    labels, _ = inference.predict(model, X, threshold=0.1)
+    assert labels.tolist() == [1, 1, 1, 1]
@@ -0,0 +1,18 @@
+import time
+
+from utils.lru import LRUCache
+
+
+def test_lru_bounds_and_ttl():
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})  # evicts b, the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1} and cache.get("c") == {"v": 3}
+
+    expiring = LRUCache(max_entries=2, ttl=0.01)
+    expiring.set("a", {"v": 1})
+    time.sleep(0.02)
+    assert expiring.get("a") is None
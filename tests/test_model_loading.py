@@ -0,0 +1,111 @@
+import json
+from types import SimpleNamespace
+
+import mlflow
+import mlflow.sklearn
+import pandas as pd
+import pytest
+
+from test_preprocessing import make_frame, reference_features
+from utils import ml_utils
+from utils.log_preprocessing import log_preprocessing_params
+from utils.ml_utils import MissingPreprocessingParamsError, ModelRegistry, ModelStatus
+from utils.preprocessing import PREPROCESSING_PARAMS_ARTIFACT, ChurnPreprocessor
+
+
+@pytest.fixture
+def fake_mlflow(monkeypatch, tmp_path):
+    """
+    MLflow calls of load_bundle() answered locally: ``artifacts`` maps
+    artifact name -> file content, ``run_tags`` model run id
+    ("model-run-<version>") -> tags.
+    """
+    artifacts = {"X_final_columns.csv": "columns\nMonthlyRevenue\n"}
+    run_tags = {}
+
+    class FakeClient:
+        def get_latest_versions(self, name, stages=None):
+            return [SimpleNamespace(version="3", run_id="model-run")]
+
+        def get_model_version(self, name, version):
+            return SimpleNamespace(version=version, run_id=f"model-run-{version}")
+
+        def get_run(self, run_id):
+            return SimpleNamespace(data=SimpleNamespace(tags=run_tags.get(run_id, {}), params={}))
+
+        def get_experiment_by_name(self, name):
+            return SimpleNamespace(experiment_id="1")
+
+    def download_artifacts(run_id, artifact_path):
+        # "<run id>/<name>" entries override the artifact for that run only
+        content = artifacts.get(f"{run_id}/{artifact_path}", artifacts.get(artifact_path))
+        if content is None:
+            raise OSError(f"{artifact_path} not found")
+        path = tmp_path / run_id / artifact_path
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(content)
+        return str(path)
+
+    monkeypatch.setattr(ml_utils, "MlflowClient", FakeClient)
+    monkeypatch.setattr(ml_utils, "MODEL_CACHE_ENABLED", False)
+    monkeypatch.setattr(mlflow, "set_tracking_uri", lambda uri: None)
+    monkeypatch.setattr("mlflow.sklearn.load_model", lambda uri: object())
+    monkeypatch.setattr(mlflow, "search_runs", lambda **kwargs: pd.DataFrame({"run_id": ["prep-run"]}))
+    monkeypatch.setattr(mlflow.artifacts, "download_artifacts", download_artifacts)
+    return SimpleNamespace(artifacts=artifacts, run_tags=run_tags)
+
+
+def test_missing_preprocessing_params_fail_the_load(fake_mlflow):
+    with pytest.raises(MissingPreprocessingParamsError, match="prep-run"):
+        ml_utils.load_bundle("Churn_RandomForest")
+
+    registry = ModelRegistry("Churn_RandomForest")
+    with pytest.raises(MissingPreprocessingParamsError):
+        registry.load()
+    assert registry.status == ModelStatus.FAILED and PREPROCESSING_PARAMS_ARTIFACT in registry.error
+
+
+def test_load_bundle_uses_the_logged_params(fake_mlflow):
+    params = {"numeric_medians": {}, "categorical_modes": {},
+              "scaler": {"columns": ["MonthlyRevenue"], "mean": [50.0], "scale": [10.0]}}
+    fake_mlflow.artifacts[PREPROCESSING_PARAMS_ARTIFACT] = json.dumps(params)
+
+    bundle = ml_utils.load_bundle("Churn_RandomForest")
+    assert bundle.version == "3" and bundle.preprocess_run_id == "prep-run"
+    assert bundle.preprocessor.fitted and bundle.preprocessor.to_dict()["scaler"] == params["scaler"]
+
+
+def test_each_version_uses_its_own_preprocessing_run(fake_mlflow):
+    def params(mean):
+        return json.dumps({"numeric_medians": {}, "categorical_modes": {},
+                           "scaler": {"columns": ["MonthlyRevenue"], "mean": [mean], "scale": [1.0]}})
+
+    fake_mlflow.artifacts["prep-a/" + PREPROCESSING_PARAMS_ARTIFACT] = params(10.0)
+    fake_mlflow.artifacts["prep-b/" + PREPROCESSING_PARAMS_ARTIFACT] = params(20.0)
+    fake_mlflow.artifacts[PREPROCESSING_PARAMS_ARTIFACT] = params(30.0)  # the latest run, "prep-run"
+    fake_mlflow.run_tags.update({
+        "model-run-1": {ml_utils.PREPROCESS_RUN_TAG: "prep-a"},
+        "model-run-2": {ml_utils.PREPROCESS_RUN_TAG: "prep-b"},
+    })
+
+    loaded = {v: ml_utils.load_bundle("Churn_RandomForest", version=v) for v in ("1", "2", "4")}
+
+    assert {v: b.preprocess_run_id for v, b in loaded.items()} == {"1": "prep-a", "2": "prep-b", "4": "prep-run"}
+    assert [b.preprocessor.to_dict()["scaler"]["mean"] for b in loaded.values()] == [[10.0], [20.0], [30.0]]
+
+
+def test_log_preprocessing_params_round_trip(tmp_path):
+    mlflow.set_tracking_uri(f"sqlite:///{tmp_path / 'mlflow.db'}")
+    try:
+        frame = make_frame()
+        train_columns = list(reference_features(frame).columns)
+        mlflow.create_experiment("preprocessing-test", artifact_location=(tmp_path / "artifacts").as_uri())
+        run_id = log_preprocessing_params(frame, train_columns, experiment_name="preprocessing-test")
+
+        with open(mlflow.artifacts.download_artifacts(run_id=run_id, artifact_path=PREPROCESSING_PARAMS_ARTIFACT)) as f:
+            logged = json.load(f)
+        columns_uri = mlflow.artifacts.download_artifacts(run_id=run_id, artifact_path="X_final_columns.csv")
+        assert pd.read_csv(columns_uri)["columns"].tolist() == train_columns
+        assert logged == ChurnPreprocessor.fit(frame, train_columns).to_dict()
+    finally:
+        mlflow.set_tracking_uri(None)
@@ -0,0 +1,155 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from test_inference import StubModel, make_bundle
+from utils import ml_utils, model_reload
+from utils.ml_utils import ModelBundle, ModelRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fresh = ModelRegistry("churn", keep_versions=2)
+    monkeypatch.setattr(model_reload, "registry", fresh)
+    return fresh
+
+
+@pytest.fixture
+def mlflow_versions(monkeypatch):
+    """Registered versions served by a fake load_bundle; the last one is the latest."""
+    versions = {}
+    loads = []
+
+    def fake_load(model_name, version=None):
+        version = str(version) if version is not None else list(versions)[-1]
+        loads.append(version)
+        return versions[version]
+
+    def register(version):
+        model = StubModel([0.5])
+        versions[version] = ModelBundle(name="churn", version=version, model=model,
+                                        train_columns=["a"], preprocessor=None, scorer=model)
+        return versions[version]
+
+    monkeypatch.setattr(ml_utils, "load_bundle", fake_load)
+    return SimpleNamespace(register=register, loads=loads, versions=versions)
+
+
+def test_failed_load_is_retried_with_backoff(monkeypatch, registry):
+    bundle, _ = make_bundle(version="3")
+    attempts = []
+
+    def flaky_load(model_name, version=None):
+        attempts.append(model_name)
+        if len(attempts) < 4:
+            raise OSError("MLflow unreachable")
+        return bundle
+
+    waits = []
+
+    async def record_sleep(delay):
+        waits.append((delay, registry.readiness()))
+
+    monkeypatch.setattr(ml_utils, "load_bundle", flaky_load)
+    monkeypatch.setattr(model_reload, "asyncio", SimpleNamespace(to_thread=asyncio.to_thread, sleep=record_sleep))
+    assert registry.readiness()["status"] == "not_loaded"
+
+    loaded = asyncio.run(model_reload.load_with_retry(initial_delay=1, max_delay=3))
+
+    assert loaded is bundle and len(attempts) == 4
+    assert [delay for delay, _ in waits] == [1, 2, 3]
+    for _, readiness in waits:
+        assert readiness["status"] == "failed"
+        assert readiness["error"] == "OSError: MLflow unreachable"
+        assert readiness["model_version"] is None
+
+    readiness = registry.readiness()
+    assert readiness["status"] == "ready" and readiness["error"] is None
+    assert readiness["model_version"] == "3"
+
+
+def test_prepare_activate_and_prune(registry, mlflow_versions):
+    for version in "1234":
+        mlflow_versions.register(version)
+    assert registry.load().version == "4"
+
+    # Prepared versions stay resident without being served
+    assert registry.prepare("1").version == "1"
+    assert registry.get().version == "4"
+    registry.prepare("2", pin=True)
+    assert sorted(registry._bundles) == ["1", "2", "4"]
+
+    # Activating prunes the oldest inactive, unpinned versions beyond keep_versions
+    registry.activate(registry.prepare("3"))
+    assert registry.get().version == "3"
+    assert sorted(registry._bundles) == ["2", "3", "4"]
+
+    registry.unpin("2")
+    assert sorted(registry._bundles) == ["3", "4"]
+
+    # Resident versions are not loaded again
+    mlflow_versions.loads.clear()
+    assert registry.prepare("4") is mlflow_versions.versions["4"]
+    assert mlflow_versions.loads == []
+
+
+def test_get_version_loads_outside_the_lock(monkeypatch, registry, mlflow_versions):
+    bundle = mlflow_versions.register("7")
+
+    def load_checking_lock(model_name, version=None):
+        assert not registry._lock.locked()
+        return bundle
+
+    monkeypatch.setattr(ml_utils, "load_bundle", load_checking_lock)
+    assert registry.get_version(7) is bundle
+    assert registry.resident("7") is bundle
+
+    monkeypatch.setattr(ml_utils, "load_bundle", None)  # resident: no second load
+    assert registry.get_version("7") is bundle
+
+
+def test_reload_swaps_to_the_latest_version(monkeypatch, registry, mlflow_versions):
+    registered, restarts = [], []
+
+    async def restart():
+        restarts.append(registry.get().version)
+
+    monkeypatch.setattr(model_reload, "register_bundle", lambda bundle: registered.append(bundle.version))
+    monkeypatch.setattr(model_reload, "restart_inference_executor", restart)
+    monkeypatch.setattr(registry, "latest_version", lambda: list(mlflow_versions.versions)[-1])
+    mlflow_versions.register("1")
+    registry.load()
+    mlflow_versions.register("2")
+
+    result = asyncio.run(model_reload.reload_model())
+    assert result == {"changed": True, "model_version": "2", "previous_version": "1"}
+    assert registered == ["2"] and restarts == ["1"]  # workers re-forked before the swap
+    assert registry.get().version == "2"
+
+    assert asyncio.run(model_reload.reload_model()) == {"changed": False, "model_version": "2"}
+
+
+def test_poller_waits_for_the_initial_load(monkeypatch, registry, mlflow_versions):
+    calls = []
+
+    async def fake_reload():
+        calls.append(registry.get().version)
+        if len(calls) == 1:
+            raise OSError("MLflow unreachable")  # a failed poll does not stop the poller
+
+    monkeypatch.setattr(model_reload, "reload_model", fake_reload)
+    mlflow_versions.register("1")
+
+    async def scenario():
+        poller = asyncio.create_task(model_reload._poll(0))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert calls == []
+        registry.load()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        poller.cancel()
+
+    asyncio.run(scenario())
+    assert len(calls) >= 2 and set(calls) == {"1"}
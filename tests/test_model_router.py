@@ -0,0 +1,126 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from utils import batching, ml_utils, model_router as router_module
+from utils.metrics import metrics
+from utils.ml_utils import ModelBundle, ModelRegistry
+from utils.model_router import ModelRouter, RoutingConfig, _bucket
+
+
+class ConstantModel:
+    classes_ = np.array([0, 1])
+
+    def __init__(self, churn_probability):
+        self.churn_probability = churn_probability
+
+    def predict_proba(self, X):
+        return np.tile([1 - self.churn_probability, self.churn_probability], (len(X), 1))
+
+
+class RecordingPreprocessor:
+    def __init__(self):
+        self.seen = []
+
+    def transform_many(self, records):
+        self.seen.append(list(records))
+        return np.zeros((len(records), 1))
+
+
+def make_stub_bundle(version, churn_probability=0.5):
+    model = ConstantModel(churn_probability)
+    return ModelBundle(name="churn", version=version, model=model, train_columns=["a"],
+                       preprocessor=RecordingPreprocessor(), scorer=model)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fresh = ModelRegistry("churn", keep_versions=1)
+    bundles = {v: make_stub_bundle(v, p) for v, p in [("1", 0.2), ("2", 0.9), ("3", 0.4)]}
+
+    async def no_restart():
+        pass
+
+    monkeypatch.setattr(ml_utils, "registry", fresh)
+    monkeypatch.setattr(router_module, "registry", fresh)
+    monkeypatch.setattr(ml_utils, "load_bundle", lambda name, version=None: bundles[str(version or "1")])
+    monkeypatch.setattr(router_module, "register_bundle", lambda bundle: None)
+    monkeypatch.setattr(router_module, "restart_inference_executor", no_restart)
+    fresh.load()
+    return fresh
+
+
+def test_canary_takes_a_sticky_share_of_users(registry):
+    router = ModelRouter()
+    asyncio.run(router.configure(RoutingConfig(canary_version="2", canary_percent=30)))
+
+    routed = {user_id: router.route(user_id).version for user_id in range(1000)}
+    assert all(version == ("2" if _bucket(user_id) < 30 else "1") for user_id, version in routed.items())
+    assert 250 < sum(version == "2" for version in routed.values()) < 350
+    assert all(router.route(user_id).version == version for user_id, version in routed.items())
+
+
+def test_routing_versions_are_pinned_until_replaced(registry):
+    router = ModelRouter()
+    asyncio.run(router.configure(RoutingConfig(canary_version="2", canary_percent=50, shadow_version="3")))
+    assert registry.readiness()["pinned_versions"] == ["2", "3"]
+    assert sorted(registry._bundles) == ["1", "2", "3"]  # kept beyond keep_versions
+
+    # Dropping the shadow unpins it, and _prune evicts it
+    asyncio.run(router.configure(RoutingConfig(canary_version="2", canary_percent=50)))
+    assert registry.readiness()["pinned_versions"] == ["2"]
+    assert sorted(registry._bundles) == ["1", "2"]
+
+
+def test_shadow_scores_through_its_own_preprocessor(monkeypatch, registry):
+    async def run_inline(fn, *args):
+        return fn(*args)
+
+    monkeypatch.setattr(batching, "batcher", None)
+    monkeypatch.setattr(batching, "run_inference", run_inline)
+    metrics.reset()
+    router = ModelRouter()
+    asyncio.run(router.configure(RoutingConfig(shadow_version="2")))
+    records = ["customer-a", "customer-b"]
+
+    async def scenario():
+        router.shadow(records, registry.get(), np.array([0.2, 0.2]))
+        await router.stop()
+
+    asyncio.run(scenario())
+
+    assert registry.resident("2").preprocessor.seen == [records]
+    assert registry.get().preprocessor.seen == []
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["shadow.scored"] == 2
+    assert snapshot["counters"]["shadow.agreements"] == 0
+    assert snapshot["summaries"]["shadow.probability_delta"]["mean"] == pytest.approx(0.7)
+
+
+def test_shadow_is_skipped_without_a_free_inference_slot(monkeypatch, registry):
+    calls = []
+
+    async def run_recorded(fn, *args):
+        calls.append(fn)
+        return fn(*args)
+
+    monkeypatch.setattr(batching, "run_inference", run_recorded)
+    metrics.reset()
+    router = ModelRouter()
+    asyncio.run(router.configure(RoutingConfig(shadow_version="2")))
+
+    async def scenario():
+        batcher = batching.MicroBatcher(max_in_flight=1)
+        batcher.start()
+        monkeypatch.setattr(batching, "batcher", batcher)
+        await batcher._slots.acquire()  # a primary batch is running
+        router.shadow(["customer"], registry.get(), np.array([0.2]))
+        await router.stop()
+        batcher._slots.release()
+        await batcher.stop()
+
+    asyncio.run(scenario())
+
+    assert calls == []
+    assert metrics.snapshot()["counters"]["shadow.skipped"] == 1
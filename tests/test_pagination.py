@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from models.model import Prediction, User
+from schemas.schema import PredictionRead
+from utils.pagination import PageParams, as_naive_utc, encode_cursor, paginate
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    session = Session(engine)
+    session.add(User(id=1, username="u", email="u@example.com", hashed_password="x"))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    # Pairs of rows share a timestamp so the id tie-breaker is exercised;
+    # the first five rows use the legacy JSON text column
+    for i in range(25):
+        inputs = {"input_data": '{"TotalCalls": 0.5}'} if i < 5 else {"input_features": {"CustomerID": i + 1}}
+        session.add(Prediction(
+            id=i + 1, user_id=1, prediction=i % 2, **inputs,
+            probability=i / 25, created_at=start + timedelta(minutes=i // 2),
+        ))
+    session.commit()
+    return session
+
+
+def test_keyset_pages_cover_every_row_once():
+    session = make_session()
+    seen, cursor = [], None
+    while True:
+        page = paginate(session, select(Prediction), Prediction.created_at, Prediction.id, PageParams(10, cursor))
+        seen.extend(p.id for p in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == list(range(25, 0, -1))
+
+
+def test_filters_compose_with_cursor():
+    session = make_session()
+    statement = select(Prediction).where(Prediction.probability >= 0.5)
+    first = paginate(session, statement, Prediction.created_at, Prediction.id, PageParams(5, None))
+    second = paginate(session, statement, Prediction.created_at, Prediction.id, PageParams(5, first["next_cursor"]))
+
+    assert [p.id for p in first["items"] + second["items"]] == list(range(25, 15, -1))
+
+
+def test_prediction_read_decodes_both_storage_formats():
+    session = make_session()
+    legacy, current = session.get(Prediction, 1), session.get(Prediction, 10)
+
+    assert PredictionRead.model_validate(legacy).input_features == {"TotalCalls": 0.5}
+    assert PredictionRead.model_validate(current).input_features == {"CustomerID": 10}
+
+
+def test_cursor_timestamps_are_compared_as_naive_utc():
+    session = make_session()
+    berlin = timezone(timedelta(hours=1))
+    assert as_naive_utc(datetime(2024, 1, 1, 1, 5, tzinfo=berlin)) == datetime(2024, 1, 1, 0, 5)
+    assert as_naive_utc(datetime(2024, 1, 1, 0, 5)) == datetime(2024, 1, 1, 0, 5)
+
+    # The same position written naive and with an offset selects the same rows
+    naive = encode_cursor(datetime(2024, 1, 1, 0, 5), 11)
+    aware = encode_cursor(datetime(2024, 1, 1, 1, 5, tzinfo=berlin), 11)
+    pages = [paginate(session, select(Prediction), Prediction.created_at, Prediction.id, PageParams(3, cursor))
+             for cursor in (naive, aware)]
+    assert [p.id for p in pages[0]["items"]] == [p.id for p in pages[1]["items"]] == [10, 9, 8]
@@ -0,0 +1,92 @@
+from contextlib import nullcontext
+from datetime import date, datetime, timezone
+
+from utils.partitions import (
+    add_months, ensure_partitions, expired_months, parse_partition, partition_name, purge_partitions,
+)
+
+
+class FakeConnection:
+    """Answers the catalog queries of utils.partitions from ``partitions`` and records the DDL."""
+
+    def __init__(self, partitions, fail_on=()):
+        self.partitions = partitions  # partitioned table -> child names
+        self.fail_on = fail_on
+        self.ddl = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_partitioned_table" in sql:
+            return Result([1] if params["t"] in self.partitions else [])
+        if "pg_inherits" in sql:
+            return Result(self.partitions.get(params["t"], []))
+        if any(name in sql for name in self.fail_on):
+            raise RuntimeError("default partition contains rows for this month")
+        self.ddl.append(sql)
+        return Result([])
+
+    def begin_nested(self):
+        return nullcontext()
+
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return iter(self.rows)
+
+
+def test_partition_names_round_trip():
+    month = date(2025, 12, 1)
+    assert partition_name("predictionlog", month) == "predictionlog_2025_12"
+    assert parse_partition("predictionlog", "predictionlog_2025_12") == month
+    assert parse_partition("prediction", "predictionlog_2025_12") is None
+    assert parse_partition("prediction", "prediction_default") is None
+    assert add_months(month, 1) == date(2026, 1, 1) and add_months(month, -12) == date(2024, 12, 1)
+
+
+def test_retention_keeps_current_month_plus_window():
+    months = [date(2026, m, 1) for m in range(1, 12)]
+    now = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+    assert expired_months(months, now, 0) == []
+    assert expired_months(months, now, 3) == [date(2026, m, 1) for m in range(1, 7)]
+
+
+def test_ensure_partitions_creates_missing_months():
+    conn = FakeConnection(
+        {"prediction": ["prediction_default", "prediction_2026_10"], "predictionlog": []},
+        fail_on=["predictionlog_2026_11"],
+    )
+
+    created = ensure_partitions(conn, date(2026, 10, 1), date(2026, 11, 1))
+
+    # predictionmetadata is not partitioned (not migrated): skipped; a failed month is reported, not raised
+    assert created == ["prediction_2026_11", "predictionlog_2026_10"]
+    assert 'CREATE TABLE IF NOT EXISTS "prediction_default" PARTITION OF "prediction" DEFAULT' in conn.ddl
+    assert any("FROM ('2026-11-01') TO ('2026-12-01')" in sql for sql in conn.ddl)
+
+
+def test_purge_detaches_and_optionally_drops_expired_months():
+    children = ["predictionlog_default", "predictionlog_2026_05", "predictionlog_2026_06", "predictionlog_2026_07"]
+    now = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+    conn = FakeConnection({"predictionlog": children})
+    assert purge_partitions(conn, now, 3) == ["predictionlog_2026_05", "predictionlog_2026_06"]
+    assert conn.ddl == [
+        'ALTER TABLE "predictionlog" DETACH PARTITION "predictionlog_2026_05"',
+        'DROP TABLE "predictionlog_2026_05"',
+        'ALTER TABLE "predictionlog" DETACH PARTITION "predictionlog_2026_06"',
+        'DROP TABLE "predictionlog_2026_06"',
+    ]
+
+    conn = FakeConnection({"predictionlog": children})
+    assert purge_partitions(conn, now, 3, action="detach") == ["predictionlog_2026_05", "predictionlog_2026_06"]
+    assert not any(sql.startswith("DROP") for sql in conn.ddl)
+
+    conn = FakeConnection({"predictionlog": children})
+    assert purge_partitions(conn, now, 0) == [] and conn.ddl == []
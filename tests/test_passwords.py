@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from auth import passwords
+
+
+@pytest.fixture(autouse=True)
+def inline_hashing(monkeypatch):
+    monkeypatch.setattr(passwords, "PASSWORD_HASH_WORKERS", 0)
+
+
+def test_legacy_and_outdated_hashes_are_upgraded():
+    legacy = BcryptHasher(rounds=4).hash("s3cret")
+    valid, new_hash = passwords.verify_password("s3cret", legacy)
+    assert valid and new_hash.startswith("$argon2id$")
+
+    cheaper = Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1).hash("s3cret")
+    valid, new_hash = passwords.verify_password("s3cret", cheaper)
+    assert valid and new_hash is not None
+
+    assert passwords.verify_password("s3cret", new_hash) == (True, None)
+    assert passwords.verify_password("wrong", new_hash) == (False, None)
+
+
+def test_saturated_pool_returns_503(monkeypatch):
+    monkeypatch.setattr(passwords, "_slots", threading.BoundedSemaphore(1))
+    passwords._slots.acquire()  # one sign-in already in flight
+
+    with pytest.raises(HTTPException) as exc_info:
+        passwords.hash_password("s3cret")
+    assert exc_info.value.status_code == 503 and exc_info.value.headers["Retry-After"] == "1"
@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+
+from schemas.churn_input import ChurnInput
+from utils import audit_writer, batching, scoring
+from utils.metrics import StageTimer
+from utils.ml_utils import ModelBundle
+from utils.prediction_cache import MemorySharedBackend, PredictionCache, canonical_key
+
+from test_audit_writer import make_writer
+from test_inference import StubModel
+from test_preprocessing import make_frame
+
+
+def make_input(**overrides):
+    record = make_frame(1).to_dict("records")[0]
+    record.update(overrides)
+    return ChurnInput(**record)
+
+
+def test_key_is_stable_and_versioned():
+    data = make_input(MonthlyRevenue=0.0)
+    reordered = ChurnInput(**dict(reversed(list(data.model_dump().items()))))
+
+    assert canonical_key(data, "m", "1") == canonical_key(reordered, "m", "1")
+    assert canonical_key(data, "m", "1") == canonical_key(make_input(MonthlyRevenue=-0.0), "m", "1")
+    assert canonical_key(data, "m", "1") != canonical_key(data, "m", "2")
+    assert canonical_key(data, "m", "1") != canonical_key(make_input(MonthlyRevenue=0.5), "m", "1")
+
+
+def test_shared_store_fills_other_workers():
+    shared = MemorySharedBackend()
+    first, second = PredictionCache(shared=shared), PredictionCache(shared=shared)
+
+    async def scenario():
+        await first.set("k", {"churn_prediction": 1, "churn_probability": 0.8})
+        assert await second.get("k") == {"churn_prediction": 1, "churn_probability": 0.8}
+        second.clear()
+        assert await second.get("k") is not None  # refilled from the shared store
+        assert await second.get("missing") is None
+
+    asyncio.run(scenario())
+
+
+def test_cache_hit_still_gives_each_user_their_own_prediction(monkeypatch):
+    cache = PredictionCache()
+    writer = make_writer()
+    scored = []
+
+    async def fake_predict(features, version):
+        scored.append(version)
+        return np.array([1]), np.array([0.8])
+
+    class Preprocessor:
+        def transform(self, data):
+            return np.zeros((1, 1))
+
+    monkeypatch.setattr(scoring, "prediction_cache", cache)
+    monkeypatch.setattr(batching, "predict", fake_predict)
+    monkeypatch.setattr(audit_writer, "audit_writer", writer)
+    monkeypatch.setitem(audit_writer._model_ids, ("churn", "1"), 42)
+    model = StubModel([0.8])
+    bundle = ModelBundle(name="churn", version="1", model=model, train_columns=["a"],
+                         preprocessor=Preprocessor(), scorer=model)
+    data = make_input()
+
+    async def scenario():
+        first = await scoring.score_one(data, bundle, None, 1, StageTimer("predict"))
+        second = await scoring.score_one(data, bundle, None, 2, StageTimer("predict"))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert scored == ["1"]  # the second request is served from the cache
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert first["prediction_id"] != second["prediction_id"]
+    for result in (first, second):
+        assert (result["churn_prediction"], result["churn_probability"]) == (1, 0.8)
+    assert cache.local.get(canonical_key(data, "churn", "1")) == {"churn_prediction": 1, "churn_probability": 0.8}
+
+    # Both requests are in the audit trail, each under its own user and id
+    queued = [writer._queue.get_nowait() for _ in range(writer._queue.qsize())]
+    assert [(r.user_id, r.prediction_id, r.model_id) for r in queued] == [
+        (1, first["prediction_id"], 42), (2, second["prediction_id"], 42)
+    ]
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from schemas.churn_input import ChurnInput
+from utils.preprocessing import ChurnPreprocessor, LOW_CARD_FEATURES, NUMERIC_FEATURES
+
+
+def make_frame(n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "MonthlyRevenue": rng.normal(50, 10, n),
+        "MonthlyMinutes": rng.normal(500, 100, n),
+        "OverageMinutes": rng.normal(40, 5, n),
+        "UnansweredCalls": rng.integers(0, 50, n),
+        "CustomerCareCalls": rng.integers(0, 10, n),
+        "PercChangeMinutes": rng.normal(0, 20, n),
+        "PercChangeRevenues": rng.normal(0, 5, n),
+        "InboundCalls": rng.integers(0, 30, n),
+        "OutboundCalls": rng.integers(0, 30, n),
+        "ReceivedCalls": rng.integers(0, 200, n),
+        "TotalRecurringCharge": rng.normal(45, 8, n),
+        "CurrentEquipmentDays": rng.integers(0, 900, n),
+        "DroppedBlockedCalls": rng.integers(0, 20, n),
+        "MonthsInService": rng.integers(1, 60, n),
+        "ActiveSubs": rng.integers(1, 4, n),
+        "RespondsToMailOffers": rng.choice(["Yes", "No"], n),
+        "RetentionCalls": rng.integers(0, 3, n),
+        "RetentionOffersAccepted": rng.integers(0, 2, n),
+        "MadeCallToRetentionTeam": rng.choice(["Yes", "No"], n),
+        "ReferralsMadeBySubscriber": rng.integers(0, 3, n),
+        "CreditRating": rng.choice(["1-Highest", "2-High", "3-Good"], n),
+        "IncomeGroup": rng.choice(["0", "4", "6"], n),
+        "Occupation": rng.choice(["Crafts", "Other", "Professional"], n),
+        "PrizmCode": rng.choice(["Other", "Suburban", "Town"], n),
+    })
+
+
+def reference_features(frame):
+    """Training-time pandas pipeline (before scaling)."""
+    df = frame.copy()
+    df["TotalCalls"] = df["InboundCalls"] + df["OutboundCalls"]
+    df = df.drop(columns=["InboundCalls", "OutboundCalls"])
+    for col in ["RespondsToMailOffers", "MadeCallToRetentionTeam"]:
+        df[col] = df[col].map({"Yes": 1, "No": 0})
+    dummies = pd.get_dummies(df[LOW_CARD_FEATURES], drop_first=True).astype(float)
+    df = pd.concat([df.drop(columns=LOW_CARD_FEATURES), dummies], axis=1)
+    return df.astype(float)
+
+
+def test_transform_matches_training_pipeline():
+    frame = make_frame()
+    expected = reference_features(frame)
+    train_columns = list(expected.columns)
+
+    preprocessor = ChurnPreprocessor.fit(frame, train_columns)
+    records = [ChurnInput(**row) for row in frame.to_dict("records")]
+    X = preprocessor.transform_many(records)
+
+    scaled = [c for c in NUMERIC_FEATURES if c in train_columns]
+    expected[scaled] = (expected[scaled] - expected[scaled].mean()) / expected[scaled].std(ddof=0)
+    np.testing.assert_allclose(X, expected[train_columns].to_numpy(), rtol=1e-12, atol=1e-12)
+
+    # Single-row transform uses the fitted statistics, not the row itself
+    np.testing.assert_allclose(preprocessor.transform(records[3]), X[3:4])
+
+
+def test_round_trip_and_unknown_category():
+    frame = make_frame()
+    train_columns = list(reference_features(frame).columns)
+    preprocessor = ChurnPreprocessor.fit(frame, train_columns)
+    restored = ChurnPreprocessor.from_dict(train_columns, preprocessor.to_dict())
+
+    row = ChurnInput(**{**frame.iloc[0].to_dict(), "Occupation": "Astronaut"})
+    X = restored.transform(row)
+    np.testing.assert_allclose(X, preprocessor.transform(row))
+    occupation_cols = [i for i, c in enumerate(train_columns) if c.startswith("Occupation_")]
+    assert not X[0, occupation_cols].any()
+
+
+def test_fit_imputes_integer_fields_with_a_whole_number():
+    frame = make_frame(n=4)
+    frame["UnansweredCalls"] = [1.0, 4.0, np.nan, np.nan]  # median 2.5
+    frame["InboundCalls"] = [3.0, np.nan, 6.0, np.nan]  # median 4.5
+    train_columns = list(reference_features(make_frame(n=4)).columns)
+
+    preprocessor = ChurnPreprocessor.fit(frame, train_columns)
+
+    assert preprocessor.numeric_medians["UnansweredCalls"] == 2.0
+    assert preprocessor.numeric_medians["MonthlyRevenue"] == pytest.approx(frame["MonthlyRevenue"].median())
+    assert preprocessor.fitted
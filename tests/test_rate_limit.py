@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from auth import api_keys, tokens
+from controllers.middleware.rate_limit import RateLimitMiddleware
+from utils import rate_limit
+from utils.rate_limit import ConcurrencyLimiter, MemoryRateLimitBackend, TokenBucket
+
+from test_api_keys import add_key, session  # noqa: F401  (fixture)
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=1, capacity=2)
+    start = time.monotonic()
+    assert bucket.take(now=start) == 0 and bucket.take(now=start) == 0
+    assert bucket.take(now=start) == pytest.approx(1, abs=0.01)
+    assert bucket.take(now=start + 1) == 0
+
+
+def make_client(monkeypatch, per_minute, concurrency=None):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BURST_SECONDS", 1)
+    monkeypatch.setattr("controllers.middleware.rate_limit.RATE_LIMIT_PER_MINUTE", per_minute)
+    monkeypatch.setattr("controllers.middleware.rate_limit.RATE_LIMIT_ANONYMOUS_PER_MINUTE", per_minute)
+
+    async def predict(request):
+        await asyncio.sleep(float(request.query_params.get("sleep", 0)))
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/predict/", predict, methods=["POST"]), Route("/health", predict)])
+    app.add_middleware(
+        RateLimitMiddleware, paths=["/predict"], backend=MemoryRateLimitBackend(),
+        concurrency=concurrency or ConcurrencyLimiter(limit=0), enabled=True,
+    )
+    return TestClient(app)
+
+
+def test_buckets_are_per_user(monkeypatch):
+    client = make_client(monkeypatch, per_minute=120)  # burst of 2
+    verifier = tokens.TokenVerifier("HS256", signing_key="test-secret")
+    monkeypatch.setattr(tokens, "token_verifier", verifier)
+    headers = {"Authorization": f"Bearer {verifier.issue({'sub': 'ana'})}"}
+
+    assert [client.post("/predict/", headers=headers).status_code for _ in range(3)] == [200, 200, 429]
+    assert client.post("/predict/").status_code == 200  # anonymous callers have their own bucket
+    assert client.get("/health").status_code == 200  # other paths are not limited
+
+    response = client.post("/predict/", headers=headers)
+    assert response.status_code == 429 and int(response.headers["Retry-After"]) >= 1
+
+
+def test_anonymous_callers_are_limited_per_ip(monkeypatch):
+    client = make_client(monkeypatch, per_minute=60)  # burst of 1
+    assert client.post("/predict/").status_code == 200
+    assert client.post("/predict/", headers={"X-API-Key": "not-a-key"}).status_code == 429
+
+
+def test_api_keys_get_their_own_rate(monkeypatch, session):
+    client = make_client(monkeypatch, per_minute=60)  # default: burst of 1
+    key = add_key(session, rate_limit_per_minute=180)  # burst of 3
+    api_keys.authenticate(key, session)  # loaded into the index, as after its first request
+
+    assert [client.post("/predict/", headers={"X-API-Key": key}).status_code for _ in range(4)] == [200, 200, 200, 429]
+    assert client.post("/predict/").status_code == 200  # not charged to the caller's IP
+
+
+def test_unresolved_keys_stay_on_the_ip_bucket(monkeypatch, session):
+    client = make_client(monkeypatch, per_minute=60)  # burst of 1
+    key = add_key(session, rate_limit_per_minute=180)
+
+    # Rotating made-up key ids does not buy a fresh bucket per id
+    fake_keys = [f"mlk_fake{i}_secret" for i in range(3)]
+    assert [client.post("/predict/", headers={"X-API-Key": k}).status_code for k in fake_keys] == [200, 429, 429]
+
+    # Nor does a real key before its first authenticated request resolves it
+    assert client.post("/predict/", headers={"X-API-Key": key}).status_code == 429
+    api_keys.authenticate(key, session)
+    assert client.post("/predict/", headers={"X-API-Key": key}).status_code == 200
+
+
+def test_requests_beyond_the_concurrency_limit_are_shed():
+    limiter = ConcurrencyLimiter(limit=1, queue_timeout=0.05)
+
+    async def scenario():
+        assert await limiter.acquire()
+        assert not await limiter.acquire()  # queued past the timeout
+        limiter.release()
+        assert await limiter.acquire()
+
+    asyncio.run(scenario())
+
+
+def test_served_app_limits_predict(monkeypatch):
+    try:
+        import main
+    except Exception as e:  # needs the application database
+        pytest.skip(f"main not importable here: {e}")
+
+    assert RateLimitMiddleware in [m.cls for m in main.app.user_middleware]
+    paths = {route.path for route in main.app.routes}
+    assert {"/predict/", "/predict/batch", "/auth/login", "/api/login"} <= paths
+
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BURST_SECONDS", 1)
+    monkeypatch.setattr("controllers.middleware.rate_limit.RATE_LIMIT_ANONYMOUS_PER_MINUTE", 60)
+    client = TestClient(main.app, raise_server_exceptions=False)  # no lifespan: only the limiter matters
+    statuses = [client.post("/predict/", headers={"X-API-Key": f"mlk_fake{i}_secret"}).status_code
+                for i in range(2)]
+    assert statuses[0] != 429 and statuses[1] == 429
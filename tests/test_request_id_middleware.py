@@ -0,0 +1,39 @@
+import structlog
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.testclient import TestClient
+
+from controllers.middleware.middleware import RequestIDMiddleware
+
+
+def make_app(middleware, **options):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int, request: Request):
+        return {"request_id": request.state.request_id, "bound": structlog.contextvars.get_contextvars()}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]))
+
+    app.add_middleware(middleware, **options)
+    return app
+
+
+def test_request_id_context_and_access_log():
+    client = TestClient(make_app(RequestIDMiddleware, log_requests=True))
+
+    with structlog.testing.capture_logs(processors=[structlog.contextvars.merge_contextvars]) as logs:
+        response = client.get("/items/7", headers={"X-Request-ID": "abc"})
+    assert response.headers["X-Request-ID"] == "abc"
+    assert response.json()["request_id"] == "abc"
+    assert response.json()["bound"]["path"] == "/items/7"
+
+    (entry,) = [e for e in logs if e["event"] == "request_completed"]
+    assert entry["request_id"] == "abc" and entry["status_code"] == 200
+    assert entry["route"] == "/items/{item_id}" and entry["duration_ms"] >= 0
+
+    generated = client.get("/items/8").headers["X-Request-ID"]
+    assert len(generated) == 36 and generated != "abc"
+    assert client.get("/stream").content == b"abc"
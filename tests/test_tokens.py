@@ -0,0 +1,61 @@
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from auth.tokens import ACCESS_TOKEN_AUDIENCE, PHONE_TOKEN_AUDIENCE, InvalidTokenError, TokenVerifier
+from utils.metrics import metrics
+
+
+def test_verified_claims_are_cached_until_expiry():
+    verifier = TokenVerifier("HS256", signing_key="test-secret")
+    token = verifier.issue({"sub": "ana"}, timedelta(minutes=5))
+    metrics.reset()
+
+    first = verifier.verify(token)
+    assert verifier.verify(token) is first and first["sub"] == "ana"
+    counters = metrics.snapshot()["counters"]
+    assert counters["auth.token_cache.misses"] == 1 and counters["auth.token_cache.hits"] == 1
+
+    with pytest.raises(InvalidTokenError):
+        verifier.verify(verifier.issue({"sub": "ana"}, timedelta(seconds=-1)))
+    with pytest.raises(InvalidTokenError):
+        TokenVerifier("HS256", signing_key="other-secret").verify(token)
+
+
+def test_tokens_are_rejected_by_the_other_auth_stack():
+    verifier = TokenVerifier("HS256", signing_key="test-secret")
+    phone_token = verifier.issue({"sub": "+15550100"}, audience=PHONE_TOKEN_AUDIENCE)
+    user_token = verifier.issue({"sub": "ana"})
+
+    assert verifier.verify(phone_token, PHONE_TOKEN_AUDIENCE)["sub"] == "+15550100"  # now cached
+    assert verifier.verify(user_token)["aud"] == ACCESS_TOKEN_AUDIENCE
+    with pytest.raises(InvalidTokenError):
+        verifier.verify(phone_token)
+    with pytest.raises(InvalidTokenError):
+        verifier.verify(user_token, PHONE_TOKEN_AUDIENCE)
+
+    # Tokens signed with the same key but without an audience are refused too
+    with pytest.raises(InvalidTokenError):
+        verifier.verify(jwt.encode({"sub": "ana", "exp": time.time() + 60}, "test-secret", algorithm="HS256"))
+
+
+def test_eddsa_public_key_only_verifier():
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    token = TokenVerifier("EdDSA", signing_key=private_pem).issue({"sub": "bob"})
+
+    verifier = TokenVerifier("EdDSA", verification_key=public_pem)
+    assert verifier.verify(token)["sub"] == "bob"
+    with pytest.raises(RuntimeError):
+        verifier.issue({"sub": "bob"})
+    with pytest.raises(InvalidTokenError):
+        verifier.verify(token[:-2] + ("AA" if token[-2:] != "AA" else "BB"))
@@ -0,0 +1,17 @@
+from auth import user_cache
+from models.model import User, UserRole
+
+
+def test_cached_users_are_detached_and_invalidated_per_username():
+    user = User(id=1, username="ana", email="ana@example.com", hashed_password="x", role=UserRole.ADMIN)
+    cached = user_cache.put("ana", 100, user)
+    user_cache.put("bob", 100, User(id=2, username="bob", email="bob@example.com", hashed_password="x"))
+
+    assert cached is not user and user_cache.get("ana", 100) is cached
+    assert user_cache.get("ana", 200) is None  # a newer token is looked up again
+
+    user_cache.invalidate("ana")
+    assert user_cache.get("ana", 100) is None
+    assert user_cache.get("bob", 100) is not None
+    user_cache.invalidate()
+    assert user_cache.get("bob", 100) is None